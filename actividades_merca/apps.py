@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ActividadesMercaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'actividades_merca'
+
+    def ready(self):
+        from . import signals  # noqa: F401
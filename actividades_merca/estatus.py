@@ -0,0 +1,90 @@
+"""
+Estatus de actividades calculado en la base de datos.
+
+El estatus depende de la fecha de hoy, así que la columna `estatus` solo es
+una foto: se recalcula en save() y cada noche con el comando
+`refresh_estatus_actividades`. Los listados no la usan; anotan
+`estatus_actual` con la misma lógica de ActividadMerca.calcular_estatus a
+partir de `fecha_compromiso`, sin escribir nada.
+
+Para filtrar no se usa la anotación sino `filtro_estatus`, que expresa cada
+estatus como comparaciones directas sobre fecha_fin/fecha_compromiso y así
+aprovecha el índice de fecha_compromiso.
+"""
+from django.db.models import Case, CharField, F, Q, Value, When
+from django.utils import timezone
+
+from core import calendario
+from .models import ActividadMerca
+
+
+def estatus_expresion(hoy=None) -> Case:
+    """Expresión SQL equivalente a ActividadMerca.calcular_estatus() para el día `hoy`."""
+    hoy = hoy or timezone.localdate()
+    return Case(
+        When(fecha_compromiso__isnull=True, then=Value("")),
+        When(fecha_fin__isnull=True, fecha_compromiso__gt=hoy, then=Value("En tiempo")),
+        When(fecha_fin__isnull=True, fecha_compromiso=hoy, then=Value("Vence hoy")),
+        When(fecha_fin__isnull=True, then=Value("Se entregó tarde")),
+        When(fecha_fin__gt=F("fecha_compromiso"), then=Value("Se entregó tarde")),
+        default=Value("Entregada a tiempo"),
+        output_field=CharField(),
+    )
+
+
+def filtro_vence_hoy(hoy=None) -> Q:
+    """Actividades abiertas cuyo compromiso es hoy."""
+    return Q(fecha_fin__isnull=True, fecha_compromiso=hoy or timezone.localdate())
+
+
+def filtro_vencidas(hoy=None) -> Q:
+    """Actividades abiertas con el compromiso ya pasado."""
+    return Q(fecha_fin__isnull=True, fecha_compromiso__lt=hoy or timezone.localdate())
+
+
+def filtro_estatus(valor: str, hoy=None) -> Q:
+    """Q equivalente a `estatus_actual == valor`; un estatus desconocido no regresa nada."""
+    hoy = hoy or timezone.localdate()
+    if valor == "En tiempo":
+        return Q(fecha_fin__isnull=True, fecha_compromiso__gt=hoy)
+    if valor == "Vence hoy":
+        return filtro_vence_hoy(hoy)
+    if valor == "Se entregó tarde":
+        return filtro_vencidas(hoy) | Q(fecha_fin__gt=F("fecha_compromiso"))
+    if valor == "Entregada a tiempo":
+        return Q(fecha_fin__isnull=False, fecha_fin__lte=F("fecha_compromiso"))
+    return Q(pk__in=[])
+
+
+def con_estatus(qs, hoy=None):
+    """Anota `estatus_actual` en el queryset de actividades."""
+    return qs.annotate(estatus_actual=estatus_expresion(hoy))
+
+
+def refrescar(hoy=None) -> int:
+    """Actualiza en un solo UPDATE la columna estatus que no coincida con hoy. Regresa cuántas filas."""
+    hoy = hoy or timezone.localdate()
+    desfasadas = con_estatus(ActividadMerca.objects.all(), hoy).exclude(estatus=F("estatus_actual"))
+    return desfasadas.update(estatus=estatus_expresion(hoy))
+
+
+def recalcular_compromisos(desde) -> int:
+    """
+    Recalcula fecha_compromiso de las actividades cuyo plazo pasa por `desde`
+    o después (p. ej. al dar de alta o baja un feriado). Regresa cuántas cambiaron.
+    """
+    cal = calendario.calendario()
+    afectadas = list(
+        ActividadMerca.objects.filter(fecha_inicio__lt=desde, fecha_compromiso__gte=desde)
+        .only("id", "fecha_inicio", "dias", "fecha_compromiso")
+    )
+    nuevas = cal.sumar_habiles_lote([a.fecha_inicio for a in afectadas], [a.dias for a in afectadas])
+    cambiadas = []
+    for act, compromiso in zip(afectadas, nuevas):
+        if act.fecha_compromiso != compromiso:
+            act.fecha_compromiso = compromiso
+            cambiadas.append(act)
+    ActividadMerca.objects.bulk_update(cambiadas, ["fecha_compromiso"], batch_size=1000)
+    if cambiadas:
+        refrescar()
+    return len(cambiadas)
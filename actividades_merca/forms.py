@@ -2,28 +2,30 @@ from django import forms
 import unicodedata
 
 from clientes.models import Cliente
+from core.cache_proceso import CacheProceso
 from core.choices import CHOICES_INTERNAS
-from .models import ActividadMerca
+from .models import ActividadMerca, clave_cliente
 
-def _cliente_choices():
-    qs = (
-        Cliente.objects.filter(servicio="Marketing")
-        .order_by("cliente")
-        .values_list("cliente", flat=True)
-    )
+
+def _cargar_cliente_choices():
+    nombres = [nombre for nombre, _ in CHOICES_INTERNAS]
+    nombres += Cliente.objects.filter(servicio="Marketing").order_by("cliente").values_list("cliente", flat=True)
     vistos = set()
     choices = []
-    for nombre, _ in CHOICES_INTERNAS:
-        val = (nombre or "").strip().upper()
-        if val and val not in vistos:
-            choices.append((val, val))
-            vistos.add(val)
-    for nombre in qs:
-        val = (nombre or "").strip().upper()
+    for nombre in nombres:
+        val = clave_cliente(nombre)
         if val and val not in vistos:
             choices.append((val, val))
             vistos.add(val)
-    return choices
+    return tuple(choices)
+
+
+# Se invalida desde actividades_merca.signals al guardar o borrar un Cliente.
+cliente_choices_cache = CacheProceso(_cargar_cliente_choices, "CLIENTE_CHOICES_CACHE_SECONDS")
+
+
+def _cliente_choices():
+    return list(cliente_choices_cache.obtener())
 
 
 class ActividadMercaForm(forms.ModelForm):
@@ -56,7 +58,7 @@ class ActividadMercaForm(forms.ModelForm):
 
         if self.instance and getattr(self.instance, "pk", None):
             if "cliente" in self.fields:
-                self.initial["cliente"] = (self.instance.cliente or "").strip().upper()
+                self.initial["cliente"] = self.instance.cliente_clave or clave_cliente(self.instance.cliente)
             if "area" in self.fields:
                 self.initial["area"] = self.instance.area or ""
             if "mercadologo" in self.fields:
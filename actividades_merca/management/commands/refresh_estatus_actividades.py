@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from actividades_merca import estatus
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula la columna estatus de las actividades con la fecha de hoy "
+        "(pensado para correr cada noche en cron)."
+    )
+
+    def handle(self, *args, **options):
+        total = estatus.refrescar()
+        self.stdout.write(self.style.SUCCESS(f"Estatus de actividades actualizados: {total}"))
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:38
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def _add_business_days(start, days):
+    # Copia de actividades_merca.models._add_business_days al momento de esta migración.
+    if start is None or days is None:
+        return None
+    current = start
+    remaining = int(days)
+    while remaining > 0:
+        current += timedelta(days=1)
+        if current.weekday() < 5:
+            remaining -= 1
+    return current
+
+
+def poblar_fecha_compromiso(apps, schema_editor):
+    ActividadMerca = apps.get_model("actividades_merca", "ActividadMerca")
+    pendientes = []
+    for act in ActividadMerca.objects.only("id", "fecha_inicio", "dias").iterator(chunk_size=2000):
+        act.fecha_compromiso = _add_business_days(act.fecha_inicio, act.dias)
+        pendientes.append(act)
+        if len(pendientes) >= 2000:
+            ActividadMerca.objects.bulk_update(pendientes, ["fecha_compromiso"])
+            pendientes = []
+    if pendientes:
+        ActividadMerca.objects.bulk_update(pendientes, ["fecha_compromiso"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('actividades_merca', '0007_alter_actividadmerca_area'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='actividadmerca',
+            name='fecha_compromiso',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(poblar_fecha_compromiso, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('actividades_merca', '0008_actividadmerca_fecha_compromiso'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='actividadmerca',
+            index=models.Index(fields=['fecha_compromiso'], name='actividades_compromiso_idx'),
+        ),
+    ]
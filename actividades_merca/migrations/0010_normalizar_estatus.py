@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:43
+
+from django.db import migrations
+from django.db.models.functions import Trim
+
+# Variantes con problemas de codificación que llegaron a guardarse.
+VARIANTES = {
+    "Se entregó tarde": ["Se entregÃ³ tarde", "Se entreg? tarde", "Se entrego tarde"],
+}
+
+
+def normalizar_estatus(apps, schema_editor):
+    ActividadMerca = apps.get_model("actividades_merca", "ActividadMerca")
+    ActividadMerca.objects.exclude(estatus=Trim("estatus")).update(estatus=Trim("estatus"))
+    for correcto, variantes in VARIANTES.items():
+        ActividadMerca.objects.filter(estatus__in=variantes).update(estatus=correcto)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('actividades_merca', '0009_actividadmerca_compromiso_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalizar_estatus, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:43
+
+from django.db import migrations, models
+
+
+def poblar_cliente_clave(apps, schema_editor):
+    ActividadMerca = apps.get_model("actividades_merca", "ActividadMerca")
+    pendientes = []
+    for act in ActividadMerca.objects.only("id", "cliente").iterator(chunk_size=2000):
+        act.cliente_clave = (act.cliente or "").strip().upper()
+        pendientes.append(act)
+        if len(pendientes) >= 2000:
+            ActividadMerca.objects.bulk_update(pendientes, ["cliente_clave"])
+            pendientes = []
+    if pendientes:
+        ActividadMerca.objects.bulk_update(pendientes, ["cliente_clave"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('actividades_merca', '0010_normalizar_estatus'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='actividadmerca',
+            name='cliente_clave',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(poblar_cliente_clave, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='actividadmerca',
+            index=models.Index(fields=['cliente_clave', 'fecha_inicio'], name='actividades_cliente_idx'),
+        ),
+    ]
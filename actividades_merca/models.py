@@ -1,7 +1,8 @@
-from datetime import date, timedelta
+from datetime import date
 
 from django.db import models
 
+from core import calendario
 from core.choices import (
     AREA_CHOICES,
     MERCADOLOGO_CHOICES,
@@ -17,37 +18,25 @@ ESTATUS_CHOICES = [
 ]
 
 
-def _add_business_days(start: date, days: int | None) -> date | None:
-    """Suma días hábiles (excluye fines de semana)."""
-    if start is None or days is None:
-        return None
-    current = start
-    remaining = int(days)
-    while remaining > 0:
-        current += timedelta(days=1)
-        if current.weekday() < 5:
-            remaining -= 1
-    return current
+def _add_business_days(start: date | None, days: int | None) -> date | None:
+    """Suma días hábiles (excluye fines de semana y feriados, ver core.calendario)."""
+    return calendario.sumar_habiles(start, days)
 
 
 def _business_days_between(start: date | None, end: date | None) -> int | None:
-    """Cuenta dias habiles entre fechas (excluye fines de semana y el dia inicial)."""
-    if start is None or end is None:
-        return None
-    if start == end:
-        return 0
-    step = 1 if end > start else -1
-    current = start
-    count = 0
-    while current != end:
-        current += timedelta(days=step)
-        if current.weekday() < 5:
-            count += 1
-    return count if step == 1 else -count
+    """Cuenta dias habiles entre fechas (excluye fines de semana, feriados y el dia inicial)."""
+    return calendario.habiles_entre(start, end)
+
+
+def clave_cliente(nombre: str | None) -> str:
+    """Forma normalizada del nombre de cliente (sin espacios extremos, en mayúsculas)."""
+    return (nombre or "").strip().upper()
 
 
 class ActividadMerca(models.Model):
     cliente = models.CharField(max_length=200)
+    # clave_cliente(cliente); se guarda para filtrar y agrupar por índice
+    cliente_clave = models.CharField(max_length=200, blank=True, default="", editable=False)
     area = models.CharField(max_length=100, choices=AREA_CHOICES)
     fecha_inicio = models.DateField()
     tarea = models.CharField(max_length=1000)
@@ -58,20 +47,22 @@ class ActividadMerca(models.Model):
     fecha_fin = models.DateField(blank=True, null=True)
     evaluacion = models.CharField(max_length=50, choices=EVALUACION_CHOICES, blank=True, null=True)
     estatus = models.CharField(max_length=50, choices=ESTATUS_CHOICES, blank=True, null=True)
+    # fecha_inicio + dias hábiles; se guarda para calcular el estatus en la base (ver estatus.py)
+    fecha_compromiso = models.DateField(blank=True, null=True, editable=False)
     fecha_registro = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-fecha_inicio", "-fecha_registro"]
+        indexes = [
+            models.Index(fields=["fecha_compromiso"], name="actividades_compromiso_idx"),
+            models.Index(fields=["cliente_clave", "fecha_inicio"], name="actividades_cliente_idx"),
+        ]
         verbose_name = "Actividad de Marketing"
         verbose_name_plural = "Actividades de Marketing"
 
     def __str__(self):
         return f"{self.cliente} - {self.tarea}"
 
-    @property
-    def fecha_compromiso(self) -> date | None:
-        return _add_business_days(self.fecha_inicio, self.dias)
-
     def calcular_estatus(self) -> str:
         """
         Lógica:
@@ -83,7 +74,7 @@ class ActividadMerca(models.Model):
             fin > compromiso: Se entregó tarde
             fin <= compromiso: Entregada a tiempo
         """
-        compromiso = self.fecha_compromiso
+        compromiso = _add_business_days(self.fecha_inicio, self.dias)
         if compromiso is None:
             return ""
 
@@ -105,5 +96,7 @@ class ActividadMerca(models.Model):
         return ""
 
     def save(self, *args, **kwargs):
+        self.cliente_clave = clave_cliente(self.cliente)
+        self.fecha_compromiso = _add_business_days(self.fecha_inicio, self.dias)
         self.estatus = self.calcular_estatus()
         super().save(*args, **kwargs)
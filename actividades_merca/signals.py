@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from clientes.models import Cliente
+from core.models import DiaFeriado
+from . import estatus
+from .forms import cliente_choices_cache
+
+
+@receiver(post_save, sender=DiaFeriado)
+def feriado_guardado(sender, instance: DiaFeriado, created, **kwargs):
+    fechas = [instance.fecha]
+    if not created and instance.valores_previos and instance.valores_previos.get("fecha"):
+        fechas.append(instance.valores_previos["fecha"])
+    estatus.recalcular_compromisos(min(fechas))
+
+
+@receiver(post_delete, sender=DiaFeriado)
+def feriado_borrado(sender, instance: DiaFeriado, **kwargs):
+    estatus.recalcular_compromisos(instance.fecha)
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_delete, sender=Cliente)
+def invalidar_cliente_choices(sender, **kwargs):
+    cliente_choices_cache.invalidar()
@@ -1,21 +1,23 @@
 from datetime import datetime
 from io import BytesIO
-from django.db.models import Q
-from django.http import HttpResponse
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import landscape, letter
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from PyPDF2 import PdfReader, PdfWriter
-import copy
-from django.conf import settings
 
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.utils import timezone
 
+from core import calendario, limites, report_jobs
 from core.choices import URGENCIA_CHOICES
+from core.pdf import LazyFlowables, build_con_membrete, chunked, membrete_pagesize
+from . import estatus
 from .forms import _cliente_choices, ActividadMercaForm
-from .models import ActividadMerca, _business_days_between
+from .models import ActividadMerca, clave_cliente
 
 
 ESTATUS_CHOICES = [
@@ -25,6 +27,17 @@ ESTATUS_CHOICES = [
     "Entregada a tiempo",
 ]
 
+VENCIMIENTO_CHOICES = [
+    ("hoy", "Vence hoy"),
+    ("vencidas", "Vencidas"),
+]
+
+# Siempre termina en "-id" para que la paginación sea estable.
+ORDEN_CHOICES = {
+    "inicio": ("Fecha de inicio", ("-fecha_inicio", "-fecha_registro", "-id")),
+    "compromiso": ("Fecha compromiso", ("fecha_compromiso", "-id")),
+}
+
 def _parse_date(val: str | None):
     if not val:
         return None
@@ -34,15 +47,21 @@ def _parse_date(val: str | None):
         return None
 
 
-def _filtered_actividades(request, vista: str):
-    qs = ActividadMerca.objects.all().order_by("-fecha_inicio")
+def _actividades_queryset(params, vista: str):
+    """Aplica filtros y orden de la vista en base de datos; anota `estatus_actual` (ver estatus.py)."""
+    hoy = timezone.localdate()
+    qs = estatus.con_estatus(ActividadMerca.objects.all(), hoy)
 
-    f_desde = _parse_date(request.GET.get("fecha_inicio"))
-    f_hasta = _parse_date(request.GET.get("fecha_fin"))
-    cliente_sel = request.GET.get("cliente") or ""
-    estatus_sel = request.GET.get("estatus") or ""
-    mercadologo_sel = request.GET.get("mercadologo") or ""
-    disenador_sel = request.GET.get("disenador") or ""
+    f_desde = _parse_date(params.get("fecha_inicio"))
+    f_hasta = _parse_date(params.get("fecha_fin"))
+    cliente_sel = params.get("cliente") or ""
+    estatus_sel = params.get("estatus") or ""
+    mercadologo_sel = params.get("mercadologo") or ""
+    disenador_sel = params.get("disenador") or ""
+    vencimiento_sel = params.get("vencimiento") or ""
+    orden_sel = params.get("orden") or ""
+    if orden_sel not in ORDEN_CHOICES:
+        orden_sel = "compromiso" if vista == "kanban" else "inicio"
 
     if vista == "kanban":
         qs = qs.filter(fecha_fin__isnull=True)
@@ -52,7 +71,7 @@ def _filtered_actividades(request, vista: str):
     if vista == "lista" and f_hasta:
         qs = qs.filter(fecha_inicio__lte=f_hasta)
     if cliente_sel:
-        qs = qs.filter(cliente__iexact=cliente_sel)
+        qs = qs.filter(cliente_clave=clave_cliente(cliente_sel))
     if mercadologo_sel == "__none__":
         qs = qs.filter(Q(mercadologo__isnull=True) | Q(mercadologo=""))
     elif mercadologo_sel:
@@ -61,16 +80,13 @@ def _filtered_actividades(request, vista: str):
         qs = qs.filter(Q(disenador__isnull=True) | Q(disenador=""))
     elif disenador_sel:
         qs = qs.filter(disenador__in=[disenador_sel, "Todos"])
-
-    actividades = list(qs)
-    for act in actividades:
-        nuevo = act.calcular_estatus()
-        if nuevo != act.estatus:
-            act.estatus = nuevo
-            act.save(update_fields=["estatus"])
-
     if estatus_sel:
-        actividades = [a for a in actividades if a.estatus == estatus_sel]
+        qs = qs.filter(estatus.filtro_estatus(estatus_sel, hoy))
+    if vencimiento_sel == "hoy":
+        qs = qs.filter(estatus.filtro_vence_hoy(hoy))
+    elif vencimiento_sel == "vencidas":
+        qs = qs.filter(estatus.filtro_vencidas(hoy))
+    qs = qs.order_by(*ORDEN_CHOICES[orden_sel][1])
 
     filtros = {
         "f_desde": f_desde,
@@ -79,13 +95,102 @@ def _filtered_actividades(request, vista: str):
         "estatus_sel": estatus_sel,
         "mercadologo_sel": mercadologo_sel,
         "disenador_sel": disenador_sel,
+        "vencimiento_sel": vencimiento_sel,
+        "orden_sel": orden_sel,
     }
-    return actividades, filtros
+    return qs, filtros
+
+
+def _filtered_actividades(request, vista: str):
+    qs, filtros = _actividades_queryset(request.GET, vista)
+    return list(qs), filtros
+
+
+def _pagina(request, qs):
+    paginator = Paginator(qs, settings.ACTIVIDADES_POR_PAGINA)
+    page_obj = paginator.get_page(request.GET.get("page"))
+    params = request.GET.copy()
+    params.pop("page", None)
+    return page_obj, params.urlencode()
+
+
+KANBAN_ESTATUS = ["Se entregó tarde", "Vence hoy", "En tiempo"]
+KANBAN_ETIQUETAS = {"Se entregó tarde": "Vencidas"}
+KANBAN_CLASES = {
+    "En tiempo": "status-in-time",
+    "Vence hoy": "status-due-today",
+    "Se entregó tarde": "status-late",
+}
+KANBAN_CAMPOS = ["id", "fecha_inicio", "fecha_compromiso", "tarea", "mercadologo", "disenador"]
+
+
+def _kanban_columns(qs):
+    """
+    Columnas estatus > cliente > área. Los totales salen de una consulta
+    agrupada (por cliente_clave) y las tarjetas de otra que solo trae los campos visibles.
+    """
+    qs = qs.filter(fecha_compromiso__isnull=False)
+    grupos = (
+        qs.values("estatus_actual", "cliente_clave", "area")
+        .annotate(total=Count("id"))
+        .order_by("cliente_clave", "area")
+    )
+    tarjetas = {}
+    for act in qs.values(*KANBAN_CAMPOS, "estatus_actual", "cliente_clave", "area").order_by("fecha_compromiso", "-id"):
+        tarjetas.setdefault((act["estatus_actual"], act["cliente_clave"], act["area"]), []).append(act)
+
+    hoy = timezone.localdate()
+    todas = [t for lista in tarjetas.values() for t in lista]
+    restantes = calendario.calendario().habiles_entre_lote(hoy, [t["fecha_compromiso"] for t in todas])
+    for act, remaining in zip(todas, restantes):
+        if remaining < 0:
+            act["dias_label"] = "Días atrasados"
+            act["dias_value"] = str(abs(remaining))
+        else:
+            act["dias_label"] = "Días restantes"
+            act["dias_value"] = str(remaining)
+        responsables = [n for n in (act["mercadologo"], act["disenador"]) if n and n != "Todos"]
+        act["responsables"] = " / ".join(responsables) if responsables else "Sin asignar"
+
+    por_estatus = {}
+    for g in grupos:
+        clientes = por_estatus.setdefault(g["estatus_actual"], {})
+        cliente = clientes.setdefault(g["cliente_clave"], {"cliente": g["cliente_clave"] or "Sin cliente", "total": 0, "areas": []})
+        cliente["total"] += g["total"]
+        cliente["areas"].append(
+            {
+                "nombre": g["area"] or "Sin área",
+                "items": tarjetas.get((g["estatus_actual"], g["cliente_clave"], g["area"]), []),
+                "count": g["total"],
+            }
+        )
+
+    columnas = []
+    for status_name in KANBAN_ESTATUS:
+        clientes = list(por_estatus.get(status_name, {}).values())
+        columnas.append(
+            {
+                "status": status_name,
+                "status_label": KANBAN_ETIQUETAS.get(status_name, status_name),
+                "total": sum(c["total"] for c in clientes),
+                "status_class": KANBAN_CLASES.get(status_name, ""),
+                "clients": clientes,
+            }
+        )
+    return columnas
 
 
 def actividades_lista(request):
     vista = (request.GET.get("vista") or "lista").lower()
-    actividades, filtros = _filtered_actividades(request, vista)
+    qs, filtros = _actividades_queryset(request.GET, vista)
+    page_obj, querystring, actividades = None, "", []
+    if vista != "kanban":
+        page_obj, querystring = _pagina(request, qs)
+        actividades = page_obj.object_list
+    show_unassigned_warning = qs.filter(
+        Q(mercadologo__isnull=True) | Q(mercadologo=""),
+        Q(disenador__isnull=True) | Q(disenador=""),
+    ).exists()
     f_desde = filtros["f_desde"]
     f_hasta = filtros["f_hasta"]
     cliente_sel = filtros["cliente_sel"]
@@ -105,109 +210,30 @@ def actividades_lista(request):
         "estatus_sel": estatus_sel,
         "mercadologo_sel": mercadologo_sel,
         "disenador_sel": disenador_sel,
+        "vencimiento_choices": VENCIMIENTO_CHOICES,
+        "vencimiento_sel": filtros["vencimiento_sel"],
+        "orden_choices": [(k, label) for k, (label, _) in ORDEN_CHOICES.items()],
+        "orden_sel": filtros["orden_sel"],
+        "page_obj": page_obj,
+        "querystring": querystring,
         "vista": vista,
+        "show_unassigned_warning": show_unassigned_warning,
     }
 
-    context["show_unassigned_warning"] = any(
-        (not getattr(a, "mercadologo")) and (not getattr(a, "disenador"))
-        for a in actividades
-    )
-
     if vista == "kanban":
-        status_order = ["Se entregó tarde", "Vence hoy", "En tiempo"]
-        by_status = {}
-        today = timezone.now().date()
-
-        def _normalize_status(value: str) -> str:
-            val = (value or "").strip()
-            val = val.replace("Se entregÃ³ tarde", "Se entregó tarde")
-            val = val.replace("Se entreg? tarde", "Se entregó tarde")
-            val = val.replace("Se entrego tarde", "Se entregó tarde")
-            return val
-
-        for act in actividades:
-            try:
-                compromiso = act.fecha_compromiso
-                remaining = _business_days_between(today, compromiso) if compromiso else None
-            except Exception:
-                remaining = None
-
-            if remaining is None:
-                act.dias_label = ""
-                act.dias_value = ""
-            elif remaining < 0:
-                act.dias_label = "Días atrasados"
-                act.dias_value = str(abs(remaining))
-            else:
-                act.dias_label = "Días restantes"
-                act.dias_value = str(remaining)
-
-            responsables = []
-            for name in [act.mercadologo, act.disenador]:
-                if name and name != "Todos":
-                    responsables.append(name)
-            act.responsables = " / ".join(responsables) if responsables else "Sin asignar"
-
-            status_key = _normalize_status(act.estatus or "Sin estatus")
-            if status_key == "Entregada a tiempo":
-                continue
-            client_key = (act.cliente or "").strip().upper() or "Sin cliente"
-            area_key = act.area or "Sin área"
-
-            by_status.setdefault(status_key, {})
-            by_status[status_key].setdefault(client_key, {})
-            by_status[status_key][client_key].setdefault(area_key, []).append(act)
-
-        columns = []
-        status_label_map = {
-            "Se entregó tarde": "Vencidas",
-        }
-        status_class_map = {
-            "En tiempo": "status-in-time",
-            "Vence hoy": "status-due-today",
-            "Se entregó tarde": "status-late",
-        }
-
-        for status_name in status_order:
-            clients = []
-            total_col = 0
-            for client_name, areas in by_status.get(status_name, {}).items():
-                area_blocks = []
-                total_client = 0
-                for area_name, items in areas.items():
-                    total_client += len(items)
-                    area_blocks.append(
-                        {
-                            "nombre": area_name,
-                            "items": items,
-                            "count": len(items),
-                        }
-                    )
-                total_col += total_client
-                clients.append(
-                    {
-                        "cliente": client_name,
-                        "total": total_client,
-                        "areas": area_blocks,
-                    }
-                )
-            columns.append(
-                {
-                    "status": status_name,
-                    "status_label": status_label_map.get(status_name, status_name),
-                    "total": total_col,
-                    "status_class": status_class_map.get(status_name, ""),
-                    "clients": clients,
-                }
-            )
-
-        context["kanban_columns"] = columns
+        context["kanban_columns"] = _kanban_columns(qs)
         return render(request, "actividades_merca/kanban.html", context)
 
     return render(request, "actividades_merca/lista.html", context)
 
-def reporte_actividades(request):
-    actividades, filtros = _filtered_actividades(request, "lista")
+REPORTE_FILAS_POR_TABLA = 200
+
+
+def _reporte_actividades_pdf(destino, actividades, filtros, filas_por_tabla=None):
+    """
+    Escribe el reporte en `destino` (ruta o buffer). Con `filas_por_tabla` las
+    actividades se consumen por bloques y cada bloque se dibuja como una tabla.
+    """
     f_desde = filtros["f_desde"]
     f_hasta = filtros["f_hasta"]
     cliente_sel = filtros["cliente_sel"] or "Todos"
@@ -220,23 +246,10 @@ def reporte_actividades(request):
     else:
         subtitle_text = "Fechas: —"
 
-    template_path = settings.BASE_DIR / "static" / "img" / "MEMBRETE.pdf"
-    pagesize = landscape(letter)
-    if template_path.exists():
-        try:
-            template_reader = PdfReader(str(template_path))
-            template_page = template_reader.pages[0]
-            pagesize = (float(template_page.mediabox.width), float(template_page.mediabox.height))
-        except Exception:
-            template_reader = None
-            template_page = None
-    else:
-        template_reader = None
-        template_page = None
+    pagesize = membrete_pagesize()
 
-    buffer = BytesIO()
     doc = SimpleDocTemplate(
-        buffer,
+        destino,
         pagesize=pagesize,
         leftMargin=18,
         rightMargin=18,
@@ -258,24 +271,6 @@ def reporte_actividades(request):
         Spacer(1, 12),
     ]
 
-    table_data = [
-        [
-            "Cliente",
-            "Área",
-            "Fecha inicio",
-            "Tarea",
-        ]
-    ]
-    for a in actividades:
-        table_data.append(
-            [
-                Paragraph(a.cliente or "", body_style),
-                Paragraph(a.area or "", body_style),
-                a.fecha_inicio.strftime("%d/%m/%Y") if a.fecha_inicio else "",
-                Paragraph(a.tarea or "", body_style),
-            ]
-        )
-
     page_width = pagesize[0]
     available_width = page_width - doc.leftMargin - doc.rightMargin
     col_widths = [
@@ -284,49 +279,134 @@ def reporte_actividades(request):
         available_width * 0.15,
         available_width * 0.5,
     ]
-    table = Table(table_data, colWidths=col_widths, repeatRows=1)
     header_bg = colors.Color(0.90, 0.93, 0.96, alpha=0.3)
     row_bg = colors.Color(0.97, 0.98, 0.99, alpha=0.3)
-    table.setStyle(
-        TableStyle(
+    table_style = TableStyle(
+        [
+            ("BACKGROUND", (0, 0), (-1, 0), header_bg),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#1f2a3d")),
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#aebed2")),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, 0), 9),
+            ("FONTSIZE", (0, 1), (-1, -1), 8),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("WORDWRAP", (0, 0), (-1, -1), True),
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.Color(1, 1, 1, alpha=0.0), row_bg]),
+        ]
+    )
+
+    def _tabla(bloque):
+        table_data = [
             [
-                ("BACKGROUND", (0, 0), (-1, 0), header_bg),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#1f2a3d")),
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#aebed2")),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, 0), 9),
-                ("FONTSIZE", (0, 1), (-1, -1), 8),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("WORDWRAP", (0, 0), (-1, -1), True),
-                ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.Color(1, 1, 1, alpha=0.0), row_bg]),
+                "Cliente",
+                "Área",
+                "Fecha inicio",
+                "Tarea",
             ]
-        )
+        ]
+        for a in bloque:
+            table_data.append(
+                [
+                    Paragraph(a.cliente or "", body_style),
+                    Paragraph(a.area or "", body_style),
+                    a.fecha_inicio.strftime("%d/%m/%Y") if a.fecha_inicio else "",
+                    Paragraph(a.tarea or "", body_style),
+                ]
+            )
+        table = Table(table_data, colWidths=col_widths, repeatRows=1)
+        table.setStyle(table_style)
+        return [table]
+
+    if not filas_por_tabla:
+        elements.extend(_tabla(actividades))
+        build_con_membrete(doc, elements)
+        return
+
+    def _bloques():
+        vacio = True
+        for bloque in chunked(actividades, filas_por_tabla):
+            vacio = False
+            yield _tabla(bloque)
+        if vacio:
+            yield _tabla([])
+
+    build_con_membrete(doc, LazyFlowables(elements, _bloques()))
+
+
+def reporte_actividades(request):
+    qs, filtros = _actividades_queryset(request.GET, "lista")
+
+    if not report_jobs.should_run_async(qs.count()):
+        actividades, filtros = _filtered_actividades(request, "lista")
+        buffer = BytesIO()
+        _reporte_actividades_pdf(buffer, actividades, filtros)
+        pdf = buffer.getvalue()
+        buffer.close()
+
+        response = HttpResponse(pdf, content_type="application/pdf")
+        response["Content-Disposition"] = 'inline; filename="reporte_actividades.pdf"'
+        return response
+
+    def _builder(destino):
+        actividades = qs.iterator(chunk_size=REPORTE_FILAS_POR_TABLA)
+        _reporte_actividades_pdf(destino, actividades, filtros, filas_por_tabla=REPORTE_FILAS_POR_TABLA)
+
+    job_id = report_jobs.start("actividades", "reporte_actividades.pdf", request.user, _builder)
+    return render(
+        request,
+        "reportes/en_proceso.html",
+        {
+            "titulo": "Reporte de actividades",
+            "status_url": reverse("actividades_merca_actividad_report_status", args=[job_id]),
+            "download_url": reverse("actividades_merca_actividad_report_download", args=[job_id]),
+        },
     )
-    elements.append(table)
-    doc.build(elements)
-
-    content_pdf = buffer.getvalue()
-    buffer.close()
-
-    if template_reader and template_page:
-        content_reader = PdfReader(BytesIO(content_pdf))
-        writer = PdfWriter()
-        for page in content_reader.pages:
-            base = copy.copy(template_page)
-            if base.mediabox != page.mediabox:
-                base.mediabox = page.mediabox
-            base.merge_page(page)
-            writer.add_page(base)
-        output = BytesIO()
-        writer.write(output)
-        pdf = output.getvalue()
-        output.close()
-    else:
-        pdf = content_pdf
 
-    response = HttpResponse(pdf, content_type="application/pdf")
-    response["Content-Disposition"] = 'inline; filename="reporte_actividades.pdf"'
-    return response
+
+def reporte_actividades_estatus(request, job_id: str):
+    return report_jobs.status_response(request, job_id, "actividades")
+
+
+def reporte_actividades_descarga(request, job_id: str):
+    return report_jobs.download_response(request, job_id, "actividades")
+
+
+SOLICITUD_LIMITE = "solicitud_publica"
+SOLICITUD_MOTIVOS = ("ip", "global", "duplicado")
+
+
+def _solicitud_limitada(request):
+    """Respuesta 429 si la IP o el total de solicitudes excede su token bucket; si no, None."""
+    buckets = (
+        (
+            limites.TokenBucket("solicitud_ip", settings.SOLICITUD_RATE_IP_BURST, settings.SOLICITUD_RATE_IP_PER_MINUTE),
+            limites.client_ip(request),
+            "ip",
+        ),
+        (
+            limites.TokenBucket("solicitud_global", settings.SOLICITUD_RATE_GLOBAL_BURST, settings.SOLICITUD_RATE_GLOBAL_PER_MINUTE),
+            "*",
+            "global",
+        ),
+    )
+    for bucket, llave, motivo in buckets:
+        if not bucket.permitir(llave):
+            limites.registrar_rechazo(SOLICITUD_LIMITE, motivo)
+            response = HttpResponse(
+                "Demasiadas solicitudes. Intenta de nuevo en unos minutos.",
+                status=429,
+                content_type="text/plain; charset=utf-8",
+            )
+            response["Retry-After"] = str(bucket.espera())
+            return response
+    return None
+
+
+def solicitud_limites(request):
+    """Contadores de solicitudes públicas rechazadas en este proceso (solo superusuarios)."""
+    if not request.user.is_superuser:
+        return HttpResponseForbidden()
+    return JsonResponse({"rechazos": limites.contadores(SOLICITUD_LIMITE, SOLICITUD_MOTIVOS)})
 
 
 def solicitud_publica(request):
@@ -347,6 +427,10 @@ def solicitud_publica(request):
     }
 
     if request.method == "POST":
+        limitada = _solicitud_limitada(request)
+        if limitada is not None:
+            return limitada
+
         cliente = (request.POST.get("cliente") or "").strip().upper()
         tipo = (request.POST.get("tipo") or "").strip()
         formato = (request.POST.get("formato") or "").strip()
@@ -385,17 +469,26 @@ def solicitud_publica(request):
                 f"Departamento: {departamento}",
             ]
             tarea_text = " | ".join(tarea_parts)
-            ActividadMerca.objects.create(
-                cliente=cliente,
-                area="Extras",
-                fecha_inicio=hoy,
-                tarea=tarea_text,
-                url=url or None,
-                dias=dias,
-                mercadologo=None,
-                disenador=None,
-                fecha_fin=None,
-            )
+            # Un reenvío idéntico (doble clic, recarga) se responde como éxito sin crear otra actividad.
+            huella = limites.huella(cliente, tipo, formato, mensaje, url, urgencia, quien, departamento)
+            if limites.es_duplicado(SOLICITUD_LIMITE, huella, settings.SOLICITUD_DUPLICADO_SECONDS):
+                limites.registrar_rechazo(SOLICITUD_LIMITE, "duplicado")
+            else:
+                try:
+                    ActividadMerca.objects.create(
+                        cliente=cliente,
+                        area="Extras",
+                        fecha_inicio=hoy,
+                        tarea=tarea_text,
+                        url=url or None,
+                        dias=dias,
+                        mercadologo=None,
+                        disenador=None,
+                        fecha_fin=None,
+                    )
+                except Exception:
+                    limites.olvidar(SOLICITUD_LIMITE, huella)
+                    raise
             success = True
             initial = {
                 "cliente": "",
@@ -0,0 +1,134 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copiar_reparto(apps, schema_editor):
+    """Pasa comisionista_N/comision_N a ClienteComision conservando el orden."""
+    Cliente = apps.get_model("clientes", "Cliente")
+    ClienteComision = apps.get_model("clientes", "ClienteComision")
+    campos = []
+    for i in range(1, 11):
+        campos += [f"comisionista_{i}_id", f"comision_{i}"]
+    filas = []
+    for c in Cliente.objects.values("id", *campos).iterator():
+        orden = 0
+        for i in range(1, 11):
+            alianza_id = c[f"comisionista_{i}_id"]
+            porcentaje = c[f"comision_{i}"]
+            if alianza_id and porcentaje is not None:
+                orden += 1
+                filas.append(
+                    ClienteComision(cliente_id=c["id"], alianza_id=alianza_id, porcentaje=porcentaje, orden=orden)
+                )
+    ClienteComision.objects.bulk_create(filas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alianzas', '0003_alter_alianza_telefono'),
+        ('clientes', '0016_alter_cliente_servicio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClienteComision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('porcentaje', models.DecimalField(decimal_places=6, max_digits=8)),
+                ('orden', models.PositiveSmallIntegerField(default=1)),
+                ('alianza', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='clientes_comision', to='alianzas.alianza')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reparto_comisiones', to='clientes.cliente')),
+            ],
+            options={
+                'verbose_name': 'Comisión de cliente',
+                'verbose_name_plural': 'Comisiones de cliente',
+                'ordering': ['orden', 'id'],
+                'indexes': [models.Index(fields=['alianza', 'cliente'], name='clientes_comision_alianza_idx')],
+                'constraints': [models.UniqueConstraint(fields=('cliente', 'orden'), name='clientes_comision_orden')],
+            },
+        ),
+        migrations.RunPython(copiar_reparto, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comision_1',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comision_10',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comision_2',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comision_3',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comision_4',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comision_5',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comision_6',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comision_7',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comision_8',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comision_9',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comisionista_1',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comisionista_10',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comisionista_2',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comisionista_3',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comisionista_4',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comisionista_5',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comisionista_6',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comisionista_7',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comisionista_8',
+        ),
+        migrations.RemoveField(
+            model_name='cliente',
+            name='comisionista_9',
+        ),
+    ]
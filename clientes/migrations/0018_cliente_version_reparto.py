@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0017_cliente_comision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='version_reparto',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
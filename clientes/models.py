@@ -1,9 +1,20 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
 from django.core.validators import RegexValidator
 from core.choices import TIPO_CHOICES, MEDIO_CHOICES, SERVICIO_CHOICES
+from core.tracking import CambiosRastreadosMixin
+
+
+def _reparto_normalizado(pares) -> list:
+    """(alianza_id, porcentaje) ordenados, sin los porcentajes vacíos o en cero (no generan comisión)."""
+    return sorted((alianza_id, Decimal(pct)) for alianza_id, pct in pares if pct is not None and Decimal(pct) > 0)
 
 
-class Cliente(models.Model):
+class Cliente(CambiosRastreadosMixin, models.Model):
+    # Se copia a ExperienciaCliente cuando cambia (ver clientes.signals)
+    CAMPOS_RASTREADOS = ("domicilio",)
+
     cliente = models.CharField(max_length=150)
     servicio = models.CharField(max_length=100, choices=SERVICIO_CHOICES, blank=True, null=True)
     giro = models.CharField(max_length=150, blank=True, null=True)
@@ -15,27 +26,9 @@ class Cliente(models.Model):
     linkedin = models.URLField("LinkedIn", blank=True, null=True)
     otra_red = models.URLField("Otra red", blank=True, null=True)
     propuesta = models.URLField("Propuesta", blank=True, null=True)
-    comisionista_1 = models.ForeignKey("alianzas.Alianza", related_name="clientes_com1", on_delete=models.SET_NULL, blank=True, null=True)
-    comisionista_2 = models.ForeignKey("alianzas.Alianza", related_name="clientes_com2", on_delete=models.SET_NULL, blank=True, null=True)
-    comisionista_3 = models.ForeignKey("alianzas.Alianza", related_name="clientes_com3", on_delete=models.SET_NULL, blank=True, null=True)
-    comisionista_4 = models.ForeignKey("alianzas.Alianza", related_name="clientes_com4", on_delete=models.SET_NULL, blank=True, null=True)
-    comisionista_5 = models.ForeignKey("alianzas.Alianza", related_name="clientes_com5", on_delete=models.SET_NULL, blank=True, null=True)
-    comisionista_6 = models.ForeignKey("alianzas.Alianza", related_name="clientes_com6", on_delete=models.SET_NULL, blank=True, null=True)
-    comisionista_7 = models.ForeignKey("alianzas.Alianza", related_name="clientes_com7", on_delete=models.SET_NULL, blank=True, null=True)
-    comisionista_8 = models.ForeignKey("alianzas.Alianza", related_name="clientes_com8", on_delete=models.SET_NULL, blank=True, null=True)
-    comisionista_9 = models.ForeignKey("alianzas.Alianza", related_name="clientes_com9", on_delete=models.SET_NULL, blank=True, null=True)
-    comisionista_10 = models.ForeignKey("alianzas.Alianza", related_name="clientes_com10", on_delete=models.SET_NULL, blank=True, null=True)
-    comision_1 = models.DecimalField(max_digits=8, decimal_places=6, blank=True, null=True)
-    comision_2 = models.DecimalField(max_digits=8, decimal_places=6, blank=True, null=True)
-    comision_3 = models.DecimalField(max_digits=8, decimal_places=6, blank=True, null=True)
-    comision_4 = models.DecimalField(max_digits=8, decimal_places=6, blank=True, null=True)
-    comision_5 = models.DecimalField(max_digits=8, decimal_places=6, blank=True, null=True)
-    comision_6 = models.DecimalField(max_digits=8, decimal_places=6, blank=True, null=True)
-    comision_7 = models.DecimalField(max_digits=8, decimal_places=6, blank=True, null=True)
-    comision_8 = models.DecimalField(max_digits=8, decimal_places=6, blank=True, null=True)
-    comision_9 = models.DecimalField(max_digits=8, decimal_places=6, blank=True, null=True)
-    comision_10 = models.DecimalField(max_digits=8, decimal_places=6, blank=True, null=True)
     total_comisiones = models.DecimalField(max_digits=10, decimal_places=6, default=0)
+    # Sube cada vez que cambia el reparto; las ventas con otra versión resincronizan sus comisiones.
+    version_reparto = models.PositiveIntegerField(default=1, editable=False)
     fecha_registro = models.DateTimeField(auto_now_add=True)
 
     def save(self, *args, **kwargs):
@@ -45,14 +38,33 @@ class Cliente(models.Model):
             self.giro = self.giro.capitalize()
         if self.conexion:
             self.conexion = self.conexion.title()
-        # Recalcula el total de comisiones (suma de los decimales almacenados)
-        comisiones = [
-            self.comision_1, self.comision_2, self.comision_3, self.comision_4, self.comision_5,
-            self.comision_6, self.comision_7, self.comision_8, self.comision_9, self.comision_10,
-        ]
-        self.total_comisiones = sum([c for c in comisiones if c is not None]) if any(comisiones) else 0
         super().save(*args, **kwargs)
 
+    def actualizar_total_comisiones(self):
+        """Recalcula total_comisiones (suma del reparto) y lo guarda."""
+        total = self.reparto_comisiones.aggregate(total=models.Sum("porcentaje"))["total"] or 0
+        Cliente.objects.filter(pk=self.pk).update(total_comisiones=total)
+        self.total_comisiones = total
+
+    @transaction.atomic
+    def guardar_reparto(self, pares):
+        """Reemplaza el reparto de comisiones con `pares` [(alianza, porcentaje), ...] en orden."""
+        pares = list(pares)
+        anterior = _reparto_normalizado(self.reparto_comisiones.values_list("alianza_id", "porcentaje"))
+        self.reparto_comisiones.all().delete()
+        ClienteComision.objects.bulk_create(
+            [
+                ClienteComision(cliente=self, alianza=alianza, porcentaje=porcentaje, orden=orden)
+                for orden, (alianza, porcentaje) in enumerate(pares, start=1)
+            ]
+        )
+        if hasattr(self, "_prefetched_objects_cache"):
+            self._prefetched_objects_cache.pop("reparto_comisiones", None)
+        self.actualizar_total_comisiones()
+        if _reparto_normalizado((getattr(a, "pk", a), p) for a, p in pares) != anterior:
+            Cliente.objects.filter(pk=self.pk).update(version_reparto=models.F("version_reparto") + 1)
+            self.refresh_from_db(fields=["version_reparto"])
+
     def __str__(self) -> str:
         return self.cliente
 
@@ -62,6 +74,32 @@ class Cliente(models.Model):
         verbose_name_plural = "Clientes"
 
 
+class ClienteComision(models.Model):
+    """Reparto de comisiones del cliente: un renglón por comisionista."""
+
+    cliente = models.ForeignKey(Cliente, related_name="reparto_comisiones", on_delete=models.CASCADE)
+    # Indexado por el índice compuesto (alianza, cliente) de Meta.
+    alianza = models.ForeignKey(
+        "alianzas.Alianza", related_name="clientes_comision", on_delete=models.CASCADE, db_index=False
+    )
+    porcentaje = models.DecimalField(max_digits=8, decimal_places=6)
+    orden = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        ordering = ["orden", "id"]
+        verbose_name = "Comisión de cliente"
+        verbose_name_plural = "Comisiones de cliente"
+        constraints = [
+            models.UniqueConstraint(fields=["cliente", "orden"], name="clientes_comision_orden"),
+        ]
+        indexes = [
+            models.Index(fields=["alianza", "cliente"], name="clientes_comision_alianza_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.cliente} - {self.alianza} ({self.porcentaje})"
+
+
 class Contacto(models.Model):
     cliente = models.ForeignKey(Cliente, related_name="contactos", on_delete=models.CASCADE)
     nombre = models.CharField(max_length=150, blank=True, null=True)
@@ -1,38 +1,42 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
-from .models import Cliente
+from .models import Cliente, ClienteComision
 
 
-def _sync_experiencia(cliente: Cliente):
+def _sync_experiencia(cliente: Cliente, created: bool):
+    """
+    Alta del registro de experiencia con el cliente; después solo se copia el
+    domicilio cuando cambia en Cliente (el resto se lee por la relación).
+    Dentro de una transacción se junta para el commit (experiencia.sincronizacion).
+    """
     try:
+        from experiencia import sincronizacion
         from experiencia.models import ExperienciaCliente
     except Exception:
         return
 
-    exp = ExperienciaCliente.objects.filter(cliente_id=cliente.id).first()
-    domicilio = cliente.domicilio or (exp.domicilio if exp else None)
-    ExperienciaCliente.objects.update_or_create(
-        cliente_id=cliente.id,
-        defaults={
-            "cliente": cliente.cliente,
-            "servicio": cliente.servicio,
-            "giro": cliente.giro,
-            "domicilio": domicilio,
-            "propuesta": cliente.propuesta,
-        },
-    )
+    copiar_domicilio = bool(cliente.domicilio) and not created and bool(cliente.campos_cambiados(["domicilio"]))
+    if not created and not copiar_domicilio:
+        return
+    if sincronizacion.diferido():
+        sincronizacion.programar(cliente.pk, domicilio=copiar_domicilio)
+    elif created:
+        ExperienciaCliente.objects.create(cliente=cliente, domicilio=cliente.domicilio)
+    else:
+        ExperienciaCliente.objects.filter(cliente=cliente).update(domicilio=cliente.domicilio)
 
 
 @receiver(post_save, sender=Cliente)
 def cliente_post_save(sender, instance: Cliente, created, **kwargs):
-    _sync_experiencia(instance)
+    _sync_experiencia(instance, created)
 
 
-@receiver(post_delete, sender=Cliente)
-def cliente_post_delete(sender, instance: Cliente, **kwargs):
-    try:
-        from experiencia.models import ExperienciaCliente
-    except Exception:
+@receiver(post_delete, sender=ClienteComision)
+def reparto_post_delete(sender, instance: ClienteComision, origin=None, **kwargs):
+    # Al borrar una alianza su renglón desaparece del reparto; guardar_reparto recalcula por su cuenta.
+    if isinstance(origin, Cliente) or getattr(origin, "model", None) in (Cliente, ClienteComision):
         return
-    ExperienciaCliente.objects.filter(cliente_id=instance.id).delete()
+    cliente = Cliente.objects.filter(pk=instance.cliente_id).first()
+    if cliente is not None:
+        cliente.actualizar_total_comisiones()
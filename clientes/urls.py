@@ -3,6 +3,7 @@ from . import views
 
 urlpatterns = [
     path("", views.clientes_lista, name="clientes_cliente_list"),
+    path("exportar/", views.exportar_clientes, name="clientes_cliente_export"),
     path("agregar/", views.agregar_cliente, name="clientes_cliente_create"),
     path("<int:id>/", views.editar_cliente, name="clientes_cliente_update"),
     path("<int:id>/contactos/", views.contactos_cliente, name="clientes_contacto_list"),
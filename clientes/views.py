@@ -7,16 +7,17 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.utils import timezone
 
+from core import exports
 from core.choices import SERVICIO_CHOICES
 from .models import Cliente, Contacto
 from alianzas.models import Alianza
 import unicodedata
 
+# Renglones de reparto que muestra el formulario de cliente
+MAX_COMISIONISTAS = 10
 
-class ClienteForm(forms.ModelForm):
-    comision_campos = [f"comision_{i}" for i in range(1, 11)]
-    comisionista_campos = [f"comisionista_{i}" for i in range(1, 11)]
 
+class ClienteForm(forms.ModelForm):
     class Meta:
         model = Cliente
         fields = [
@@ -31,71 +32,88 @@ class ClienteForm(forms.ModelForm):
             "linkedin",
             "otra_red",
             "propuesta",
-            *[f"comisionista_{i}" for i in range(1, 11)],
-            *[f"comision_{i}" for i in range(1, 11)],
         ]
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields.update({
-            campo: self.fields[campo]
-            for campo in self.comisionista_campos + self.comision_campos
-            if campo in self.fields
-        })
-        # Ordenar alianzas por nombre (ya guardadas en uppercase/strip)
-        alianza_qs = Alianza.objects.all().order_by("nombre")
-        for campo in self.comisionista_campos:
-            self.fields[campo].queryset = alianza_qs
-            self.fields[campo].label = f"Comisionista {campo.split('_')[-1]}"
-        # Mostrar valores porcentuales como enteros (precisión con Decimal)
-        for campo in self.comision_campos:
-            self.fields[campo].widget = forms.NumberInput(attrs={"step": "0.01", "min": "0"})
-            self.fields[campo].label = f"Comisión {campo.split('_')[-1]} (%)"
-            if self.initial.get(campo) is not None:
-                try:
-                    self.initial[campo] = (Decimal(self.initial[campo]) * Decimal("100")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-                except Exception:
-                    pass
-
         # Pasar fecha_registro para display en plantilla, igual que en comercial
         if getattr(self, "instance", None) and getattr(self.instance, "pk", None) and self.instance.fecha_registro:
             self.fecha_registro_display = timezone.localtime(self.instance.fecha_registro)
 
-    def clean(self):
-        cleaned = super().clean()
-        # Convertir porcentajes enteros a decimales (10 -> 0.10) con Decimal
-        for campo in self.comision_campos:
-            val = cleaned.get(campo)
-            if val is not None:
-                try:
-                    cleaned[campo] = (Decimal(str(val)) / Decimal("100")).quantize(Decimal("0.000001"), rounding=ROUND_HALF_UP)
-                except Exception:
-                    cleaned[campo] = val
-        return cleaned
+
+class ComisionRepartoForm(forms.Form):
+    alianza = forms.ModelChoiceField(queryset=Alianza.objects.none(), required=False)
+    # Se captura como porcentaje entero (10 -> 0.10)
+    porcentaje = forms.DecimalField(
+        required=False,
+        min_value=0,
+        widget=forms.NumberInput(attrs={"step": "0.01", "min": "0"}),
+    )
+
+    def clean_porcentaje(self):
+        val = self.cleaned_data.get("porcentaje")
+        if val is None:
+            return None
+        return (Decimal(str(val)) / Decimal("100")).quantize(Decimal("0.000001"), rounding=ROUND_HALF_UP)
+
+
+class BaseComisionRepartoFormSet(forms.BaseFormSet):
+    def __init__(self, *args, alianzas=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Un solo queryset (ordenado por nombre) para todos los selects
+        alianzas = alianzas if alianzas is not None else list(Alianza.objects.all().order_by("nombre"))
+        for i, form in enumerate(self.forms, start=1):
+            form.fields["alianza"].queryset = Alianza.objects.all()
+            form.fields["alianza"].choices = [("", "---------")] + [(a.pk, str(a)) for a in alianzas]
+            form.fields["alianza"].label = f"Comisionista {i}"
+            form.fields["porcentaje"].label = f"Comisión {i} (%)"
+
+    def pares(self):
+        """[(alianza, porcentaje), ...] de los renglones capturados, en orden."""
+        return [
+            (form.cleaned_data["alianza"], form.cleaned_data["porcentaje"])
+            for form in self.forms
+            if form.cleaned_data.get("alianza") and form.cleaned_data.get("porcentaje")
+        ]
 
     @property
     def total_comision_porcentaje(self):
-        data = getattr(self, "cleaned_data", {}) or {}
-        total = 0
-        for campo in self.comision_campos:
-            val = data.get(campo)
-            if val is None:
-                continue
-            try:
-                total += float(Decimal(val) * Decimal("100"))
-            except Exception:
-                total += val * 100  # fallback si val ya es float
-        return total
-
-
-def _comision_pairs(form: ClienteForm):
-    pairs = []
-    for i in range(1, 11):
-        ci = f"comisionista_{i}"
-        cv = f"comision_{i}"
-        if ci in form.fields and cv in form.fields:
-            pairs.append((form[ci], form[cv]))
-    return pairs
+        return float(sum(pct for _, pct in self.pares()) * 100)
+
+    def clean(self):
+        super().clean()
+        if any(self.errors):
+            return
+        if self.total_comision_porcentaje > 100:
+            raise forms.ValidationError(
+                f"La suma de comisiones ({self.total_comision_porcentaje:.2f}%) supera el 100%."
+            )
+
+
+ComisionRepartoFormSet = forms.formset_factory(
+    ComisionRepartoForm,
+    formset=BaseComisionRepartoFormSet,
+    extra=0,
+    min_num=MAX_COMISIONISTAS,
+    max_num=MAX_COMISIONISTAS,
+)
+
+
+def _reparto_formset(data=None, cliente=None):
+    initial = []
+    if cliente is not None and cliente.pk:
+        initial = [
+            {
+                "alianza": rc.alianza_id,
+                "porcentaje": (rc.porcentaje * Decimal("100")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP),
+            }
+            for rc in cliente.reparto_comisiones.all()
+        ]
+    return ComisionRepartoFormSet(data, initial=initial, prefix="comisiones")
+
+
+def _comision_pairs(formset):
+    return [(form["alianza"], form["porcentaje"]) for form in formset.forms]
 
 
 def _can_view_comisiones_inputs(user) -> bool:
@@ -113,12 +131,12 @@ def _can_view_comisiones_inputs(user) -> bool:
     return "direccion comercial" in normed or "direccion operaciones" in normed
 
 
-def clientes_lista(request):
+def _filtered_clientes(params):
     clientes = Cliente.objects.all().order_by("-fecha_registro")
-    fecha_desde = request.GET.get("fecha_desde") or ""
-    fecha_hasta = request.GET.get("fecha_hasta") or ""
-    nombre = (request.GET.get("cliente") or "").strip()
-    servicio_sel = request.GET.get("servicio") or ""
+    fecha_desde = params.get("fecha_desde") or ""
+    fecha_hasta = params.get("fecha_hasta") or ""
+    nombre = (params.get("cliente") or "").strip()
+    servicio_sel = params.get("servicio") or ""
 
     tz = timezone.get_current_timezone()
     if fecha_desde:
@@ -139,17 +157,46 @@ def clientes_lista(request):
         clientes = clientes.filter(cliente__icontains=nombre)
     if servicio_sel:
         clientes = clientes.filter(servicio=servicio_sel)
-    context = {
-        "clientes": clientes,
+    filtros = {
         "fecha_desde": fecha_desde,
         "fecha_hasta": fecha_hasta,
         "cliente_nombre": nombre,
         "servicio_sel": servicio_sel,
+    }
+    return clientes, filtros
+
+
+def clientes_lista(request):
+    clientes, filtros = _filtered_clientes(request.GET)
+    context = {
+        "clientes": clientes,
+        **filtros,
         "servicio_choices": SERVICIO_CHOICES,
     }
     return render(request, "clientes/lista.html", context)
 
 
+def exportar_clientes(request):
+    clientes, _ = _filtered_clientes(request.GET)
+    columnas = [
+        ("Cliente", "cliente"),
+        ("Servicio", "servicio"),
+        ("Giro", "giro"),
+        ("Tipo", "tipo"),
+        ("Medio", "medio"),
+        ("Conexión", "conexion"),
+        ("Domicilio", "domicilio"),
+        ("Página web", "pagina_web"),
+        ("LinkedIn", "linkedin"),
+        ("Otra red", "otra_red"),
+        ("Propuesta", "propuesta"),
+        ("Fecha registro", "fecha_registro"),
+    ]
+    if _can_view_comisiones_inputs(request.user):
+        columnas.append(("Total comisiones", "total_comisiones"))
+    return exports.export_queryset(clientes, columnas, "clientes.csv")
+
+
 ContactoFormSet = inlineformset_factory(
     Cliente,
     Contacto,
@@ -161,14 +208,19 @@ ContactoFormSet = inlineformset_factory(
 
 def agregar_cliente(request):
     back_url = request.GET.get("next") or reverse("clientes_cliente_list")
+    puede_comisiones = _can_view_comisiones_inputs(request.user)
     if request.method == "POST":
         back_url = request.POST.get("next") or back_url
         form = ClienteForm(request.POST)
-        if form.is_valid():
-            form.save()
+        reparto = _reparto_formset(request.POST) if puede_comisiones else None
+        if form.is_valid() and (reparto is None or reparto.is_valid()):
+            cliente = form.save()
+            if reparto is not None:
+                cliente.guardar_reparto(reparto.pares())
             return redirect(request.POST.get("next") or back_url)
     else:
         form = ClienteForm()
+        reparto = _reparto_formset() if puede_comisiones else None
 
     contactos_url = None
     if getattr(form.instance, "pk", None):
@@ -177,24 +229,30 @@ def agregar_cliente(request):
     context = {
         "form": form,
         "back_url": back_url,
-        "comisiones": _comision_pairs(form),
+        "reparto": reparto,
+        "comisiones": _comision_pairs(reparto) if reparto is not None else [],
         "contactos_url": contactos_url,
-        "can_view_comisiones_inputs": _can_view_comisiones_inputs(request.user),
+        "can_view_comisiones_inputs": puede_comisiones,
     }
     return render(request, "clientes/form.html", context)
 
 
 def editar_cliente(request, id: int):
     back_url = request.GET.get("next") or reverse("clientes_cliente_list")
-    cliente = get_object_or_404(Cliente, pk=id)
+    cliente = get_object_or_404(Cliente.objects.prefetch_related("reparto_comisiones"), pk=id)
+    puede_comisiones = _can_view_comisiones_inputs(request.user)
     if request.method == "POST":
         back_url = request.POST.get("next") or back_url
         form = ClienteForm(request.POST, instance=cliente)
-        if form.is_valid():
-            form.save()
+        reparto = _reparto_formset(request.POST, cliente) if puede_comisiones else None
+        if form.is_valid() and (reparto is None or reparto.is_valid()):
+            cliente = form.save()
+            if reparto is not None:
+                cliente.guardar_reparto(reparto.pares())
             return redirect(request.POST.get("next") or back_url)
     else:
         form = ClienteForm(instance=cliente)
+        reparto = _reparto_formset(cliente=cliente) if puede_comisiones else None
 
     contactos_url = None
     if getattr(form.instance, "pk", None):
@@ -203,9 +261,10 @@ def editar_cliente(request, id: int):
     context = {
         "form": form,
         "back_url": back_url,
-        "comisiones": _comision_pairs(form),
+        "reparto": reparto,
+        "comisiones": _comision_pairs(reparto) if reparto is not None else [],
         "contactos_url": contactos_url,
-        "can_view_comisiones_inputs": _can_view_comisiones_inputs(request.user),
+        "can_view_comisiones_inputs": puede_comisiones,
     }
     return render(request, "clientes/form.html", context)
 
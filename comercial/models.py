@@ -11,8 +11,9 @@ from core.choices import (
     LUGAR_CHOICES,
     MES_CHOICES
 )
+from core.tracking import CambiosRastreadosMixin
 
-class Cita(models.Model):
+class Cita(CambiosRastreadosMixin, models.Model):
     prospecto = models.CharField(max_length=150)
     giro = models.CharField(max_length=150, blank=True, null=True)
     tipo = models.CharField(max_length=50, choices=TIPO_CHOICES, blank=True, null=True)
@@ -43,6 +44,27 @@ class Cita(models.Model):
     lugar = models.CharField(max_length=50, choices=LUGAR_CHOICES, blank=True, null=True)
     fecha_cita = models.DateTimeField()
     fecha_registro = models.DateTimeField(auto_now_add=True)
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Campos que se copian a Cliente/Contacto al cerrar la cita (ver comercial.signals)
+    CAMPOS_PROPAGADOS = (
+        "prospecto",
+        "giro",
+        "tipo",
+        "medio",
+        "conexion",
+        "domicilio",
+        "pagina_web",
+        "linkedin",
+        "otra_red",
+        "propuesta",
+        "servicio",
+        "contacto",
+        "telefono",
+        "correo",
+        "puesto",
+    )
+    CAMPOS_RASTREADOS = ("estatus_seguimiento",) + CAMPOS_PROPAGADOS
 
     def save(self, *args, **kwargs):
         """Aplica formato automático a campos de texto."""
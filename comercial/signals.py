@@ -1,73 +1,94 @@
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from .models import Cita
 
 
+def _debe_propagar(instance: Cita, created: bool) -> bool:
+    """Solo al pasar a "Cerrado" o si cambió algún campo que se copia al cliente."""
+    if instance.estatus_seguimiento != "Cerrado":
+        return False
+    if created or instance.campos_cambiados(["estatus_seguimiento"]):
+        return True
+    return bool(instance.campos_cambiados(Cita.CAMPOS_PROPAGADOS))
+
+
+def _propagar_a_cliente(datos: dict):
+    try:
+        from clientes.models import Cliente, Contacto  # import diferido para evitar dependencias circulares en migraciones
+    except Exception:
+        return
+
+    defaults = {
+        "giro": datos["giro"],
+        "tipo": datos["tipo"],
+        "medio": datos["medio"],
+        "conexion": datos["conexion"],
+        "domicilio": datos["domicilio"],
+        "pagina_web": datos["pagina_web"],
+        "linkedin": datos["linkedin"],
+        "otra_red": datos["otra_red"],
+        "propuesta": datos["propuesta"],
+        "servicio": datos["servicio"],
+    }
+    # Usa update_or_create para evitar duplicados si la Cita se edita muchas veces
+    cliente, _ = Cliente.objects.update_or_create(
+        cliente=datos["prospecto"],
+        servicio=datos["servicio"],
+        defaults=defaults,
+    )
+
+    contacto_data = [
+        datos["contacto"],
+        datos["telefono"],
+        datos["correo"],
+        datos["puesto"],
+    ]
+    if any(contacto_data):
+        if datos["contacto"]:
+            Contacto.objects.update_or_create(
+                cliente=cliente,
+                nombre=datos["contacto"],
+                defaults={
+                    "telefono": datos["telefono"],
+                    "correo": datos["correo"],
+                    "puesto": datos["puesto"],
+                },
+            )
+        elif datos["correo"]:
+            Contacto.objects.update_or_create(
+                cliente=cliente,
+                correo=datos["correo"],
+                defaults={
+                    "nombre": datos["contacto"],
+                    "telefono": datos["telefono"],
+                    "puesto": datos["puesto"],
+                },
+            )
+        else:
+            Contacto.objects.create(
+                cliente=cliente,
+                nombre=datos["contacto"],
+                telefono=datos["telefono"],
+                correo=datos["correo"],
+                puesto=datos["puesto"],
+            )
+
+
 @receiver(post_save, sender=Cita)
 def crear_cliente_al_cerrar(sender, instance: Cita, created: bool, **kwargs):
     """
     Cuando una Cita cambia su estatus_seguimiento a "Cerrado",
     crear/actualizar un registro en la app de clientes y su directorio.
     La fecha de registro se maneja con auto_now_add en el modelo Cliente.
+
+    Ediciones posteriores de una cita ya cerrada solo se propagan si cambió
+    algún campo copiado al cliente; la escritura se difiere al commit.
     """
-    try:
-        from clientes.models import Cliente, Contacto  # import diferido para evitar dependencias circulares en migraciones
-    except Exception:
+    if not _debe_propagar(instance, created):
         return
 
-    if instance.estatus_seguimiento == "Cerrado":
-        defaults = {
-            "giro": instance.giro,
-            "tipo": instance.tipo,
-            "medio": instance.medio,
-            "conexion": instance.conexion,
-            "domicilio": instance.domicilio,
-            "pagina_web": instance.pagina_web,
-            "linkedin": instance.linkedin,
-            "otra_red": instance.otra_red,
-            "propuesta": instance.propuesta,
-            "servicio": instance.servicio,
-        }
-        # Usa update_or_create para evitar duplicados si la Cita se edita muchas veces
-        cliente, _ = Cliente.objects.update_or_create(
-            cliente=instance.prospecto,
-            servicio=instance.servicio,
-            defaults=defaults,
-        )
-
-        contacto_data = [
-            instance.contacto,
-            instance.telefono,
-            instance.correo,
-            instance.puesto,
-        ]
-        if any(contacto_data):
-            if instance.contacto:
-                Contacto.objects.update_or_create(
-                    cliente=cliente,
-                    nombre=instance.contacto,
-                    defaults={
-                        "telefono": instance.telefono,
-                        "correo": instance.correo,
-                        "puesto": instance.puesto,
-                    },
-                )
-            elif instance.correo:
-                Contacto.objects.update_or_create(
-                    cliente=cliente,
-                    correo=instance.correo,
-                    defaults={
-                        "nombre": instance.contacto,
-                        "telefono": instance.telefono,
-                        "puesto": instance.puesto,
-                    },
-                )
-            else:
-                Contacto.objects.create(
-                    cliente=cliente,
-                    nombre=instance.contacto,
-                    telefono=instance.telefono,
-                    correo=instance.correo,
-                    puesto=instance.puesto,
-                )
+    # Se copian los valores ahora: la instancia puede cambiar antes del commit.
+    datos = {campo: getattr(instance, campo) for campo in Cita.CAMPOS_PROPAGADOS}
+    transaction.on_commit(lambda: _propagar_a_cliente(datos))
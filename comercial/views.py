@@ -9,14 +9,12 @@ from django.urls import reverse
 from django.utils import timezone
 
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import landscape, letter
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from PyPDF2 import PdfReader, PdfWriter
-import copy
-from django.conf import settings
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
+from core import exports, report_cache
 from core.choices import CONTROL_PERIODICIDAD_CHOICES, SERVICIO_CHOICES
+from core.pdf import build_con_membrete, membrete_pagesize
 from .forms import ComercialKpiForm, ComercialKpiMetaForm
 from .models import Cita, ComercialKpi, ComercialKpiMeta, MES_CHOICES, NUM_CITA_CHOICES
 
@@ -117,14 +115,14 @@ def _initial_desde_cita(cita: Cita) -> dict:
     }
 
 
-def citas_lista(request):
+def _filtered_citas_lista(params):
     citas = Cita.objects.all().order_by("-fecha_registro")
-    fecha_desde = (request.GET.get("fecha_desde") or "").strip()
-    fecha_hasta = (request.GET.get("fecha_hasta") or "").strip()
-    prospecto = (request.GET.get("prospecto") or "").strip()
-    servicio = (request.GET.get("servicio") or "").strip()
-    estatus_cita = (request.GET.get("estatus_cita") or "").strip()
-    estatus_seguimiento = (request.GET.get("estatus_seguimiento") or "").strip()
+    fecha_desde = (params.get("fecha_desde") or "").strip()
+    fecha_hasta = (params.get("fecha_hasta") or "").strip()
+    prospecto = (params.get("prospecto") or "").strip()
+    servicio = (params.get("servicio") or "").strip()
+    estatus_cita = (params.get("estatus_cita") or "").strip()
+    estatus_seguimiento = (params.get("estatus_seguimiento") or "").strip()
 
     tz = timezone.get_current_timezone()
     if fecha_desde:
@@ -149,14 +147,22 @@ def citas_lista(request):
         citas = citas.filter(estatus_cita=estatus_cita)
     if estatus_seguimiento:
         citas = citas.filter(estatus_seguimiento=estatus_seguimiento)
-    context = {
-        "citas": citas,
+    filtros = {
         "fecha_desde": fecha_desde,
         "fecha_hasta": fecha_hasta,
         "prospecto": prospecto,
         "servicio": servicio,
         "estatus_cita": estatus_cita,
         "estatus_seguimiento": estatus_seguimiento,
+    }
+    return citas, filtros
+
+
+def citas_lista(request):
+    citas, filtros = _filtered_citas_lista(request.GET)
+    context = {
+        "citas": citas,
+        **filtros,
         "servicio_choices": SERVICIO_CHOICES,
         "estatus_cita_choices": Cita._meta.get_field("estatus_cita").choices,
         "estatus_seguimiento_choices": Cita._meta.get_field("estatus_seguimiento").choices,
@@ -164,6 +170,32 @@ def citas_lista(request):
     return render(request, "comercial/lista.html", context)
 
 
+def exportar_citas(request):
+    citas, _ = _filtered_citas_lista(request.GET)
+    columnas = [
+        ("Prospecto", "prospecto"),
+        ("Giro", "giro"),
+        ("Tipo", "tipo"),
+        ("Medio", "medio"),
+        ("Servicio", "servicio"),
+        ("Servicio 2", "servicio2"),
+        ("Servicio 3", "servicio3"),
+        ("Contacto", "contacto"),
+        ("Puesto", "puesto"),
+        ("Teléfono", "telefono"),
+        ("Correo", "correo"),
+        ("Vendedor", "vendedor"),
+        ("Número de cita", "numero_cita"),
+        ("Estatus cita", "estatus_cita"),
+        ("Estatus seguimiento", "estatus_seguimiento"),
+        ("Lugar", "lugar"),
+        ("Fecha cita", "fecha_cita"),
+        ("Comentarios", "comentarios"),
+        ("Fecha registro", "fecha_registro"),
+    ]
+    return exports.export_queryset(citas, columnas, "citas.csv")
+
+
 def _filter_citas_queryset(request):
     citas = Cita.objects.all().order_by("-fecha_registro")
     fecha_desde = (request.GET.get("fecha_desde") or "").strip()
@@ -248,8 +280,7 @@ def citas_kanban(request):
     return render(request, "comercial/kanban.html", context)
 
 
-def citas_kanban_resumen_pdf(request):
-    citas, fecha_desde, fecha_hasta = _filter_citas_queryset(request)
+def _citas_resumen_pdf_bytes(citas, fecha_desde, fecha_hasta):
     kanban_data, total_citas, total_atendidas, total_cerradas = _build_citas_kanban_data(citas)
 
     if fecha_desde or fecha_hasta:
@@ -271,19 +302,7 @@ def citas_kanban_resumen_pdf(request):
         hasta_txt = max_fecha.strftime("%d/%m/%Y") if max_fecha else "—"
     subtitle_text = f"Fechas: {desde_txt} a {hasta_txt}"
 
-    template_path = settings.BASE_DIR / "static" / "img" / "MEMBRETE.pdf"
-    pagesize = landscape(letter)
-    if template_path.exists():
-        try:
-            template_reader = PdfReader(str(template_path))
-            template_page = template_reader.pages[0]
-            pagesize = (float(template_page.mediabox.width), float(template_page.mediabox.height))
-        except Exception:
-            template_reader = None
-            template_page = None
-    else:
-        template_reader = None
-        template_page = None
+    pagesize = membrete_pagesize()
 
     buffer = BytesIO()
     doc = SimpleDocTemplate(
@@ -483,25 +502,20 @@ def citas_kanban_resumen_pdf(request):
             elements.append(separator)
             elements.append(Spacer(1, 14))
 
-    doc.build(elements)
-    content_pdf = buffer.getvalue()
+    build_con_membrete(doc, elements)
+    pdf = buffer.getvalue()
     buffer.close()
+    return pdf
 
-    if template_reader and template_page:
-        content_reader = PdfReader(BytesIO(content_pdf))
-        writer = PdfWriter()
-        for page in content_reader.pages:
-            base = copy.copy(template_page)
-            if base.mediabox != page.mediabox:
-                base.mediabox = page.mediabox
-            base.merge_page(page)
-            writer.add_page(base)
-        output = BytesIO()
-        writer.write(output)
-        pdf = output.getvalue()
-        output.close()
-    else:
-        pdf = content_pdf
+
+def citas_kanban_resumen_pdf(request):
+    citas, fecha_desde, fecha_hasta = _filter_citas_queryset(request)
+    pdf = report_cache.get_or_build(
+        "resumen_citas",
+        {"fecha_desde": fecha_desde, "fecha_hasta": fecha_hasta},
+        report_cache.data_version(Cita),
+        lambda: _citas_resumen_pdf_bytes(citas, fecha_desde, fecha_hasta),
+    )
 
     response = HttpResponse(pdf, content_type="application/pdf")
     response["Content-Disposition"] = 'inline; filename="resumen_citas.pdf"'
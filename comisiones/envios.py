@@ -0,0 +1,137 @@
+"""
+Envío del reporte mensual a todos los comisionistas de un periodo.
+
+Los correos se arman en la petición (una plantilla por comisionista) y se
+mandan en segundo plano con un pool acotado de hilos que comparten el
+token de OAuth de core.google_email. Los envíos se espacian según
+COMMISSION_EMAIL_RATE y el estatus de cada destinatario queda en
+EnvioReporteComision, así que volver a lanzar el envío solo reintenta los
+que no salieron.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from core.google_email import send_google_mail
+from .models import EnvioReporteComision
+
+logger = logging.getLogger(__name__)
+
+Estatus = EnvioReporteComision.Estatus
+
+# Un envío "enviando" más viejo que esto se considera abandonado (p. ej. reinicio del servidor).
+ENVIANDO_EXPIRA = timedelta(minutes=15)
+
+
+class _Limitador:
+    """Espacia las llamadas para no pasar de `por_segundo` entre todos los hilos."""
+
+    def __init__(self, por_segundo: float):
+        self._intervalo = 1.0 / por_segundo if por_segundo > 0 else 0.0
+        self._siguiente = 0.0
+        self._lock = threading.Lock()
+
+    def esperar(self) -> None:
+        if not self._intervalo:
+            return
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._siguiente)
+            self._siguiente = turno + self._intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+def ocupados(mes: int, anio: int) -> set:
+    """Comisionistas con un envío en curso para el periodo."""
+    return set(
+        EnvioReporteComision.objects.filter(
+            periodo_mes=mes,
+            periodo_anio=anio,
+            estatus=Estatus.ENVIANDO,
+            actualizado__gte=timezone.now() - ENVIANDO_EXPIRA,
+        ).values_list("comisionista_id", flat=True)
+    )
+
+
+def enviados(mes: int, anio: int) -> set:
+    return set(
+        EnvioReporteComision.objects.filter(
+            periodo_mes=mes, periodo_anio=anio, estatus=Estatus.ENVIADO
+        ).values_list("comisionista_id", flat=True)
+    )
+
+
+def _marcar(comisionista_id, mes, anio, **valores) -> EnvioReporteComision:
+    envio, _ = EnvioReporteComision.objects.update_or_create(
+        comisionista_id=comisionista_id, periodo_mes=mes, periodo_anio=anio, defaults=valores
+    )
+    return envio
+
+
+def _enviar(mensaje: dict, limitador: _Limitador) -> None:
+    limitador.esperar()
+    send_google_mail(
+        to=mensaje["destinatario"],
+        subject=mensaje["asunto"],
+        html_body=mensaje["html"],
+        bcc=settings.EMAIL_BCC_ALWAYS or None,
+    )
+
+
+def _procesar(pendientes: list[tuple[int, dict]]) -> None:
+    workers = max(1, int(getattr(settings, "COMMISSION_EMAIL_WORKERS", 4)))
+    limitador = _Limitador(float(getattr(settings, "COMMISSION_EMAIL_RATE", 2)))
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="comisiones-email") as pool:
+            futuros = {pool.submit(_enviar, mensaje, limitador): envio_id for envio_id, mensaje in pendientes}
+            # Solo este hilo escribe en la base; los del pool únicamente llaman a Gmail.
+            for futuro in as_completed(futuros):
+                envio_id = futuros[futuro]
+                try:
+                    futuro.result()
+                except Exception as exc:
+                    logger.warning("No se pudo enviar el reporte de comisiones (envío %s): %s", envio_id, exc)
+                    valores = {"estatus": Estatus.ERROR, "mensaje": str(exc)[:500]}
+                else:
+                    valores = {"estatus": Estatus.ENVIADO, "mensaje": "", "enviado_en": timezone.now()}
+                EnvioReporteComision.objects.filter(pk=envio_id).update(
+                    intentos=F("intentos") + 1, actualizado=timezone.now(), **valores
+                )
+    finally:
+        connections.close_all()
+
+
+def iniciar(mes: int, anio: int, mensajes: list[dict], sin_correo=()) -> int:
+    """
+    Registra el estatus de cada destinatario y lanza el envío en segundo plano.
+    `mensajes`: [{"comisionista_id", "destinatario", "asunto", "html"}, ...].
+    Regresa cuántos correos se van a enviar.
+    """
+    for comisionista_id in sin_correo:
+        _marcar(comisionista_id, mes, anio, destinatario="", estatus=Estatus.SIN_CORREO, mensaje="")
+
+    pendientes = []
+    for mensaje in mensajes:
+        envio = _marcar(
+            mensaje["comisionista_id"],
+            mes,
+            anio,
+            destinatario=mensaje["destinatario"],
+            estatus=Estatus.ENVIANDO,
+            mensaje="",
+        )
+        pendientes.append((envio.pk, mensaje))
+
+    if pendientes:
+        threading.Thread(
+            target=_procesar, args=(pendientes,), name=f"comisiones-envio-{anio}-{mes:02d}", daemon=True
+        ).start()
+    return len(pendientes)
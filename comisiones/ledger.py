@@ -0,0 +1,219 @@
+"""
+Bitácora de comisiones y saldos por periodo.
+
+Cada cambio en Comision o PagoComision se registra como uno o más
+MovimientoComision (la bitácora no se edita: los ajustes son movimientos
+con monto negativo) y, en la misma transacción, se suma a SaldoComision
+del periodo y al acumulado histórico (periodo 0/0).
+
+`diferencias` compara los saldos contra Comision/PagoComision y
+`conciliar` registra los movimientos de ajuste que falten.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .models import Comision, MovimientoComision, PagoComision, SaldoComision
+
+Tipo = MovimientoComision.Tipo
+
+CAMPO_SALDO = {
+    Tipo.DEVENGADA: "devengado",
+    Tipo.REVERTIDA: "devengado",
+    Tipo.LIBERADA: "liberado",
+    Tipo.PAGADA: "pagado",
+}
+CAMPOS_SALDO = ("devengado", "liberado", "pagado")
+CERO = Decimal("0")
+
+
+def datos_comision(comision: Comision) -> dict:
+    return {
+        "comisionista_id": comision.comisionista_id,
+        "periodo_anio": comision.periodo_anio,
+        "periodo_mes": comision.periodo_mes,
+        "monto": Decimal(comision.monto or 0),
+        "liberada": bool(comision.liberada),
+    }
+
+
+def _periodo(datos: dict) -> tuple:
+    return datos["comisionista_id"], datos["periodo_anio"], datos["periodo_mes"]
+
+
+def movimiento(tipo, datos, monto, **relaciones) -> MovimientoComision:
+    return MovimientoComision(
+        tipo=tipo,
+        comisionista_id=datos["comisionista_id"],
+        periodo_anio=datos["periodo_anio"],
+        periodo_mes=datos["periodo_mes"],
+        monto=monto,
+        **relaciones,
+    )
+
+
+def movimientos_comision(comision_id, antes: dict | None, despues: dict | None) -> list[MovimientoComision]:
+    """Movimientos que llevan una comisión del estado `antes` a `despues` (None = no existe)."""
+    movimientos = []
+    if antes is not None and despues is not None and _periodo(antes) == _periodo(despues):
+        delta = despues["monto"] - antes["monto"]
+        if delta:
+            tipo = Tipo.DEVENGADA if delta > 0 else Tipo.REVERTIDA
+            movimientos.append(movimiento(tipo, despues, delta, comision_id=comision_id))
+        liberado_antes = antes["monto"] if antes["liberada"] else CERO
+        liberado_despues = despues["monto"] if despues["liberada"] else CERO
+        if liberado_despues != liberado_antes:
+            movimientos.append(
+                movimiento(Tipo.LIBERADA, despues, liberado_despues - liberado_antes, comision_id=comision_id)
+            )
+        return movimientos
+
+    # Alta, baja o cambio de periodo/comisionista: se revierte todo y se vuelve a devengar.
+    if antes is not None:
+        movimientos.append(movimiento(Tipo.REVERTIDA, antes, -antes["monto"], comision_id=comision_id))
+        if antes["liberada"]:
+            movimientos.append(movimiento(Tipo.LIBERADA, antes, -antes["monto"], comision_id=comision_id))
+    if despues is not None:
+        movimientos.append(movimiento(Tipo.DEVENGADA, despues, despues["monto"], comision_id=comision_id))
+        if despues["liberada"]:
+            movimientos.append(movimiento(Tipo.LIBERADA, despues, despues["monto"], comision_id=comision_id))
+    return movimientos
+
+
+def movimientos_pago(pago_id, antes: dict | None, despues: dict | None) -> list[MovimientoComision]:
+    """Movimientos de tipo pagada para un PagoComision (valores de CAMPOS_RASTREADOS)."""
+    movimientos = []
+    if antes is not None and despues is not None and _periodo(antes) == _periodo(despues):
+        delta = Decimal(despues["monto"] or 0) - Decimal(antes["monto"] or 0)
+        if delta:
+            movimientos.append(movimiento(Tipo.PAGADA, despues, delta, pago_id=pago_id))
+        return movimientos
+    if antes is not None:
+        movimientos.append(movimiento(Tipo.PAGADA, antes, -Decimal(antes["monto"] or 0), pago_id=pago_id))
+    if despues is not None:
+        movimientos.append(movimiento(Tipo.PAGADA, despues, Decimal(despues["monto"] or 0), pago_id=pago_id))
+    return movimientos
+
+
+def _aplicar_saldo(comisionista_id, anio, mes, deltas: dict) -> None:
+    llave = {"comisionista_id": comisionista_id, "periodo_anio": anio, "periodo_mes": mes}
+    cambios = {campo: F(campo) + monto for campo, monto in deltas.items()}
+    if SaldoComision.objects.filter(**llave).update(**cambios, actualizado=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            SaldoComision.objects.create(**llave, **deltas)
+    except IntegrityError:
+        # Otra escritura creó la fila al mismo tiempo.
+        SaldoComision.objects.filter(**llave).update(**cambios, actualizado=timezone.now())
+
+
+@transaction.atomic
+def registrar(movimientos) -> int:
+    """Guarda los movimientos y los suma a los saldos del periodo y al histórico."""
+    movimientos = [m for m in movimientos if m.monto]
+    if not movimientos:
+        return 0
+    MovimientoComision.objects.bulk_create(movimientos)
+
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    for mov in movimientos:
+        if mov.comisionista_id is None:
+            continue
+        campo = CAMPO_SALDO[mov.tipo]
+        for anio, mes in ((mov.periodo_anio, mov.periodo_mes), SaldoComision.PERIODO_HISTORICO):
+            deltas[(mov.comisionista_id, anio, mes)][campo] += mov.monto
+    # Orden fijo para que escrituras concurrentes bloqueen filas en el mismo orden.
+    for (comisionista_id, anio, mes), cambios in sorted(deltas.items()):
+        _aplicar_saldo(comisionista_id, anio, mes, dict(cambios))
+    return len(movimientos)
+
+
+def saldo(comisionista_id, anio=None, mes=None) -> SaldoComision:
+    """Saldo del periodo (o el histórico si no se indica periodo); en ceros si no hay movimientos."""
+    if anio is None or mes is None:
+        anio, mes = SaldoComision.PERIODO_HISTORICO
+    encontrado = SaldoComision.objects.filter(
+        comisionista_id=comisionista_id, periodo_anio=anio, periodo_mes=mes
+    ).first()
+    return encontrado or SaldoComision(comisionista_id=comisionista_id, periodo_anio=anio, periodo_mes=mes)
+
+
+def saldos_periodo_e_historico(comisionista_id, anio, mes) -> tuple[SaldoComision, SaldoComision]:
+    """Saldo del periodo y acumulado histórico del comisionista en una sola consulta."""
+    historico = SaldoComision.PERIODO_HISTORICO
+    encontrados = {
+        (s.periodo_anio, s.periodo_mes): s
+        for s in SaldoComision.objects.filter(comisionista_id=comisionista_id).filter(
+            Q(periodo_anio=anio, periodo_mes=mes) | Q(periodo_anio=historico[0], periodo_mes=historico[1])
+        )
+    }
+    return tuple(
+        encontrados.get(periodo)
+        or SaldoComision(comisionista_id=comisionista_id, periodo_anio=periodo[0], periodo_mes=periodo[1])
+        for periodo in ((anio, mes), historico)
+    )
+
+
+def saldos_esperados() -> dict:
+    """Saldos por (comisionista, anio, mes) calculados directo sobre Comision y PagoComision."""
+    esperado = defaultdict(lambda: dict.fromkeys(CAMPOS_SALDO, CERO))
+    comisiones = (
+        Comision.objects.filter(comisionista__isnull=False)
+        .order_by()
+        .values("comisionista_id", "periodo_anio", "periodo_mes")
+        .annotate(devengado=Sum("monto"), liberado=Sum("monto", filter=Q(liberada=True)))
+    )
+    pagos = (
+        PagoComision.objects.order_by()
+        .values("comisionista_id", "periodo_anio", "periodo_mes")
+        .annotate(pagado=Sum("monto"))
+    )
+    for filas in (comisiones, pagos):
+        for fila in filas:
+            llaves = (
+                (fila["comisionista_id"], fila["periodo_anio"], fila["periodo_mes"]),
+                (fila["comisionista_id"], *SaldoComision.PERIODO_HISTORICO),
+            )
+            for llave in llaves:
+                for campo in CAMPOS_SALDO:
+                    if fila.get(campo):
+                        esperado[llave][campo] += fila[campo]
+    return esperado
+
+
+def diferencias() -> list[dict]:
+    """Saldos que no coinciden con Comision/PagoComision."""
+    esperado = saldos_esperados()
+    actual = {
+        (s["comisionista_id"], s["periodo_anio"], s["periodo_mes"]): {c: s[c] for c in CAMPOS_SALDO}
+        for s in SaldoComision.objects.values("comisionista_id", "periodo_anio", "periodo_mes", *CAMPOS_SALDO)
+    }
+    ceros = dict.fromkeys(CAMPOS_SALDO, CERO)
+    resultado = []
+    for llave in sorted(set(esperado) | set(actual)):
+        if llave[1:] == SaldoComision.PERIODO_HISTORICO:
+            continue  # el histórico es la suma de los periodos
+        esp = esperado.get(llave, ceros)
+        act = actual.get(llave, ceros)
+        if esp != act:
+            resultado.append({"llave": llave, "esperado": esp, "actual": act})
+    return resultado
+
+
+def conciliar() -> int:
+    """Registra movimientos de ajuste (sin comisión ni pago) para cada diferencia. Regresa cuántos."""
+    tipos = {"devengado": (Tipo.DEVENGADA, Tipo.REVERTIDA), "liberado": (Tipo.LIBERADA,) * 2, "pagado": (Tipo.PAGADA,) * 2}
+    movimientos = []
+    for dif in diferencias():
+        comisionista_id, anio, mes = dif["llave"]
+        datos = {"comisionista_id": comisionista_id, "periodo_anio": anio, "periodo_mes": mes}
+        for campo in CAMPOS_SALDO:
+            delta = dif["esperado"][campo] - dif["actual"][campo]
+            if delta:
+                positivo, negativo = tipos[campo]
+                movimientos.append(movimiento(positivo if delta > 0 else negativo, datos, delta))
+    return registrar(movimientos)
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from comisiones import ledger
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara los saldos de comisiones contra Comision y PagoComision. "
+        "Termina con error si hay diferencias (útil en cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Registra en la bitácora los movimientos de ajuste que falten.",
+        )
+
+    def handle(self, *args, **options):
+        diferencias = ledger.diferencias()
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS("Saldos de comisiones consistentes."))
+            return
+
+        for dif in diferencias[:50]:
+            self.stdout.write(f"{dif['llave']}: esperado={dif['esperado']} actual={dif['actual']}")
+        if len(diferencias) > 50:
+            self.stdout.write(f"... y {len(diferencias) - 50} más")
+
+        if options.get("fix"):
+            total = ledger.conciliar()
+            self.stdout.write(self.style.WARNING(f"Movimientos de ajuste registrados: {total}"))
+            return
+        raise CommandError(f"Saldos de comisiones con {len(diferencias)} diferencias.")
@@ -0,0 +1,55 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from comisiones.models import Comision
+from comisiones.services import conciliar_liberacion, sincronizar_comisiones
+from core.periodos import ANIO_MIN, ANIO_MAX, anio_valido, filtro_mes
+from ventas.models import Venta
+
+
+class Command(BaseCommand):
+    help = (
+        "Corrige comisiones cuya liberación no coincide con el estatus de pago de la venta. "
+        "Con --regenerar también recalcula las comisiones de cada venta con el reparto actual del cliente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mes", type=int, help="Limita al periodo (requiere --anio).")
+        parser.add_argument("--anio", type=int, help="Limita al año del periodo.")
+        parser.add_argument(
+            "--regenerar",
+            action="store_true",
+            help="Recalcula montos y comisionistas de cada venta (más lento).",
+        )
+
+    def handle(self, *args, **options):
+        mes = options.get("mes")
+        anio = options.get("anio")
+
+        if mes and not anio:
+            raise CommandError("--mes requiere --anio.")
+        if mes is not None and not 1 <= mes <= 12:
+            raise CommandError("--mes debe estar entre 1 y 12.")
+        if anio is not None and not anio_valido(anio):
+            raise CommandError(f"--anio debe estar entre {ANIO_MIN} y {ANIO_MAX}.")
+
+        comisiones = Comision.objects.all()
+        ventas = Venta.objects.select_related("cliente").prefetch_related("cliente__reparto_comisiones")
+        if anio and mes:
+            comisiones = comisiones.filter(periodo_anio=anio, periodo_mes=mes)
+            ventas = ventas.filter(filtro_mes("fecha", mes, anio))
+        elif anio:
+            comisiones = comisiones.filter(periodo_anio=anio)
+            ventas = ventas.filter(fecha__gte=date(anio, 1, 1), fecha__lt=date(anio + 1, 1, 1))
+
+        if options.get("regenerar"):
+            total = 0
+            for venta in ventas.iterator(chunk_size=500):
+                sincronizar_comisiones(venta)
+                total += 1
+            self.stdout.write(f"Ventas revisadas: {total}")
+
+        liberadas, retenidas = conciliar_liberacion(comisiones)
+        self.stdout.write(self.style.SUCCESS(f"Comisiones liberadas: {liberadas}"))
+        self.stdout.write(self.style.SUCCESS(f"Comisiones retenidas: {retenidas}"))
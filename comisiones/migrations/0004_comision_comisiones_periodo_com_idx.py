@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alianzas', '0003_alter_alianza_telefono'),
+        ('clientes', '0016_alter_cliente_servicio'),
+        ('comisiones', '0003_comision_pago_fields'),
+        ('ventas', '0005_ventamensual'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comision',
+            index=models.Index(fields=['periodo_anio', 'periodo_mes', 'comisionista'], name='comisiones_periodo_com_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import Q
+
+
+def conciliar_liberada(apps, schema_editor):
+    """
+    Antes la lista refrescaba `liberada` al abrirse; ahora es de solo lectura y
+    la bitácora (0005) se llena desde `liberada`, así que se corrige aquí una
+    vez, igual que services.conciliar_liberacion.
+    """
+    Comision = apps.get_model("comisiones", "Comision")
+    Comision.objects.filter(venta__estatus_pago="Pagado").filter(
+        Q(liberada=False) | ~Q(estatus_pago_dispersion="Pagado")
+    ).update(liberada=True, estatus_pago_dispersion="Pagado")
+    Comision.objects.exclude(venta__estatus_pago="Pagado").filter(
+        Q(liberada=True) | Q(estatus_pago_dispersion="Pagado")
+    ).update(liberada=False, estatus_pago_dispersion="Pendiente")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comisiones', '0004_comision_comisiones_periodo_com_idx'),
+        ('ventas', '0005_ventamensual'),
+    ]
+
+    operations = [
+        migrations.RunPython(conciliar_liberada, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:28
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def poblar_bitacora(apps, schema_editor):
+    """Movimientos de apertura desde las comisiones y pagos existentes, y sus saldos."""
+    Comision = apps.get_model("comisiones", "Comision")
+    PagoComision = apps.get_model("comisiones", "PagoComision")
+    MovimientoComision = apps.get_model("comisiones", "MovimientoComision")
+    SaldoComision = apps.get_model("comisiones", "SaldoComision")
+
+    movimientos = []
+    saldos = {}
+
+    def agregar(tipo, campo, comisionista_id, anio, mes, monto, **relaciones):
+        if not monto:
+            return
+        movimientos.append(
+            MovimientoComision(
+                tipo=tipo,
+                comisionista_id=comisionista_id,
+                periodo_anio=anio,
+                periodo_mes=mes,
+                monto=monto,
+                **relaciones,
+            )
+        )
+        if comisionista_id is None:
+            return
+        for llave in ((comisionista_id, anio, mes), (comisionista_id, 0, 0)):
+            saldo = saldos.setdefault(llave, {"devengado": Decimal("0"), "liberado": Decimal("0"), "pagado": Decimal("0")})
+            saldo[campo] += monto
+
+    for c in Comision.objects.values("id", "comisionista_id", "periodo_anio", "periodo_mes", "monto", "liberada").iterator():
+        agregar("devengada", "devengado", c["comisionista_id"], c["periodo_anio"], c["periodo_mes"], c["monto"], comision_id=c["id"])
+        if c["liberada"]:
+            agregar("liberada", "liberado", c["comisionista_id"], c["periodo_anio"], c["periodo_mes"], c["monto"], comision_id=c["id"])
+    for p in PagoComision.objects.values("id", "comisionista_id", "periodo_anio", "periodo_mes", "monto").iterator():
+        agregar("pagada", "pagado", p["comisionista_id"], p["periodo_anio"], p["periodo_mes"], p["monto"], pago_id=p["id"])
+
+    MovimientoComision.objects.bulk_create(movimientos, batch_size=1000)
+    SaldoComision.objects.bulk_create(
+        [
+            SaldoComision(comisionista_id=comisionista_id, periodo_anio=anio, periodo_mes=mes, **montos)
+            for (comisionista_id, anio, mes), montos in saldos.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alianzas', '0003_alter_alianza_telefono'),
+        ('comisiones', '0004_conciliar_liberada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoComision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo_mes', models.IntegerField()),
+                ('periodo_anio', models.IntegerField()),
+                ('tipo', models.CharField(choices=[('devengada', 'Devengada'), ('liberada', 'Liberada'), ('pagada', 'Pagada'), ('revertida', 'Revertida')], max_length=20)),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('comision', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimientos', to='comisiones.comision')),
+                ('comisionista', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimientos_comision', to='alianzas.alianza')),
+                ('pago', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimientos', to='comisiones.pagocomision')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['comisionista', 'periodo_anio', 'periodo_mes'], name='comisiones_mov_periodo_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SaldoComision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo_mes', models.IntegerField()),
+                ('periodo_anio', models.IntegerField()),
+                ('devengado', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14)),
+                ('liberado', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14)),
+                ('pagado', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('comisionista', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_comision', to='alianzas.alianza')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['periodo_anio', 'periodo_mes'], name='comisiones_saldo_periodo_idx')],
+                'constraints': [models.UniqueConstraint(fields=('comisionista', 'periodo_anio', 'periodo_mes'), name='comisiones_saldo_llave')],
+            },
+        ),
+        migrations.RunPython(poblar_bitacora, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alianzas', '0003_alter_alianza_telefono'),
+        ('comisiones', '0005_bitacora_comisiones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnvioReporteComision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo_mes', models.IntegerField()),
+                ('periodo_anio', models.IntegerField()),
+                ('destinatario', models.EmailField(blank=True, max_length=150)),
+                ('estatus', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('error', 'Error'), ('sin_correo', 'Sin correo')], default='pendiente', max_length=20)),
+                ('mensaje', models.CharField(blank=True, max_length=500)),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('enviado_en', models.DateTimeField(blank=True, null=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('comisionista', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='envios_reporte', to='alianzas.alianza')),
+            ],
+            options={
+                'verbose_name': 'Envío de reporte',
+                'verbose_name_plural': 'Envíos de reporte',
+                'constraints': [models.UniqueConstraint(fields=('comisionista', 'periodo_anio', 'periodo_mes'), name='comisiones_envio_llave')],
+            },
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.utils import timezone
 from decimal import Decimal
 
+from core.tracking import CambiosRastreadosMixin
+
 
 class Comision(models.Model):
     venta = models.ForeignKey("ventas.Venta", on_delete=models.CASCADE, related_name="comisiones")
@@ -19,11 +21,21 @@ class Comision(models.Model):
     fecha_dispersion = models.DateField()
     creado = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["periodo_anio", "periodo_mes", "comisionista"],
+                name="comisiones_periodo_com_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.comisionista} {self.periodo_mes:02d}/{self.periodo_anio} -> {self.monto}"
 
 
-class PagoComision(models.Model):
+class PagoComision(CambiosRastreadosMixin, models.Model):
+    CAMPOS_RASTREADOS = ("comisionista_id", "periodo_anio", "periodo_mes", "monto")
+
     comision = models.ForeignKey("comisiones.Comision", on_delete=models.PROTECT, related_name="pagos", null=True, blank=True)
     comisionista = models.ForeignKey("alianzas.Alianza", on_delete=models.CASCADE, related_name="pagos_comision")
     periodo_mes = models.IntegerField()
@@ -36,4 +48,105 @@ class PagoComision(models.Model):
     def __str__(self):
         return f"Pago {self.comisionista} {self.periodo_mes:02d}/{self.periodo_anio}: {self.monto}"
 
-# Create your models here.
+
+class MovimientoComision(models.Model):
+    """
+    Bitácora de comisiones (solo se agregan registros). Los ajustes se
+    registran como movimientos nuevos con monto negativo.
+    """
+
+    class Tipo(models.TextChoices):
+        DEVENGADA = "devengada", "Devengada"
+        LIBERADA = "liberada", "Liberada"
+        PAGADA = "pagada", "Pagada"
+        REVERTIDA = "revertida", "Revertida"
+
+    comisionista = models.ForeignKey(
+        "alianzas.Alianza", on_delete=models.SET_NULL, null=True, blank=True, related_name="movimientos_comision"
+    )
+    comision = models.ForeignKey(
+        "comisiones.Comision", on_delete=models.SET_NULL, null=True, blank=True, related_name="movimientos"
+    )
+    pago = models.ForeignKey(
+        "comisiones.PagoComision", on_delete=models.SET_NULL, null=True, blank=True, related_name="movimientos"
+    )
+    periodo_mes = models.IntegerField()
+    periodo_anio = models.IntegerField()
+    tipo = models.CharField(max_length=20, choices=Tipo.choices)
+    monto = models.DecimalField(max_digits=12, decimal_places=2)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["comisionista", "periodo_anio", "periodo_mes"], name="comisiones_mov_periodo_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.comisionista} {self.periodo_mes:02d}/{self.periodo_anio}: {self.monto}"
+
+
+class SaldoComision(models.Model):
+    """
+    Saldo por comisionista y periodo, mantenido junto con la bitácora.
+    El periodo 0/0 (PERIODO_HISTORICO) acumula todos los periodos.
+    """
+
+    PERIODO_HISTORICO = (0, 0)
+
+    comisionista = models.ForeignKey("alianzas.Alianza", on_delete=models.CASCADE, related_name="saldos_comision")
+    periodo_mes = models.IntegerField()
+    periodo_anio = models.IntegerField()
+    devengado = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0"))
+    liberado = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0"))
+    pagado = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0"))
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["comisionista", "periodo_anio", "periodo_mes"], name="comisiones_saldo_llave"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["periodo_anio", "periodo_mes"], name="comisiones_saldo_periodo_idx"),
+        ]
+
+    @property
+    def pendiente(self) -> Decimal:
+        return (self.liberado or 0) - (self.pagado or 0)
+
+    def __str__(self):
+        return f"Saldo {self.comisionista} {self.periodo_mes:02d}/{self.periodo_anio}"
+
+
+class EnvioReporteComision(models.Model):
+    """Estatus del envío del reporte mensual a cada comisionista (para reintentar fallidos)."""
+
+    class Estatus(models.TextChoices):
+        PENDIENTE = "pendiente", "Pendiente"
+        ENVIANDO = "enviando", "Enviando"
+        ENVIADO = "enviado", "Enviado"
+        ERROR = "error", "Error"
+        SIN_CORREO = "sin_correo", "Sin correo"
+
+    comisionista = models.ForeignKey("alianzas.Alianza", on_delete=models.CASCADE, related_name="envios_reporte")
+    periodo_mes = models.IntegerField()
+    periodo_anio = models.IntegerField()
+    destinatario = models.EmailField(max_length=150, blank=True)
+    estatus = models.CharField(max_length=20, choices=Estatus.choices, default=Estatus.PENDIENTE)
+    mensaje = models.CharField(max_length=500, blank=True)
+    intentos = models.PositiveIntegerField(default=0)
+    enviado_en = models.DateTimeField(blank=True, null=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Envío de reporte"
+        verbose_name_plural = "Envíos de reporte"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["comisionista", "periodo_anio", "periodo_mes"], name="comisiones_envio_llave"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.comisionista} {self.periodo_mes:02d}/{self.periodo_anio}: {self.get_estatus_display()}"
@@ -0,0 +1,171 @@
+"""Generación y liberación de comisiones a partir de las ventas."""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+
+from ventas.models import Venta
+from . import ledger
+from .models import Comision, PagoComision
+
+CAMPOS_ACTUALIZABLES = [
+    "cliente",
+    "servicio",
+    "porcentaje",
+    "monto",
+    "periodo_mes",
+    "periodo_anio",
+    "liberable_desde",
+    "liberada",
+    "estatus_pago_dispersion",
+    "fecha_dispersion",
+]
+
+
+def _first_day_next_month(d: date) -> date:
+    if d.month == 12:
+        return date(d.year + 1, 1, 1)
+    return date(d.year, d.month + 1, 1)
+
+
+def _comisiones_esperadas(venta: Venta) -> list[dict]:
+    """Comisiones que corresponden a la venta según el reparto actual del cliente."""
+    cliente = venta.cliente
+    liberada = _liberada(getattr(venta, "estatus_pago", ""))
+    esperadas = []
+    for reparto in cliente.reparto_comisiones.all():
+        pct = reparto.porcentaje
+        if pct is not None and Decimal(pct) > 0:
+            esperadas.append(
+                {
+                    "comisionista_id": reparto.alianza_id,
+                    "cliente": cliente,
+                    "servicio": getattr(venta, "servicio", ""),
+                    "porcentaje": Decimal(pct),
+                    "monto": (Decimal(pct) * Decimal(venta.monto_venta)).quantize(Decimal("0.01")),
+                    "periodo_mes": venta.fecha.month,
+                    "periodo_anio": venta.fecha.year,
+                    "liberable_desde": _first_day_next_month(venta.fecha),
+                    "liberada": liberada,
+                    "estatus_pago_dispersion": getattr(venta, "estatus_pago", ""),
+                    "fecha_dispersion": venta.fecha,
+                }
+            )
+    return esperadas
+
+
+@transaction.atomic
+def sincronizar_comisiones(venta: Venta) -> None:
+    """
+    Ajusta las comisiones existentes de la venta al conjunto esperado:
+    actualiza las que siguen, crea las nuevas y borra las que sobran.
+    Conserva ids y pago_comision de las que siguen. Los borrados se
+    registran en la bitácora desde la señal post_delete de Comision; las
+    sobrantes que ya tienen un PagoComision (PROTECT) no se borran, se dejan
+    en cero y se revierten en la bitácora.
+    """
+    existentes = defaultdict(list)
+    for comision in Comision.objects.filter(venta=venta).order_by("id"):
+        existentes[comision.comisionista_id].append(comision)
+
+    crear = []
+    actualizar = []
+    movimientos = []
+    for datos in _comisiones_esperadas(venta):
+        pendientes = existentes.get(datos["comisionista_id"])
+        if not pendientes:
+            crear.append(Comision(venta=venta, **datos))
+            continue
+        comision = pendientes.pop(0)
+        antes = ledger.datos_comision(comision)
+        cambio = False
+        for campo in CAMPOS_ACTUALIZABLES:
+            valor = datos[campo]
+            actual = comision.cliente_id if campo == "cliente" else getattr(comision, campo)
+            if campo == "cliente":
+                valor = valor.pk
+            if actual != valor:
+                setattr(comision, campo, datos[campo])
+                cambio = True
+        if cambio:
+            actualizar.append(comision)
+            movimientos += ledger.movimientos_comision(comision.pk, antes, ledger.datos_comision(comision))
+
+    sobrantes = [c for pendientes in existentes.values() for c in pendientes]
+    con_pago = set()
+    if sobrantes:
+        con_pago = set(
+            PagoComision.objects.filter(comision__in=sobrantes).values_list("comision_id", flat=True)
+        )
+    for comision in sobrantes:
+        if comision.pk in con_pago and (comision.monto or comision.porcentaje):
+            antes = ledger.datos_comision(comision)
+            comision.monto = Decimal("0")
+            comision.porcentaje = Decimal("0")
+            actualizar.append(comision)
+            movimientos += ledger.movimientos_comision(comision.pk, antes, ledger.datos_comision(comision))
+    borrar = [c.pk for c in sobrantes if c.pk not in con_pago]
+    if borrar:
+        Comision.objects.filter(pk__in=borrar).delete()
+    if actualizar:
+        Comision.objects.bulk_update(actualizar, CAMPOS_ACTUALIZABLES)
+    if crear:
+        Comision.objects.bulk_create(crear)
+        for comision in crear:
+            movimientos += ledger.movimientos_comision(comision.pk, None, ledger.datos_comision(comision))
+    ledger.registrar(movimientos)
+
+    version = venta.cliente.version_reparto
+    if venta.version_reparto != version:
+        Venta.objects.filter(pk=venta.pk).update(version_reparto=version)
+        venta.version_reparto = version
+
+
+def _liberada(estatus_pago) -> bool:
+    return str(estatus_pago or "") == Venta.EstatusPago.PAGADO
+
+
+def _registrar_liberacion(qs, liberada: bool) -> None:
+    """Bitácora para las comisiones de `qs` que cambian a `liberada` (llamar antes del update)."""
+    signo = 1 if liberada else -1
+    movimientos = [
+        ledger.movimiento(ledger.Tipo.LIBERADA, fila, signo * fila["monto"], comision_id=fila["id"])
+        for fila in qs.exclude(liberada=liberada).values(
+            "id", "comisionista_id", "periodo_anio", "periodo_mes", "monto"
+        )
+    ]
+    ledger.registrar(movimientos)
+
+
+@transaction.atomic
+def liberar_comisiones(venta: Venta) -> int:
+    """Libera (o retiene) las comisiones de la venta según su estatus de pago."""
+    qs = Comision.objects.filter(venta=venta)
+    if _liberada(venta.estatus_pago):
+        _registrar_liberacion(qs, True)
+        return qs.update(liberada=True, estatus_pago_dispersion=Venta.EstatusPago.PAGADO)
+    _registrar_liberacion(qs, False)
+    return qs.update(liberada=False, estatus_pago_dispersion=venta.estatus_pago or "")
+
+
+@transaction.atomic
+def conciliar_liberacion(comisiones_qs=None) -> tuple[int, int]:
+    """
+    Corrige comisiones cuya liberación no coincide con el estatus de pago de su venta
+    (p. ej. ventas actualizadas con QuerySet.update()). Regresa (liberadas, retenidas).
+    """
+    qs = Comision.objects.all() if comisiones_qs is None else comisiones_qs
+    pagado = Venta.EstatusPago.PAGADO
+    por_liberar = qs.filter(venta__estatus_pago=pagado).filter(
+        Q(liberada=False) | ~Q(estatus_pago_dispersion=pagado)
+    )
+    _registrar_liberacion(por_liberar, True)
+    liberadas = por_liberar.update(liberada=True, estatus_pago_dispersion=pagado)
+    por_retener = qs.exclude(venta__estatus_pago=pagado).filter(
+        Q(liberada=True) | Q(estatus_pago_dispersion=pagado)
+    )
+    _registrar_liberacion(por_retener, False)
+    retenidas = por_retener.update(liberada=False, estatus_pago_dispersion=Venta.EstatusPago.PENDIENTE)
+    return liberadas, retenidas
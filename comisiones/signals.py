@@ -1,47 +1,48 @@
-from datetime import date
-from decimal import Decimal
-
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from alianzas.models import Alianza
 from ventas.models import Venta
-from .models import Comision
-
+from . import ledger
+from .models import Comision, PagoComision
+from .services import liberar_comisiones, sincronizar_comisiones
 
-def _first_day_next_month(d: date) -> date:
-    if d.month == 12:
-        return date(d.year + 1, 1, 1)
-    return date(d.year, d.month + 1, 1)
+# Si cambia alguno hay que recalcular las comisiones de la venta. Los cambios de
+# reparto del cliente se detectan con Cliente.version_reparto (ver guardar_reparto).
+CAMPOS_MONTO_COMISION = ["fecha", "monto_venta", "cliente_id", "comision_porcentaje"]
 
 
 @receiver(post_save, sender=Venta)
 def generar_comisiones(sender, instance: Venta, created, **kwargs):
-    Comision.objects.filter(venta=instance).delete()
-
-    cliente = instance.cliente
-    periodo_mes = instance.fecha.month
-    periodo_anio = instance.fecha.year
-    liberable_desde = _first_day_next_month(instance.fecha)
-
-    for i in range(1, 11):
-        com_field = f"comisionista_{i}"
-        pct_field = f"comision_{i}"
-        comisionista = getattr(cliente, com_field, None)
-        pct = getattr(cliente, pct_field, None)
-        if comisionista and pct is not None and Decimal(pct) > 0:
-            monto = (Decimal(pct) * Decimal(instance.monto_venta)).quantize(Decimal("0.01"))
-            liberada = str(getattr(instance, "estatus_pago", "")) == "Pagado"
-            Comision.objects.create(
-                venta=instance,
-                cliente=cliente,
-                comisionista=comisionista,
-                servicio=getattr(instance, "servicio", ""),
-                porcentaje=Decimal(pct),
-                monto=monto,
-                periodo_mes=periodo_mes,
-                periodo_anio=periodo_anio,
-                liberable_desde=liberable_desde,
-                liberada=liberada,
-                estatus_pago_dispersion=getattr(instance, "estatus_pago", ""),
-                fecha_dispersion=instance.fecha,
-            )
+    reparto_cambio = instance.version_reparto != instance.cliente.version_reparto
+    if created or reparto_cambio or instance.campos_cambiados(CAMPOS_MONTO_COMISION):
+        sincronizar_comisiones(instance)
+    elif instance.campos_cambiados(["estatus_pago"]):
+        liberar_comisiones(instance)
+
+
+def _borrado_de_comisionista(origin) -> bool:
+    # Al borrar la alianza sus saldos se borran en cascada; no hay saldo que ajustar.
+    return isinstance(origin, Alianza) or getattr(origin, "model", None) is Alianza
+
+
+@receiver(post_delete, sender=Comision)
+def revertir_comision(sender, instance: Comision, origin=None, **kwargs):
+    if _borrado_de_comisionista(origin):
+        return
+    ledger.registrar(ledger.movimientos_comision(None, ledger.datos_comision(instance), None))
+
+
+@receiver(post_save, sender=PagoComision)
+def registrar_pago_comision(sender, instance: PagoComision, created, **kwargs):
+    antes = None if created else instance.valores_previos
+    despues = {campo: getattr(instance, campo) for campo in PagoComision.CAMPOS_RASTREADOS}
+    ledger.registrar(ledger.movimientos_pago(instance.pk, antes, despues))
+
+
+@receiver(post_delete, sender=PagoComision)
+def revertir_pago_comision(sender, instance: PagoComision, origin=None, **kwargs):
+    if _borrado_de_comisionista(origin):
+        return
+    antes = {campo: getattr(instance, campo) for campo in PagoComision.CAMPOS_RASTREADOS}
+    ledger.registrar(ledger.movimientos_pago(None, antes, None))
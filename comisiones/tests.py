@@ -1,3 +1,65 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from alianzas.models import Alianza
+from clientes.models import Cliente
+from ventas.models import Venta
+from .models import Comision, PagoComision
+
+# Las plantillas usan {% static %}; sin collectstatic no hay manifiesto.
+SIN_MANIFIESTO = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+@override_settings(STORAGES=SIN_MANIFIESTO)
+class ComisionesDetalleConsultasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alianza = Alianza.objects.create(nombre="Alianza", correo="alianza@example.com")
+        cls.usuario = User.objects.create_superuser("admin", "admin@example.com", "x")
+
+    def _agregar_comisiones(self, n: int) -> None:
+        """`n` ventas de enero 2025, cada una con su comisión; la mitad con pago registrado."""
+        for i in range(n):
+            cliente = Cliente.objects.create(cliente=f"cliente {Cliente.objects.count()}", servicio="Marketing")
+            cliente.guardar_reparto([(self.alianza, Decimal("0.05"))])
+            venta = Venta.objects.create(
+                cliente=cliente, fecha=date(2025, 1, 1 + i % 28), monto_venta=Decimal("1000"), estatus_pago="Pagado"
+            )
+            if i % 2 == 0:
+                comision = Comision.objects.get(venta=venta)
+                PagoComision.objects.create(
+                    comision=comision,
+                    comisionista=self.alianza,
+                    periodo_mes=comision.periodo_mes,
+                    periodo_anio=comision.periodo_anio,
+                    monto=comision.monto,
+                )
+
+    def _get_detalle(self):
+        url = reverse("comisiones_comisionista_detail", args=[self.alianza.pk])
+        response = self.client.get(url, {"mes": 1, "anio": 2025})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_consultas_no_dependen_del_numero_de_comisiones(self):
+        self.client.force_login(self.usuario)
+        n = 5
+        self._agregar_comisiones(n)
+        self._get_detalle()  # la primera petición puede guardar la sesión
+        with CaptureQueriesContext(connection) as consultas:
+            response = self._get_detalle()
+        self.assertEqual(len(response.context["items"]), n)
+
+        self._agregar_comisiones(n)
+        with self.assertNumQueries(len(consultas)):
+            response = self._get_detalle()
+        self.assertEqual(len(response.context["items"]), 2 * n)
@@ -4,6 +4,8 @@ from . import views
 
 urlpatterns = [
     path("", views.comisiones_lista, name="comisiones_comision_list"),
+    path("exportar/", views.exportar_comisiones, name="comisiones_comision_export"),
+    path("enviar/", views.enviar_detalle_todos, name="comisiones_comisionista_send_all"),
     path("detalle/<int:comisionista_id>/", views.comisiones_detalle, name="comisiones_comisionista_detail"),
     path("detalle/<int:comisionista_id>/enviar/", views.enviar_detalle_comisionista, name="comisiones_comisionista_send"),
     path("pago/nuevo/<int:comisionista_id>/", views.registrar_pago, name="comisiones_pagocomision_create_for_comisionista"),
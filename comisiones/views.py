@@ -1,15 +1,16 @@
 from datetime import date
+from decimal import Decimal
 
 from django.conf import settings
 from django.contrib import messages
-from django.db.models import Sum, Q
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.template.loader import render_to_string
 
+from . import envios, ledger
 from .forms import PagoComisionForm
-from .models import Comision, PagoComision
-from core.google_email import send_google_mail, GoogleEmailError
+from .models import Comision, EnvioReporteComision, PagoComision, SaldoComision
+from core import exports, outbox
 
 MESES_NOMBRES = [
     "",
@@ -51,31 +52,35 @@ def comisiones_lista(request):
     if redir:
         return redir
 
-    Comision.objects.filter(periodo_mes=mes, periodo_anio=anio, venta__estatus_pago="Pagado").update(
-        liberada=True, estatus_pago_dispersion="Pagado"
-    )
-    Comision.objects.filter(periodo_mes=mes, periodo_anio=anio).exclude(venta__estatus_pago="Pagado").update(
-        liberada=False
-    )
-
-    qs_periodo = Comision.objects.filter(periodo_mes=mes, periodo_anio=anio)
-    resumen = list(
-        qs_periodo.values("comisionista_id", "comisionista__nombre")
-        .annotate(total=Sum("monto"), liberadas=Sum("monto", filter=Q(liberada=True)))
+    saldos = list(
+        SaldoComision.objects.filter(periodo_mes=mes, periodo_anio=anio)
+        .values("comisionista_id", "comisionista__nombre", "devengado", "liberado", "pagado")
         .order_by("comisionista__nombre")
     )
+    resumen = [
+        {
+            "comisionista_id": s["comisionista_id"],
+            "comisionista__nombre": s["comisionista__nombre"],
+            "total": s["devengado"],
+            "liberadas": s["liberado"],
+            "pagos": s["pagado"],
+            "pendiente": s["liberado"] - s["pagado"],
+        }
+        for s in saldos
+        # Solo comisionistas con comisiones en el periodo (no los que solo tienen pagos).
+        if s["devengado"] or s["liberado"]
+    ]
 
-    pagos = PagoComision.objects.filter(periodo_mes=mes, periodo_anio=anio).values("comisionista_id").annotate(
-        pagos=Sum("monto")
-    )
-    pagos_map = {p["comisionista_id"]: p["pagos"] for p in pagos}
+    envios_map = {
+        e.comisionista_id: e
+        for e in EnvioReporteComision.objects.filter(periodo_mes=mes, periodo_anio=anio)
+    }
     for r in resumen:
-        r["pagos"] = pagos_map.get(r["comisionista_id"], 0) or 0
-        r["pendiente"] = (r["liberadas"] or 0) - (r["pagos"] or 0)
+        r["envio"] = envios_map.get(r["comisionista_id"])
 
-    total_periodo = qs_periodo.aggregate(v=Sum("monto"))["v"] or 0
-    total_liberado = qs_periodo.filter(liberada=True).aggregate(v=Sum("monto"))["v"] or 0
-    total_pagos = PagoComision.objects.filter(periodo_mes=mes, periodo_anio=anio).aggregate(v=Sum("monto"))["v"] or 0
+    total_periodo = sum((s["devengado"] for s in saldos), Decimal("0"))
+    total_liberado = sum((s["liberado"] for s in saldos), Decimal("0"))
+    total_pagos = sum((s["pagado"] for s in saldos), Decimal("0"))
     total_pendiente = total_liberado - total_pagos
 
     meses_choices = [(i, MESES_NOMBRES[i]) for i in range(1, 13)]
@@ -94,6 +99,32 @@ def comisiones_lista(request):
     return render(request, "comisiones/comisiones_lista.html", context)
 
 
+def exportar_comisiones(request):
+    mes, anio, redir = _coerce_mes_anio(request)
+    if redir:
+        return redir
+
+    comisiones = (
+        Comision.objects.filter(periodo_mes=mes, periodo_anio=anio)
+        .select_related("comisionista", "cliente", "venta")
+        .order_by("comisionista__nombre", "venta__fecha", "id")
+    )
+    columnas = [
+        ("Comisionista", "comisionista.nombre"),
+        ("Cliente", "cliente.cliente"),
+        ("Fecha venta", "venta.fecha"),
+        ("Servicio", "servicio"),
+        ("Monto venta", "venta.monto_venta"),
+        ("Porcentaje", "porcentaje"),
+        ("Monto comisión", "monto"),
+        ("Estatus pago venta", "venta.estatus_pago"),
+        ("Liberada", "liberada"),
+        ("Estatus dispersión", "estatus_pago_dispersion"),
+        ("Fecha dispersión", "fecha_dispersion"),
+    ]
+    return exports.export_queryset(comisiones, columnas, f"comisiones_{anio}_{mes:02d}.csv")
+
+
 def comisiones_detalle(request, comisionista_id):
     mes, anio, redir = _coerce_mes_anio(request)
     if redir:
@@ -194,31 +225,37 @@ def eliminar_pago(request, id: int):
 
 
 def _detalle_context(comisionista_id, mes, anio):
-    qs = Comision.objects.filter(periodo_mes=mes, periodo_anio=anio, comisionista_id=comisionista_id).select_related(
-        "venta", "cliente", "comisionista"
+    items = list(
+        Comision.objects.filter(periodo_mes=mes, periodo_anio=anio, comisionista_id=comisionista_id)
+        .select_related("venta", "cliente", "comisionista")
+        .order_by("id")
     )
-    pagos = PagoComision.objects.filter(periodo_mes=mes, periodo_anio=anio, comisionista_id=comisionista_id).order_by(
-        "fecha_pago"
+    pagos = (
+        PagoComision.objects.filter(periodo_mes=mes, periodo_anio=anio, comisionista_id=comisionista_id)
+        .select_related("comision__cliente")
+        .order_by("fecha_pago")
     )
-    total_periodo = qs.aggregate(v=Sum("monto"))["v"] or 0
-    total_liberado = qs.filter(liberada=True).aggregate(v=Sum("monto"))["v"] or 0
-    total_pagos = pagos.aggregate(v=Sum("monto"))["v"] or 0
-    total_pendiente = total_liberado - total_pagos
+    saldo, historico = ledger.saldos_periodo_e_historico(comisionista_id, anio, mes)
     return {
         "mes": str(mes),
         "anio": str(anio),
-        "comisionista": qs.first().comisionista if qs.exists() else None,
-        "items": qs,
+        "comisionista": items[0].comisionista if items else None,
+        "items": items,
         "meses": list(range(1, 13)),
         "mes_nombre": MESES_NOMBRES[mes],
         "pagos": pagos,
-        "total_periodo": total_periodo,
-        "total_liberado": total_liberado,
-        "total_pagos": total_pagos,
-        "total_pendiente": total_pendiente,
+        "total_periodo": saldo.devengado,
+        "total_liberado": saldo.liberado,
+        "total_pagos": saldo.pagado,
+        "total_pendiente": saldo.pendiente,
+        "pendiente_historico": historico.pendiente,
     }
 
 
+def _asunto_detalle(context) -> str:
+    return f"Detalle de comisiones {context['mes_nombre']} {context['anio']} - {context['comisionista'].nombre}"
+
+
 def enviar_detalle_comisionista(request, comisionista_id):
     mes, anio, redir = _coerce_mes_anio(request)
     if redir:
@@ -235,20 +272,64 @@ def enviar_detalle_comisionista(request, comisionista_id):
         messages.error(request, "El comisionista no tiene correo registrado.")
         return redirect(reverse("comisiones_comisionista_detail", args=[comisionista_id]) + f"?mes={mes}&anio={anio}")
 
-    subject = f"Detalle de comisiones {context['mes_nombre']} {anio} - {comisionista.nombre}"
+    subject = _asunto_detalle(context)
     html_body = render_to_string("comisiones/email_reporte.html", context)
 
-    try:
-        send_google_mail(
-            to=destinatario,
-            subject=subject,
-            html_body=html_body,
-            bcc=settings.EMAIL_BCC_ALWAYS or None,
-        )
-        messages.success(request, f"Reporte enviado a {destinatario}.")
-    except GoogleEmailError as exc:
-        messages.error(request, f"No se pudo enviar el correo: {exc}")
-    except Exception as exc:  # pragma: no cover
-        messages.error(request, f"No se pudo enviar el correo: {exc}")
+    outbox.enqueue(
+        to=destinatario,
+        subject=subject,
+        html_body=html_body,
+        bcc=settings.EMAIL_BCC_ALWAYS or None,
+        tag="comisiones.detalle",
+    )
+    messages.success(request, f"Reporte en cola de envío a {destinatario}.")
 
     return redirect(reverse("comisiones_comisionista_detail", args=[comisionista_id]) + f"?mes={mes}&anio={anio}")
+
+
+def enviar_detalle_todos(request):
+    mes, anio, redir = _coerce_mes_anio(request)
+    if redir:
+        return redir
+    back_url = reverse("comisiones_comision_list") + f"?mes={mes}&anio={anio}"
+    if request.method != "POST":
+        return redirect(back_url)
+
+    # Por omisión solo se reintentan los que no han salido.
+    omitir = envios.ocupados(mes, anio)
+    if request.POST.get("reenviar") != "1":
+        omitir |= envios.enviados(mes, anio)
+    comisionista_ids = (
+        SaldoComision.objects.filter(periodo_mes=mes, periodo_anio=anio)
+        .exclude(devengado=0, liberado=0)
+        .exclude(comisionista_id__in=omitir)
+        .values_list("comisionista_id", flat=True)
+    )
+
+    mensajes = []
+    sin_correo = []
+    for comisionista_id in comisionista_ids:
+        context = _detalle_context(comisionista_id, mes, anio)
+        comisionista = context.get("comisionista")
+        if not comisionista:
+            continue
+        if not getattr(comisionista, "correo", None):
+            sin_correo.append(comisionista_id)
+            continue
+        mensajes.append(
+            {
+                "comisionista_id": comisionista_id,
+                "destinatario": comisionista.correo,
+                "asunto": _asunto_detalle(context),
+                "html": render_to_string("comisiones/email_reporte.html", context),
+            }
+        )
+
+    total = envios.iniciar(mes, anio, mensajes, sin_correo)
+    if total:
+        messages.success(request, f"Enviando {total} reportes; el estatus se actualiza en la tabla.")
+    else:
+        messages.info(request, "No hay reportes pendientes de envío para este periodo.")
+    if sin_correo:
+        messages.error(request, f"{len(sin_correo)} comisionistas no tienen correo registrado.")
+    return redirect(back_url)
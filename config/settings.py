@@ -170,3 +170,60 @@ GOOGLE_OAUTH_REFRESH_TOKEN = os.environ.get("GOOGLE_OAUTH_REFRESH_TOKEN", "")
 GOOGLE_GMAIL_SENDER = os.environ.get("GOOGLE_GMAIL_SENDER", "")
 _bcc_env = os.environ.get("EMAIL_BCC_ALWAYS", "")
 EMAIL_BCC_ALWAYS = [addr for addr in _bcc_env.split() if addr]
+COMMISSION_EMAIL_WORKERS = int(os.environ.get("COMMISSION_EMAIL_WORKERS", "4"))  # hilos para "Enviar a todos"
+COMMISSION_EMAIL_RATE = float(os.environ.get("COMMISSION_EMAIL_RATE", "2"))  # correos por segundo (0 = sin límite)
+
+# ======================
+# COLA DE CORREOS (core.EmailOutbox)
+# ======================
+EMAIL_OUTBOX_SEND_ON_COMMIT = os.environ.get("EMAIL_OUTBOX_SEND_ON_COMMIT", "TRUE").lower() == "true"  # envío inmediato en segundo plano
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get("EMAIL_OUTBOX_BATCH_SIZE", "50"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+EMAIL_OUTBOX_BACKOFF_SECONDS = int(os.environ.get("EMAIL_OUTBOX_BACKOFF_SECONDS", "60"))
+EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = int(os.environ.get("EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+EMAIL_OUTBOX_LOCK_SECONDS = int(os.environ.get("EMAIL_OUTBOX_LOCK_SECONDS", "300"))  # "enviando" más viejo se reintenta
+
+# ======================
+# CACHE DE REPORTES PDF
+# ======================
+REPORT_CACHE_DIR = os.environ.get("REPORT_CACHE_DIR", "")  # vacío = directorio temporal del sistema
+REPORT_CACHE_MAX_BYTES = int(os.environ.get("REPORT_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# ======================
+# REPORTES PDF EN SEGUNDO PLANO
+# ======================
+REPORT_JOBS_DIR = os.environ.get("REPORT_JOBS_DIR", "")  # vacío = directorio temporal del sistema
+REPORT_SYNC_MAX_ROWS = int(os.environ.get("REPORT_SYNC_MAX_ROWS", "1000"))  # arriba de esto se genera en segundo plano
+REPORT_JOBS_TTL = int(os.environ.get("REPORT_JOBS_TTL", str(24 * 3600)))
+REPORT_JOBS_TIMEOUT = int(os.environ.get("REPORT_JOBS_TIMEOUT", str(30 * 60)))
+
+# ======================
+# EXPORTACIONES CSV
+# ======================
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "2000"))  # filas por lectura de la base
+
+# ======================
+# LISTADOS PAGINADOS
+# ======================
+ACTIVIDADES_POR_PAGINA = int(os.environ.get("ACTIVIDADES_POR_PAGINA", "100"))
+
+# ======================
+# SOLICITUD PÚBLICA DE ACTIVIDADES (límites por token bucket)
+# ======================
+SOLICITUD_RATE_IP_BURST = int(os.environ.get("SOLICITUD_RATE_IP_BURST", "5"))  # solicitudes seguidas por IP
+SOLICITUD_RATE_IP_PER_MINUTE = float(os.environ.get("SOLICITUD_RATE_IP_PER_MINUTE", "2"))
+SOLICITUD_RATE_GLOBAL_BURST = int(os.environ.get("SOLICITUD_RATE_GLOBAL_BURST", "60"))
+SOLICITUD_RATE_GLOBAL_PER_MINUTE = float(os.environ.get("SOLICITUD_RATE_GLOBAL_PER_MINUTE", "30"))
+SOLICITUD_DUPLICADO_SECONDS = int(os.environ.get("SOLICITUD_DUPLICADO_SECONDS", "600"))  # ventana de reenvíos idénticos
+
+# ======================
+# CACHÉS EN MEMORIA DEL PROCESO
+# ======================
+FERIADOS_CACHE_SECONDS = int(os.environ.get("FERIADOS_CACHE_SECONDS", "300"))  # calendario de días hábiles
+CLIENTE_CHOICES_CACHE_SECONDS = int(os.environ.get("CLIENTE_CHOICES_CACHE_SECONDS", "300"))  # clientes de marketing
+
+# ======================
+# SINCRONIZACIÓN CLIENTES → EXPERIENCIA
+# ======================
+EXPERIENCIA_SYNC_ON_COMMIT = os.environ.get("EXPERIENCIA_SYNC_ON_COMMIT", "TRUE").lower() == "true"  # agrupa la sincronización por transacción
+EXPERIENCIA_SYNC_BATCH_SIZE = int(os.environ.get("EXPERIENCIA_SYNC_BATCH_SIZE", "500"))
@@ -7,7 +7,7 @@ from django.contrib.admin.models import LogEntry
 from django.utils import timezone
 from django.utils.timezone import localtime
 
-from .models import UserSessionActivity
+from .models import DiaFeriado, EmailOutbox, UserSessionActivity
 
 """
 Autoregistra todos los modelos instalados para que respeten los permisos
@@ -34,6 +34,14 @@ try:
     admin.site.unregister(UserSessionActivity)
 except Exception:
     pass
+try:
+    admin.site.unregister(EmailOutbox)
+except Exception:
+    pass
+try:
+    admin.site.unregister(DiaFeriado)
+except Exception:
+    pass
 
 
 @admin.register(UserSessionActivity)
@@ -57,3 +65,20 @@ class UserSessionActivityAdmin(admin.ModelAdmin):
         return localtime(obj.last_seen, timezone.get_current_timezone())
 
     last_seen_local.short_description = "Último acceso (local)"
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("subject", "to", "tag", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status", "tag")
+    search_fields = ("subject", "to", "last_error")
+    ordering = ("-created_at",)
+    readonly_fields = ("attempts", "locked_at", "last_error", "created_at", "sent_at")
+
+
+@admin.register(DiaFeriado)
+class DiaFeriadoAdmin(admin.ModelAdmin):
+    list_display = ("fecha", "nombre")
+    search_fields = ("nombre",)
+    date_hierarchy = "fecha"
+    ordering = ("-fecha",)
@@ -0,0 +1,44 @@
+"""
+Caché en memoria del proceso para catálogos que cambian poco.
+
+Cada valor se recalcula con `cargar()` cuando expira (segundos tomados de
+un setting) o cuando se invalida, normalmente desde una señal del modelo
+de origen. La invalidación solo alcanza al proceso que guardó; los demás
+workers ven el cambio al expirar su copia.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+
+class CacheProceso:
+    def __init__(self, cargar, setting: str, default: int = 300):
+        self._cargar = cargar
+        self._setting = setting
+        self._default = default
+        self._valor = None  # (expira, valor)
+        self._generacion = 0
+        self._lock = threading.Lock()
+
+    def _segundos(self) -> int:
+        return int(getattr(settings, self._setting, self._default))
+
+    def obtener(self):
+        actual = self._valor
+        if actual is not None and actual[0] > time.monotonic():
+            return actual[1]
+        with self._lock:
+            actual = self._valor
+            if actual is not None and actual[0] > time.monotonic():
+                return actual[1]
+            generacion = self._generacion
+            valor = self._cargar()
+            # Si se invalidó mientras se cargaba, no se guarda lo que pudo leerse antes del cambio.
+            if generacion == self._generacion:
+                self._valor = (time.monotonic() + self._segundos(), valor)
+            return valor
+
+    def invalidar(self) -> None:
+        self._generacion += 1
+        self._valor = None
@@ -0,0 +1,145 @@
+"""
+Calendario de días hábiles (lunes a viernes menos los días feriados).
+
+Los días se manejan como ordinales (date.toordinal(); el ordinal 1 es lunes),
+así que los días entre semana hasta un ordinal salen por aritmética de
+semanas y los feriados se descuentan con bisect sobre una lista ordenada:
+cada operación cuesta O(log F) sin recorrer día por día.
+
+Los feriados se editan en el admin (core.DiaFeriado). `calendario()` guarda
+el calendario en memoria del proceso (core.cache_proceso); se invalida al
+guardar o borrar un feriado y expira después de FERIADOS_CACHE_SECONDS.
+"""
+from bisect import bisect_right
+from datetime import date, timedelta
+
+from .cache_proceso import CacheProceso
+
+
+def _entre_semana_hasta(ordinal: int) -> int:
+    """Días de lunes a viernes con ordinal en [1, ordinal]."""
+    semanas, resto = divmod(ordinal, 7)
+    return semanas * 5 + min(resto, 5)
+
+
+def _ordinal_entre_semana(n: int) -> int:
+    """Ordinal del n-ésimo día entre semana (inversa de _entre_semana_hasta)."""
+    semanas, resto = divmod(n - 1, 5)
+    return semanas * 7 + resto + 1
+
+
+def _repetir(valor, n: int):
+    # Permite pasar un solo valor (fecha o número) para todo el lote.
+    if valor is None or isinstance(valor, (date, int)):
+        return [valor] * n
+    return list(valor)
+
+
+class CalendarioHabil:
+    def __init__(self, feriados=()):
+        # Un feriado en fin de semana no cambia nada.
+        self._feriados = sorted({f.toordinal() for f in feriados if f.weekday() < 5})
+
+    def __len__(self):
+        return len(self._feriados)
+
+    def _habiles_hasta(self, ordinal: int) -> int:
+        return _entre_semana_hasta(ordinal) - bisect_right(self._feriados, ordinal)
+
+    def es_habil(self, fecha: date) -> bool:
+        if fecha.weekday() >= 5:
+            return False
+        ordinal = fecha.toordinal()
+        i = bisect_right(self._feriados, ordinal)
+        return not (i and self._feriados[i - 1] == ordinal)
+
+    def sumar_habiles(self, inicio: date | None, dias: int | None) -> date | None:
+        """Fecha que cae `dias` días hábiles después de `inicio` (sin contar `inicio`)."""
+        if inicio is None or dias is None:
+            return None
+        dias = int(dias)
+        if dias <= 0:
+            return inicio
+        base = inicio.toordinal()
+        previos = bisect_right(self._feriados, base)
+        objetivo = _entre_semana_hasta(base) + dias
+        # Cada feriado que cae en el rango empuja el resultado un día entre semana más.
+        extra = 0
+        while True:
+            ordinal = _ordinal_entre_semana(objetivo + extra)
+            en_rango = bisect_right(self._feriados, ordinal) - previos
+            if en_rango == extra:
+                return date.fromordinal(ordinal)
+            extra = en_rango
+
+    def habiles_entre(self, inicio: date | None, fin: date | None) -> int | None:
+        """Días hábiles de `inicio` a `fin` sin contar `inicio`; negativo si `fin` es anterior."""
+        if inicio is None or fin is None:
+            return None
+        a, b = inicio.toordinal(), fin.toordinal()
+        if b >= a:
+            return self._habiles_hasta(b) - self._habiles_hasta(a)
+        # Hacia atrás se cuenta [fin, inicio), igual que el recorrido día por día.
+        return -(self._habiles_hasta(a - 1) - self._habiles_hasta(b - 1))
+
+    def sumar_habiles_lote(self, inicios, dias) -> list:
+        """sumar_habiles para listas; `dias` puede ser un solo número para todas las fechas."""
+        inicios = list(inicios)
+        return [self.sumar_habiles(i, d) for i, d in zip(inicios, _repetir(dias, len(inicios)))]
+
+    def habiles_entre_lote(self, inicios, fines) -> list:
+        """habiles_entre para listas; `inicios` o `fines` puede ser una sola fecha."""
+        if isinstance(inicios, date) or inicios is None:
+            fines = list(fines)
+            inicios = _repetir(inicios, len(fines))
+        else:
+            inicios = list(inicios)
+            fines = _repetir(fines, len(inicios))
+        return [self.habiles_entre(i, f) for i, f in zip(inicios, fines)]
+
+
+def _cargar_calendario() -> CalendarioHabil:
+    from .models import DiaFeriado
+
+    return CalendarioHabil(DiaFeriado.objects.values_list("fecha", flat=True))
+
+
+_cache = CacheProceso(_cargar_calendario, "FERIADOS_CACHE_SECONDS")
+
+
+def calendario() -> CalendarioHabil:
+    """Calendario con los feriados de la base, en caché por proceso."""
+    return _cache.obtener()
+
+
+def invalidar() -> None:
+    _cache.invalidar()
+
+
+def sumar_habiles(inicio: date | None, dias: int | None) -> date | None:
+    return calendario().sumar_habiles(inicio, dias)
+
+
+def habiles_entre(inicio: date | None, fin: date | None) -> int | None:
+    return calendario().habiles_entre(inicio, fin)
+
+
+def _n_lunes(anio: int, mes: int, n: int) -> date:
+    primero = date(anio, mes, 1)
+    return primero + timedelta(days=(7 - primero.weekday()) % 7 + 7 * (n - 1))
+
+
+def feriados_oficiales(anio: int) -> list[tuple[date, str]]:
+    """Días de descanso obligatorio del artículo 74 de la Ley Federal del Trabajo."""
+    feriados = [
+        (date(anio, 1, 1), "Año Nuevo"),
+        (_n_lunes(anio, 2, 1), "Día de la Constitución"),
+        (_n_lunes(anio, 3, 3), "Natalicio de Benito Juárez"),
+        (date(anio, 5, 1), "Día del Trabajo"),
+        (date(anio, 9, 16), "Día de la Independencia"),
+        (_n_lunes(anio, 11, 3), "Día de la Revolución"),
+        (date(anio, 12, 25), "Navidad"),
+    ]
+    if anio >= 2024 and (anio - 2024) % 6 == 0:
+        feriados.append((date(anio, 10, 1), "Transmisión del Poder Ejecutivo Federal"))
+    return sorted(feriados)
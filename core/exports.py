@@ -0,0 +1,88 @@
+"""
+Exportación de listados a CSV por streaming.
+
+Cada vista arma su queryset con los mismos filtros del listado y describe
+las columnas como pares (encabezado, atributo o función). Las filas se
+escriben conforme se leen de la base con `.iterator(chunk_size=...)`, así
+que la memoria no crece con el tamaño de la exportación.
+"""
+import csv
+from datetime import date, datetime
+from operator import attrgetter
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+
+def _chunk_size() -> int:
+    return int(getattr(settings, "EXPORT_CHUNK_SIZE", 2000))
+
+
+class _Echo:
+    """Pseudo-archivo para csv.writer: regresa la línea en lugar de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def format_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "Sí" if value else "No"
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.strftime("%Y-%m-%d %H:%M")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return ", ".join(format_value(v) for v in value)
+    return str(value)
+
+
+def _getter(accessor):
+    if callable(accessor):
+        return accessor
+    getter = attrgetter(accessor)
+
+    def _get(obj):
+        try:
+            return getter(obj)
+        except AttributeError:
+            # FK nula en medio de la ruta (p. ej. "comisionista.nombre")
+            return None
+
+    return _get
+
+
+def iter_rows(objects, columnas):
+    getters = [_getter(accessor) for _, accessor in columnas]
+    for obj in objects:
+        yield [format_value(get(obj)) for get in getters]
+
+
+def iter_queryset(queryset, chunk_size=None):
+    return queryset.iterator(chunk_size=chunk_size or _chunk_size())
+
+
+def csv_response(filename: str, encabezados, filas) -> StreamingHttpResponse:
+    writer = csv.writer(_Echo())
+
+    def _stream():
+        # BOM para que Excel detecte UTF-8 (acentos)
+        yield "\ufeff"
+        yield writer.writerow(encabezados)
+        for fila in filas:
+            yield writer.writerow(fila)
+
+    response = StreamingHttpResponse(_stream(), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_queryset(queryset, columnas, filename: str) -> StreamingHttpResponse:
+    """Exporta `queryset` con `columnas` [(encabezado, atributo|función), ...]."""
+    encabezados = [titulo for titulo, _ in columnas]
+    return csv_response(filename, encabezados, iter_rows(iter_queryset(queryset), columnas))
@@ -1,6 +1,8 @@
 import base64
 import logging
+import threading
 import time
+from datetime import datetime, timezone as dt_timezone
 from email.message import EmailMessage
 from typing import Iterable, Optional
 
@@ -10,6 +12,10 @@ from django.conf import settings
 logger = logging.getLogger(__name__)
 
 _token_cache = {"access_token": None, "expires_at": 0.0}
+# Los envíos en paralelo comparten el token; solo un hilo lo renueva.
+_token_lock = threading.Lock()
+# Llave del token en core.OAuthToken (compartido entre procesos)
+TOKEN_PROVIDER = "google"
 
 
 class GoogleEmailError(Exception):
@@ -20,7 +26,51 @@ def _get_access_token() -> str:
     now = time.time()
     if _token_cache["access_token"] and _token_cache["expires_at"] - 30 > now:
         return _token_cache["access_token"]
+    with _token_lock:
+        if _token_cache["access_token"] and _token_cache["expires_at"] - 30 > time.time():
+            return _token_cache["access_token"]
+        compartido = _shared_token()
+        if compartido:
+            return compartido
+        return _refresh_access_token()
 
+
+def _shared_token() -> Optional[str]:
+    """Token vigente guardado por otro proceso, si existe."""
+    from core.models import OAuthToken
+
+    try:
+        token = OAuthToken.objects.filter(provider=TOKEN_PROVIDER).first()
+    except Exception as exc:  # pragma: no cover
+        logger.warning("No se pudo leer el token compartido: %s", exc)
+        return None
+    if token is None:
+        return None
+    expires_at = token.expires_at.timestamp()
+    if expires_at - 30 <= time.time():
+        return None
+    _token_cache["access_token"] = token.access_token
+    _token_cache["expires_at"] = expires_at
+    return token.access_token
+
+
+def _store_shared_token(access_token: str, expires_at: float) -> None:
+    from core.models import OAuthToken
+
+    try:
+        OAuthToken.objects.update_or_create(
+            provider=TOKEN_PROVIDER,
+            defaults={
+                "access_token": access_token,
+                "expires_at": datetime.fromtimestamp(expires_at, tz=dt_timezone.utc),
+            },
+        )
+    except Exception as exc:  # pragma: no cover
+        logger.warning("No se pudo guardar el token compartido: %s", exc)
+
+
+def _refresh_access_token() -> str:
+    now = time.time()
     client_id = settings.GOOGLE_OAUTH_CLIENT_ID
     client_secret = settings.GOOGLE_OAUTH_CLIENT_SECRET
     refresh_token = settings.GOOGLE_OAUTH_REFRESH_TOKEN
@@ -50,9 +100,22 @@ def _get_access_token() -> str:
 
     _token_cache["access_token"] = access_token
     _token_cache["expires_at"] = now + int(expires_in)
+    _store_shared_token(access_token, _token_cache["expires_at"])
     return access_token
 
 
+def _invalidate_token() -> None:
+    from core.models import OAuthToken
+
+    with _token_lock:
+        _token_cache["access_token"] = None
+        _token_cache["expires_at"] = 0.0
+        try:
+            OAuthToken.objects.filter(provider=TOKEN_PROVIDER).delete()
+        except Exception as exc:  # pragma: no cover
+            logger.warning("No se pudo invalidar el token compartido: %s", exc)
+
+
 def _normalize_addresses(addresses: Optional[Iterable[str] | str]) -> list[str]:
     if not addresses:
         return []
@@ -107,7 +170,13 @@ def send_google_mail(
         "Content-Type": "application/json",
     }
     payload = {"raw": raw}
-    resp = requests.post(url, json=payload, headers=headers, timeout=15)
+    try:
+        resp = requests.post(url, json=payload, headers=headers, timeout=15)
+    except Exception as exc:
+        raise GoogleEmailError(f"Error de red al enviar correo: {exc}") from exc
+    if resp.status_code == 401:
+        # Token revocado o vencido antes de tiempo: el siguiente envío pide uno nuevo.
+        _invalidate_token()
     if resp.status_code not in (200, 202):
         logger.error("Gmail send fallo: %s %s", resp.status_code, resp.text)
         raise GoogleEmailError(f"Gmail send fallo: {resp.status_code} {resp.text}")
@@ -0,0 +1,83 @@
+"""
+Límites de frecuencia para endpoints públicos (sin login).
+
+TokenBucket guarda (fichas, último_ajuste) por llave en el caché de Django.
+Sin CACHES configurado es el LocMemCache de cada proceso, así que el límite
+es por worker; con un caché compartido aplica a todos. Los rechazos se
+cuentan en el mismo caché y se consultan con `contadores()`.
+"""
+import hashlib
+import threading
+import time
+
+from django.core.cache import cache
+
+PREFIJO = "limites"
+_lock = threading.Lock()
+
+
+def client_ip(request) -> str:
+    # El proxy agrega la IP real al final de X-Forwarded-For; las primeras las puede mandar el cliente.
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+    if forwarded:
+        return forwarded.split(",")[-1].strip()
+    return request.META.get("REMOTE_ADDR") or ""
+
+
+class TokenBucket:
+    """`capacidad` solicitudes seguidas y después `por_minuto` en promedio."""
+
+    def __init__(self, nombre: str, capacidad: int, por_minuto: float):
+        self.nombre = nombre
+        self.capacidad = max(int(capacidad), 1)
+        self.por_segundo = max(float(por_minuto), 0.001) / 60
+
+    def _llave(self, llave) -> str:
+        return f"{PREFIJO}:bucket:{self.nombre}:{llave}"
+
+    def permitir(self, llave="*") -> bool:
+        clave = self._llave(llave)
+        ahora = time.time()
+        with _lock:
+            fichas, ultimo = cache.get(clave) or (self.capacidad, ahora)
+            fichas = min(self.capacidad, fichas + (ahora - ultimo) * self.por_segundo)
+            permitido = fichas >= 1
+            if permitido:
+                fichas -= 1
+            # Al vencer la llave el bucket estaría lleno de nuevo.
+            cache.set(clave, (fichas, ahora), timeout=int(self.capacidad / self.por_segundo) + 60)
+        return permitido
+
+    def espera(self) -> int:
+        """Segundos sugeridos para Retry-After."""
+        return max(int(1 / self.por_segundo), 1)
+
+
+def huella(*valores) -> str:
+    contenido = "\x1f".join((str(v) if v is not None else "").strip().lower() for v in valores)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def es_duplicado(nombre: str, huella_contenido: str, segundos: int) -> bool:
+    """True si la misma huella ya se registró en los últimos `segundos`; si no, la registra."""
+    return not cache.add(f"{PREFIJO}:dup:{nombre}:{huella_contenido}", 1, timeout=segundos)
+
+
+def olvidar(nombre: str, huella_contenido: str) -> None:
+    cache.delete(f"{PREFIJO}:dup:{nombre}:{huella_contenido}")
+
+
+def registrar_rechazo(nombre: str, motivo: str) -> None:
+    clave = f"{PREFIJO}:rechazos:{nombre}:{motivo}"
+    with _lock:
+        cache.add(clave, 0, timeout=None)
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.set(clave, 1, timeout=None)
+
+
+def contadores(nombre: str, motivos) -> dict:
+    claves = {f"{PREFIJO}:rechazos:{nombre}:{m}": m for m in motivos}
+    encontrados = cache.get_many(list(claves))
+    return {motivo: encontrados.get(clave, 0) for clave, motivo in claves.items()}
@@ -0,0 +1,127 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.calendario import CalendarioHabil, feriados_oficiales
+
+
+def _add_business_days(start: date | None, days: int | None, feriados=frozenset()) -> date | None:
+    """Recorrido día por día que usaba actividades_merca antes de core.calendario."""
+    if start is None or days is None:
+        return None
+    current = start
+    remaining = int(days)
+    while remaining > 0:
+        current += timedelta(days=1)
+        if current.weekday() < 5 and current not in feriados:
+            remaining -= 1
+    return current
+
+
+def _business_days_between(start: date | None, end: date | None, feriados=frozenset()) -> int | None:
+    """Recorrido día por día que usaba actividades_merca antes de core.calendario."""
+    if start is None or end is None:
+        return None
+    if start == end:
+        return 0
+    step = 1 if end > start else -1
+    current = start
+    count = 0
+    while current != end:
+        current += timedelta(days=step)
+        if current.weekday() < 5 and current not in feriados:
+            count += 1
+    return count if step == 1 else -count
+
+
+def _mejor(funcion, repeticiones: int) -> float:
+    """Mejor tiempo en ms de `repeticiones` corridas."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos) * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara CalendarioHabil (sumar_habiles_lote / habiles_entre_lote) contra los recorridos "
+        "día por día, con y sin feriados: revisa que den lo mismo y mide el tiempo de cada uno."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fechas", type=int, default=1000, help="Fechas por lote medido.")
+        parser.add_argument("--repeticiones", type=int, default=5, help="Corridas por medición (se toma la mejor).")
+        parser.add_argument("--casos", type=int, default=20000, help="Casos aleatorios para comparar resultados.")
+        parser.add_argument("--semilla", type=int, default=0)
+
+    def handle(self, *args, **options):
+        n = options["fechas"]
+        repeticiones = options["repeticiones"]
+        if n < 1 or repeticiones < 1 or options["casos"] < 0:
+            raise CommandError("--fechas y --repeticiones deben ser mayores a cero y --casos no negativo.")
+        rnd = random.Random(options["semilla"])
+
+        # Feriados oficiales de un rango que cubre todas las fechas generadas.
+        feriados = frozenset(f for anio in range(2019, 2032) for f, _ in feriados_oficiales(anio))
+        escenarios = (
+            ("sin feriados", CalendarioHabil(), frozenset()),
+            ("con feriados", CalendarioHabil(feriados), feriados),
+        )
+        base = date(2020, 1, 1)
+
+        def fecha():
+            return base + timedelta(days=rnd.randrange(365 * 10))
+
+        errores = 0
+        for nombre, cal, dias_feriados in escenarios:
+            for _ in range(options["casos"]):
+                inicio, dias = fecha(), rnd.randrange(0, 300)
+                fin = inicio + timedelta(days=rnd.randrange(-400, 401))
+                if cal.sumar_habiles(inicio, dias) != _add_business_days(inicio, dias, dias_feriados):
+                    errores += 1
+                    self.stderr.write(f"sumar_habiles {nombre}: {inicio} + {dias}")
+                if cal.habiles_entre(inicio, fin) != _business_days_between(inicio, fin, dias_feriados):
+                    errores += 1
+                    self.stderr.write(f"habiles_entre {nombre}: {inicio} -> {fin}")
+        if errores:
+            raise CommandError(f"{errores} resultados distintos a los recorridos día por día.")
+        self.stdout.write(f"Resultados idénticos en {options['casos']} casos de suma y {options['casos']} de conteo por escenario.")
+
+        inicios = [fecha() for _ in range(n)]
+        dias = [rnd.randrange(0, 31) for _ in range(n)]
+        hoy = date(2025, 6, 15)
+        fines = [hoy + timedelta(days=rnd.randrange(-60, 61)) for _ in range(n)]
+
+        self.stdout.write(f"\n{n} fechas, mejor de {repeticiones} (ms):")
+        for nombre, cal, dias_feriados in escenarios:
+            mediciones = (
+                (
+                    "sumar, 0-30 días",
+                    lambda: [_add_business_days(i, d, dias_feriados) for i, d in zip(inicios, dias)],
+                    lambda: cal.sumar_habiles_lote(inicios, dias),
+                ),
+                (
+                    "entre, +-60 días",
+                    lambda: [_business_days_between(hoy, f, dias_feriados) for f in fines],
+                    lambda: cal.habiles_entre_lote(hoy, fines),
+                ),
+                (
+                    "sumar 250 días",
+                    lambda: [_add_business_days(i, 250, dias_feriados) for i in inicios],
+                    lambda: cal.sumar_habiles_lote(inicios, 250),
+                ),
+            )
+            for etiqueta, recorrido, lote in mediciones:
+                if recorrido() != lote():
+                    raise CommandError(f"{etiqueta} ({nombre}): el lote no coincide con el recorrido.")
+                t_recorrido = _mejor(recorrido, repeticiones)
+                t_lote = _mejor(lote, repeticiones)
+                self.stdout.write(
+                    f"  {etiqueta:<18} {nombre:<13} recorrido {t_recorrido:9.2f}  "
+                    f"lote {t_lote:7.2f}  x{t_recorrido / t_lote if t_lote else 0:.0f}"
+                )
+        self.stdout.write(self.style.SUCCESS("Benchmark terminado."))
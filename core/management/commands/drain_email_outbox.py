@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía los correos pendientes de la cola (core.EmailOutbox) en lotes. "
+        "Los fallidos se reintentan con espera exponencial en ejecuciones posteriores."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Mensajes por lote (EMAIL_OUTBOX_BATCH_SIZE).")
+        parser.add_argument("--limit", type=int, help="Máximo de mensajes a procesar en esta ejecución.")
+        parser.add_argument("--status", action="store_true", help="Solo muestra el conteo por estatus.")
+
+    def handle(self, *args, **options):
+        if not options.get("status"):
+            resumen = outbox.drain(batch_size=options.get("batch_size"), limit=options.get("limit"))
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Enviados: {resumen[outbox.Status.SENT]}  "
+                    f"Reintento pendiente: {resumen[outbox.Status.PENDING]}  "
+                    f"Fallidos: {resumen[outbox.Status.FAILED]}"
+                )
+            )
+        conteo = outbox.status_counts()
+        etiquetas = dict(outbox.Status.choices)
+        self.stdout.write(", ".join(f"{etiquetas[estatus]}: {n}" for estatus, n in conteo.items()))
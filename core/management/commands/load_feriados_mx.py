@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import calendario
+from core.models import DiaFeriado
+
+
+class Command(BaseCommand):
+    help = (
+        "Da de alta los días de descanso obligatorio (LFT art. 74) de los años indicados. "
+        "Los feriados ya capturados no se modifican; los locales se agregan en el admin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", type=int, help="Primer año (por defecto el actual).")
+        parser.add_argument("--hasta", type=int, help="Último año (por defecto el siguiente al primero).")
+
+    def handle(self, *args, **options):
+        desde = options.get("desde") or timezone.localdate().year
+        hasta = options.get("hasta") or desde + 1
+        if hasta < desde:
+            raise CommandError("--hasta debe ser mayor o igual a --desde.")
+
+        creados = 0
+        for anio in range(desde, hasta + 1):
+            for fecha, nombre in calendario.feriados_oficiales(anio):
+                _, creado = DiaFeriado.objects.get_or_create(fecha=fecha, defaults={"nombre": nombre})
+                creados += creado
+        self.stdout.write(self.style.SUCCESS(f"Feriados agregados de {desde} a {hasta}: {creados}"))
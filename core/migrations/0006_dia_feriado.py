@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:41
+
+import core.tracking
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_email_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiaFeriado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('nombre', models.CharField(blank=True, default='', max_length=100)),
+            ],
+            options={
+                'verbose_name': 'Día feriado',
+                'verbose_name_plural': 'Días feriados',
+                'ordering': ['fecha'],
+            },
+            bases=(core.tracking.CambiosRastreadosMixin, models.Model),
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .tracking import CambiosRastreadosMixin
 
 
 User = get_user_model()
@@ -28,3 +31,71 @@ class UserSessionActivity(models.Model):
             full_name = ""
         display = full_name if full_name else getattr(self.user, "username", str(self.user))
         return f"{display} - {self.last_seen}"
+
+
+class EmailOutbox(models.Model):
+    """Correo en cola; lo envía `drain_email_outbox` (ver core.outbox)."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pendiente"
+        SENDING = "sending", "Enviando"
+        SENT = "sent", "Enviado"
+        FAILED = "failed", "Fallido"
+
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list, blank=True)
+    bcc = models.JSONField(default=list, blank=True)
+    subject = models.CharField(max_length=255)
+    html_body = models.TextField(blank=True, default="")
+    text_body = models.TextField(blank=True, default="")
+    tag = models.CharField(max_length=100, blank=True, default="")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Correo en cola"
+        verbose_name_plural = "Correos en cola"
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="core_outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.get_status_display()})"
+
+
+class OAuthToken(models.Model):
+    """Access token compartido entre procesos (p. ej. workers de gunicorn)."""
+
+    provider = models.CharField(max_length=50, unique=True)
+    access_token = models.TextField()
+    expires_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Token OAuth"
+        verbose_name_plural = "Tokens OAuth"
+
+    def __str__(self):
+        return f"{self.provider} (expira {self.expires_at})"
+
+
+class DiaFeriado(CambiosRastreadosMixin, models.Model):
+    """Día no laborable para el cálculo de días hábiles (ver core.calendario)."""
+
+    CAMPOS_RASTREADOS = ("fecha",)
+
+    fecha = models.DateField(unique=True)
+    nombre = models.CharField(max_length=100, blank=True, default="")
+
+    class Meta:
+        ordering = ["fecha"]
+        verbose_name = "Día feriado"
+        verbose_name_plural = "Días feriados"
+
+    def __str__(self):
+        return f"{self.fecha:%d/%m/%Y} {self.nombre}".strip()
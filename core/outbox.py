@@ -0,0 +1,156 @@
+"""
+Cola persistente de correos (core.EmailOutbox).
+
+`enqueue` guarda el mensaje y regresa de inmediato; el envío lo hace
+`drain` (comando drain_email_outbox, pensado para cron) y, si
+EMAIL_OUTBOX_SEND_ON_COMMIT está activo, un hilo que arranca al confirmar
+la transacción. Los fallos se reintentan con espera exponencial hasta
+EMAIL_OUTBOX_MAX_ATTEMPTS; el token de Gmail se comparte entre procesos
+vía core.OAuthToken.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from core.google_email import _normalize_addresses, send_google_mail
+from core.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+Status = EmailOutbox.Status
+
+
+def _setting(name: str, default):
+    return type(default)(getattr(settings, name, default))
+
+
+def enqueue(
+    to,
+    subject: str,
+    html_body: str | None = None,
+    text_body: str | None = None,
+    cc=None,
+    bcc=None,
+    tag: str = "",
+) -> EmailOutbox:
+    """Encola un correo; el envío ocurre fuera de la petición."""
+    mensaje = EmailOutbox.objects.create(
+        to=_normalize_addresses(to),
+        cc=_normalize_addresses(cc),
+        bcc=_normalize_addresses(bcc),
+        subject=subject,
+        html_body=html_body or "",
+        text_body=text_body or "",
+        tag=tag,
+    )
+    if _setting("EMAIL_OUTBOX_SEND_ON_COMMIT", True):
+        transaction.on_commit(lambda: _drain_in_thread([mensaje.pk]))
+    return mensaje
+
+
+def _drain_in_thread(ids) -> None:
+    def _run():
+        try:
+            drain(ids=ids)
+        except Exception:
+            logger.exception("Fallo el envío inmediato de la cola de correos")
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=_run, name="email-outbox", daemon=True).start()
+
+
+def backoff(attempts: int) -> timedelta:
+    """Espera antes del siguiente intento: base * 2^(intentos-1), con tope."""
+    base = _setting("EMAIL_OUTBOX_BACKOFF_SECONDS", 60)
+    tope = _setting("EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(tope, base * 2 ** max(0, attempts - 1)))
+
+
+def _due(now):
+    # "sending" con candado viejo = proceso que murió a medio envío.
+    stale = now - timedelta(seconds=_setting("EMAIL_OUTBOX_LOCK_SECONDS", 300))
+    return EmailOutbox.objects.filter(
+        Q(status=Status.PENDING, next_attempt_at__lte=now) | Q(status=Status.SENDING, locked_at__lt=stale)
+    )
+
+
+def _claim(candidatos, now) -> list[EmailOutbox]:
+    """Toma los mensajes con un UPDATE condicional, así dos drains no envían el mismo."""
+    tomados = []
+    for mensaje in candidatos:
+        actualizados = EmailOutbox.objects.filter(
+            pk=mensaje.pk, status=mensaje.status, locked_at=mensaje.locked_at
+        ).update(status=Status.SENDING, locked_at=now)
+        if actualizados:
+            mensaje.status = Status.SENDING
+            mensaje.locked_at = now
+            tomados.append(mensaje)
+    return tomados
+
+
+def _send(mensaje: EmailOutbox) -> None:
+    now = timezone.now()
+    mensaje.attempts += 1
+    try:
+        send_google_mail(
+            to=mensaje.to,
+            subject=mensaje.subject,
+            html_body=mensaje.html_body or None,
+            text_body=mensaje.text_body or None,
+            cc=mensaje.cc,
+            bcc=mensaje.bcc,
+        )
+    except Exception as exc:
+        mensaje.last_error = str(exc)[:2000]
+        if mensaje.attempts >= _setting("EMAIL_OUTBOX_MAX_ATTEMPTS", 5):
+            mensaje.status = Status.FAILED
+            logger.error("Correo %s descartado tras %s intentos: %s", mensaje.pk, mensaje.attempts, exc)
+        else:
+            mensaje.status = Status.PENDING
+            mensaje.next_attempt_at = now + backoff(mensaje.attempts)
+    else:
+        mensaje.status = Status.SENT
+        mensaje.sent_at = now
+        mensaje.last_error = ""
+    mensaje.locked_at = None
+    mensaje.save(update_fields=["attempts", "status", "last_error", "next_attempt_at", "sent_at", "locked_at"])
+
+
+def drain(batch_size: int | None = None, limit: int | None = None, ids=None) -> dict:
+    """
+    Envía los mensajes vencidos en lotes de `batch_size` (hasta `limit` en total).
+    Regresa el conteo por estatus final de los mensajes procesados.
+    """
+    batch_size = batch_size or _setting("EMAIL_OUTBOX_BATCH_SIZE", 50)
+    resumen = {Status.SENT: 0, Status.PENDING: 0, Status.FAILED: 0}
+    procesados = 0
+    # Solo lo vencido al arrancar: un reintento reprogramado espera a la siguiente ejecución.
+    inicio = timezone.now()
+    while limit is None or procesados < limit:
+        now = timezone.now()
+        candidatos = _due(inicio).order_by("next_attempt_at", "id")
+        if ids is not None:
+            candidatos = candidatos.filter(pk__in=ids)
+        tamano = batch_size if limit is None else min(batch_size, limit - procesados)
+        lote = _claim(list(candidatos[:tamano]), now)
+        if not lote:
+            break
+        for mensaje in lote:
+            _send(mensaje)
+            resumen[mensaje.status] += 1
+        procesados += len(lote)
+    return resumen
+
+
+def status_counts() -> dict:
+    """Conteo de mensajes por estatus (para monitoreo)."""
+    conteo = dict.fromkeys(Status.values, 0)
+    for fila in EmailOutbox.objects.order_by().values("status").annotate(n=Count("id")):
+        conteo[fila["status"]] = fila["n"]
+    return conteo
@@ -0,0 +1,178 @@
+"""
+Utilidades compartidas para los reportes PDF (reportlab).
+
+El membrete (static/img/MEMBRETE.pdf) se importa una sola vez como form
+XObject dentro del documento de reportlab y se dibuja desde el callback
+onPage, de modo que el PDF se genera en una sola pasada.
+"""
+import threading
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from PyPDF2 import PdfReader
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.pdfbase.pdfdoc import PDFArray, PDFDictionary, PDFName, PDFObject, PDFStream
+
+MEMBRETE_FORM_NAME = "membrete"
+
+# PyPDF2 resuelve objetos indirectos de forma perezosa sobre el mismo stream.
+_membrete_lock = threading.Lock()
+
+
+class _RawPDFObject(PDFObject):
+    """Objeto hoja (número, nombre, cadena...) copiado tal cual del PDF origen."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def format(self, document):
+        return self.data
+
+
+def _membrete_path():
+    return settings.BASE_DIR / "static" / "img" / "MEMBRETE.pdf"
+
+
+@lru_cache(maxsize=1)
+def _membrete_page():
+    path = _membrete_path()
+    if not path.exists():
+        return None
+    try:
+        return PdfReader(str(path)).pages[0]
+    except Exception:
+        return None
+
+
+def membrete_pagesize(default=None):
+    """Tamaño de página del membrete; si no existe, `default` (carta horizontal)."""
+    page = _membrete_page()
+    if page is None:
+        return default or landscape(letter)
+    return (float(page.mediabox.width), float(page.mediabox.height))
+
+
+def _to_reportlab(obj, rldoc, memo):
+    """Convierte un objeto de PyPDF2 a su equivalente en el documento de reportlab."""
+    if isinstance(obj, IndirectObject):
+        key = (obj.idnum, obj.generation)
+        if key in memo:
+            return memo[key]
+        target = obj.get_object()
+        if isinstance(target, StreamObject):
+            rlobj = PDFStream(PDFDictionary(), content=b"")
+        elif isinstance(target, DictionaryObject):
+            rlobj = PDFDictionary()
+        else:
+            return _to_reportlab(target, rldoc, memo)
+        # Registrar antes de recorrer para soportar referencias circulares.
+        memo[key] = rldoc.Reference(rlobj)
+        _fill(target, rlobj, rldoc, memo)
+        return memo[key]
+    if isinstance(obj, StreamObject):
+        rlobj = PDFStream(PDFDictionary(), content=b"")
+        _fill(obj, rlobj, rldoc, memo)
+        return rlobj
+    if isinstance(obj, DictionaryObject):
+        rlobj = PDFDictionary()
+        _fill(obj, rlobj, rldoc, memo)
+        return rlobj
+    if isinstance(obj, ArrayObject):
+        return PDFArray([_to_reportlab(item, rldoc, memo) for item in obj])
+
+    buffer = BytesIO()
+    obj.write_to_stream(buffer, None)
+    return _RawPDFObject(buffer.getvalue())
+
+
+def _fill(source, rlobj, rldoc, memo):
+    if isinstance(rlobj, PDFStream):
+        # Se conserva el contenido codificado junto con su /Filter original.
+        rlobj.content = source._data
+        target = rlobj.dictionary
+    else:
+        target = rlobj
+    for key, value in source.items():
+        if key == "/Length":
+            continue
+        target[key[1:]] = _to_reportlab(value, rldoc, memo)
+
+
+def _registrar_membrete(rldoc, name):
+    page = _membrete_page()
+    if page is None:
+        return False
+    with _membrete_lock:
+        resources = page.get("/Resources")
+        contents = page.get_contents()
+        form = PDFStream(
+            PDFDictionary(
+                {
+                    "Type": PDFName("XObject"),
+                    "Subtype": PDFName("Form"),
+                    "FormType": 1,
+                    "BBox": PDFArray([float(v) for v in page.mediabox]),
+                    "Resources": _to_reportlab(resources, rldoc, {}) if resources is not None else PDFDictionary(),
+                }
+            ),
+            content=contents.get_data() if contents is not None else b"",
+        )
+    rldoc.Reference(form, rldoc.getXObjectName(name))
+    return True
+
+
+def draw_membrete(canvas, doc):
+    """Callback onPage: dibuja el membrete debajo del contenido de cada página."""
+    if not canvas.hasForm(MEMBRETE_FORM_NAME):
+        if not _registrar_membrete(canvas._doc, MEMBRETE_FORM_NAME):
+            return
+    canvas.saveState()
+    canvas.doForm(MEMBRETE_FORM_NAME)
+    canvas.restoreState()
+
+
+def build_con_membrete(doc, elements):
+    """Construye el documento dibujando el membrete en todas las páginas."""
+    doc.build(elements, onFirstPage=draw_membrete, onLaterPages=draw_membrete)
+
+
+class LazyFlowables(list):
+    """
+    Lista de flowables que se rellena bajo demanda desde un iterador de bloques.
+
+    `doc.build` consume los flowables desde el inicio de la lista, así que solo
+    el bloque en curso vive en memoria (útil para tablas muy largas).
+    """
+
+    def __init__(self, initial, bloques):
+        super().__init__(initial)
+        self._bloques = iter(bloques)
+
+    def _fill(self):
+        while not list.__len__(self):
+            try:
+                self.extend(next(self._bloques))
+            except StopIteration:
+                return
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+def chunked(iterable, size):
+    """Agrupa `iterable` en listas de a lo más `size` elementos."""
+    bloque = []
+    for item in iterable:
+        bloque.append(item)
+        if len(bloque) >= size:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
@@ -0,0 +1,29 @@
+"""
+Filtros por mes como rangos de fecha semiabiertos [inicio, siguiente mes).
+
+`fecha__month`/`fecha__year` se traducen a EXTRACT() y no usan el índice
+de la columna; un rango sí.
+"""
+from datetime import date
+
+from django.db.models import Q
+
+# El rango de un mes necesita el 1 de enero del año siguiente.
+ANIO_MIN = date.min.year
+ANIO_MAX = date.max.year - 1
+
+
+def anio_valido(anio: int) -> bool:
+    return ANIO_MIN <= anio <= ANIO_MAX
+
+
+def rango_mes(mes: int, anio: int) -> tuple[date, date]:
+    """Primer día del mes y primer día del mes siguiente (exclusivo)."""
+    inicio = date(anio, mes, 1)
+    fin = date(anio + 1, 1, 1) if mes == 12 else date(anio, mes + 1, 1)
+    return inicio, fin
+
+
+def filtro_mes(campo: str, mes: int, anio: int) -> Q:
+    inicio, fin = rango_mes(mes, anio)
+    return Q(**{f"{campo}__gte": inicio, f"{campo}__lt": fin})
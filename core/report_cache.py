@@ -0,0 +1,116 @@
+"""
+Caché en disco de reportes PDF generados.
+
+La llave se arma con el tipo de reporte, los filtros normalizados y una
+marca de versión de los datos (conteo + última modificación de las tablas
+involucradas). Cualquier escritura cambia la marca, así que las entradas
+viejas simplemente dejan de coincidir y terminan desalojadas por LRU
+(según tamaño total en disco).
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_dir() -> Path:
+    path = Path(getattr(settings, "REPORT_CACHE_DIR", "") or Path(tempfile.gettempdir()) / "reportes_pdf")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _max_bytes() -> int:
+    return int(getattr(settings, "REPORT_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
+
+def data_version(*models, field: str = "actualizado") -> list:
+    """Marca de versión por modelo: [conteo, última modificación]."""
+    stamp = []
+    for model in models:
+        agg = model.objects.aggregate(n=Count("pk"), ts=Max(field))
+        stamp.append([agg["n"], agg["ts"].isoformat() if agg["ts"] else ""])
+    return stamp
+
+
+def cache_key(tipo: str, filtros: dict, version) -> str:
+    normalized = {k: ("" if v is None else str(v).strip()) for k, v in (filtros or {}).items()}
+    payload = json.dumps({"tipo": tipo, "filtros": normalized, "version": version}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _path_for(key: str) -> Path:
+    return _cache_dir() / f"{key}.pdf"
+
+
+def get(key: str) -> bytes | None:
+    path = _path_for(key)
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    except OSError as exc:
+        logger.warning("No se pudo leer reporte en cache %s: %s", path, exc)
+        return None
+    try:
+        # Marca el acceso para el desalojo LRU
+        os.utime(path, None)
+    except OSError:
+        pass
+    return data
+
+
+def put(key: str, data: bytes) -> None:
+    directory = _cache_dir()
+    try:
+        fd, tmp_name = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_name, _path_for(key))
+    except OSError as exc:
+        logger.warning("No se pudo guardar reporte en cache: %s", exc)
+        return
+    _evict(directory)
+
+
+def _evict(directory: Path) -> None:
+    entries = []
+    total = 0
+    for path in directory.glob("*.pdf"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+    limit = _max_bytes()
+    if total <= limit:
+        return
+    entries.sort(key=lambda e: e[0])
+    for _, size, path in entries:
+        if total <= limit:
+            break
+        try:
+            path.unlink()
+            total -= size
+        except FileNotFoundError:
+            total -= size
+        except OSError:
+            continue
+
+
+def get_or_build(tipo: str, filtros: dict, version, builder) -> bytes:
+    """Regresa el PDF en cache o lo genera con `builder()` y lo guarda."""
+    key = cache_key(tipo, filtros, version)
+    data = get(key)
+    if data is not None:
+        return data
+    data = builder()
+    put(key, data)
+    return data
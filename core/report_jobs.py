@@ -0,0 +1,135 @@
+"""
+Generación en segundo plano de reportes PDF grandes.
+
+Cada trabajo se guarda en REPORT_JOBS_DIR como dos archivos: `<id>.json`
+con el estatus y `<id>.pdf` con el resultado. Al vivir en disco, cualquier
+worker del mismo servidor puede responder el estatus y la descarga.
+"""
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse, Http404, JsonResponse
+
+logger = logging.getLogger(__name__)
+
+PENDIENTE = "pendiente"
+LISTO = "listo"
+ERROR = "error"
+
+_JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _jobs_dir() -> Path:
+    path = Path(getattr(settings, "REPORT_JOBS_DIR", "") or Path(tempfile.gettempdir()) / "reportes_jobs")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _status_path(job_id: str) -> Path:
+    return _jobs_dir() / f"{job_id}.json"
+
+
+def _pdf_path(job_id: str) -> Path:
+    return _jobs_dir() / f"{job_id}.pdf"
+
+
+def _write_status(job_id: str, data: dict) -> None:
+    fd, tmp_name = tempfile.mkstemp(dir=_jobs_dir(), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        json.dump(data, fh)
+    os.replace(tmp_name, _status_path(job_id))
+
+
+def _purge_expired() -> None:
+    ttl = int(getattr(settings, "REPORT_JOBS_TTL", 24 * 3600))
+    limite = time.time() - ttl
+    for path in _jobs_dir().iterdir():
+        try:
+            if path.stat().st_mtime < limite:
+                path.unlink()
+        except OSError:
+            continue
+
+
+def should_run_async(total_rows: int) -> bool:
+    return total_rows > int(getattr(settings, "REPORT_SYNC_MAX_ROWS", 1000))
+
+
+def start(tipo: str, filename: str, user, builder) -> str:
+    """
+    Lanza `builder(ruta_destino)` en un hilo y regresa el id del trabajo.
+    El builder debe escribir el PDF completo en la ruta recibida.
+    """
+    _purge_expired()
+    job_id = uuid.uuid4().hex
+    status = {
+        "tipo": tipo,
+        "filename": filename,
+        "user_id": getattr(user, "pk", None),
+        "estatus": PENDIENTE,
+        "creado": time.time(),
+    }
+    _write_status(job_id, status)
+
+    def _run():
+        destino = _pdf_path(job_id)
+        tmp_destino = destino.with_suffix(".pdf.part")
+        try:
+            builder(str(tmp_destino))
+            os.replace(tmp_destino, destino)
+            status["estatus"] = LISTO
+        except Exception as exc:
+            logger.exception("Fallo la generación del reporte %s (%s)", tipo, job_id)
+            status["estatus"] = ERROR
+            status["mensaje"] = str(exc)
+            try:
+                tmp_destino.unlink()
+            except OSError:
+                pass
+        finally:
+            connections.close_all()
+        _write_status(job_id, status)
+
+    threading.Thread(target=_run, name=f"reporte-{tipo}-{job_id[:8]}", daemon=True).start()
+    return job_id
+
+
+def get_status(job_id: str, tipo: str, user) -> dict | None:
+    if not _JOB_ID_RE.match(job_id or ""):
+        return None
+    try:
+        data = json.loads(_status_path(job_id).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if data.get("tipo") != tipo or data.get("user_id") != getattr(user, "pk", None):
+        return None
+    timeout = int(getattr(settings, "REPORT_JOBS_TIMEOUT", 30 * 60))
+    if data.get("estatus") == PENDIENTE and time.time() - data.get("creado", 0) > timeout:
+        data["estatus"] = ERROR
+        data["mensaje"] = "El reporte tardó demasiado en generarse."
+    return data
+
+
+def status_response(request, job_id: str, tipo: str) -> JsonResponse:
+    data = get_status(job_id, tipo, request.user)
+    if data is None:
+        raise Http404("Reporte no encontrado.")
+    return JsonResponse({"estatus": data["estatus"], "mensaje": data.get("mensaje", "")})
+
+
+def download_response(request, job_id: str, tipo: str) -> FileResponse:
+    data = get_status(job_id, tipo, request.user)
+    if data is None or data["estatus"] != LISTO:
+        raise Http404("Reporte no disponible.")
+    response = FileResponse(open(_pdf_path(job_id), "rb"), content_type="application/pdf")
+    response["Content-Disposition"] = f'inline; filename="{data["filename"]}"'
+    return response
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import calendario
+from .models import DiaFeriado
+
+
+@receiver(post_save, sender=DiaFeriado)
+@receiver(post_delete, sender=DiaFeriado)
+def invalidar_calendario(sender, **kwargs):
+    calendario.invalidar()
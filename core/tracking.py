@@ -0,0 +1,76 @@
+"""
+Rastreo de cambios en modelos.
+
+Los modelos con `CambiosRastreadosMixin` recuerdan los valores de
+CAMPOS_RASTREADOS tal como están en la base, de modo que las señales
+post_save pueden comparar contra el estado anterior sin volver a consultar.
+"""
+from django.db import DEFAULT_DB_ALIAS
+
+
+class CambiosRastreadosMixin:
+    # Nombres de atributo (attname): para FKs usar "cliente_id", no "cliente".
+    CAMPOS_RASTREADOS: tuple = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._valores_cargados = instance._valores_rastreados()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        recargados = self._valores_rastreados()
+        if fields is not None and self.valores_previos is not None:
+            campos = self._attnames(fields)
+            recargados = {**self.valores_previos, **{f: v for f, v in recargados.items() if f in campos}}
+        self._valores_cargados = recargados
+
+    def _valores_rastreados(self) -> dict:
+        # Solo campos ya cargados; un campo diferido no dispara consultas.
+        return {f: self.__dict__[f] for f in self.CAMPOS_RASTREADOS if f in self.__dict__}
+
+    def _attnames(self, nombres) -> set:
+        # update_fields acepta "cliente" o "cliente_id"; CAMPOS_RASTREADOS usa attname.
+        return {self._meta.get_field(n).attname for n in nombres}
+
+    def _completar_previos(self, using=None):
+        """Lee de la base los campos rastreados que no se cargaron (instancia armada a mano o diferidos)."""
+        if self.pk is None:
+            return
+        previos = self.valores_previos
+        faltantes = [f for f in self.CAMPOS_RASTREADOS if previos is None or f not in previos]
+        if not faltantes:
+            return
+        db = using or self._state.db or DEFAULT_DB_ALIAS
+        fila = type(self)._base_manager.using(db).filter(pk=self.pk).values(*faltantes).first()
+        if fila is None:
+            return  # alta con pk explícito
+        self._valores_cargados = {**(previos or {}), **fila}
+
+    @property
+    def valores_previos(self) -> dict | None:
+        """Valores rastreados tal como están en la base (None si el registro es nuevo)."""
+        return getattr(self, "_valores_cargados", None)
+
+    def campos_cambiados(self, campos) -> list[str]:
+        previos = self.valores_previos
+        if previos is None:
+            return list(campos)
+        cambiados = []
+        for f in campos:
+            if f not in self.__dict__:
+                continue  # diferido y sin tocar: no se escribe en save()
+            if f not in previos or previos[f] != self.__dict__[f]:
+                cambiados.append(f)
+        return cambiados
+
+    def save(self, *args, **kwargs):
+        self._completar_previos(kwargs.get("using"))
+        super().save(*args, **kwargs)
+        guardados = self._valores_rastreados()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and self.valores_previos is not None:
+            campos = self._attnames(update_fields)
+            guardados = {**self.valores_previos, **{f: v for f, v in guardados.items() if f in campos}}
+        self._valores_cargados = guardados
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from experiencia import sincronizacion
+
+
+class Command(BaseCommand):
+    help = (
+        "Concilia ExperienciaCliente con todos los clientes por bloques: crea los "
+        "registros que falten y, con --domicilio, copia el domicilio del cliente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--domicilio",
+            action="store_true",
+            help="Copia el domicilio no vacío del cliente donde sea distinto (sobrescribe lo editado en experiencia).",
+        )
+        parser.add_argument("--batch-size", type=int, default=None, help="Clientes por bloque.")
+
+    def handle(self, *args, **options):
+        conteos = sincronizacion.sincronizar(
+            copiar_domicilio=options["domicilio"],
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Clientes revisados: {conteos['revisados']}, "
+                f"experiencias creadas: {conteos['creados']}, domicilios actualizados: {conteos['actualizados']}"
+            )
+        )
@@ -0,0 +1,83 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def enlazar_clientes(apps, schema_editor):
+    Cliente = apps.get_model("clientes", "Cliente")
+    ExperienciaCliente = apps.get_model("experiencia", "ExperienciaCliente")
+    ids_clientes = Cliente.objects.values("id")
+
+    # Registros de clientes que ya no existen no pueden llevar la llave foránea.
+    ExperienciaCliente.objects.exclude(cliente_id__in=ids_clientes).delete()
+    ExperienciaCliente.objects.update(cliente_ref_id=models.F("cliente_id"))
+
+    faltantes = Cliente.objects.exclude(id__in=ExperienciaCliente.objects.values("cliente_id"))
+    ExperienciaCliente.objects.bulk_create(
+        [
+            ExperienciaCliente(cliente_id=c.id, cliente_ref_id=c.id, cliente=c.cliente, domicilio=c.domicilio)
+            for c in faltantes.only("id", "cliente", "domicilio")
+        ],
+        batch_size=1000,
+    )
+
+
+def desenlazar_clientes(apps, schema_editor):
+    Cliente = apps.get_model("clientes", "Cliente")
+    ExperienciaCliente = apps.get_model("experiencia", "ExperienciaCliente")
+    cliente = Cliente.objects.filter(id=OuterRef("cliente_ref_id"))
+    ExperienciaCliente.objects.update(
+        cliente_id=models.F("cliente_ref_id"),
+        cliente=Subquery(cliente.values("cliente")[:1]),
+        servicio=Subquery(cliente.values("servicio")[:1]),
+        giro=Subquery(cliente.values("giro")[:1]),
+        propuesta=Subquery(cliente.values("propuesta")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clientes", "0017_cliente_comision"),
+        ("experiencia", "0007_experienciacliente_propuesta"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="experienciacliente",
+            name="cliente_ref",
+            field=models.OneToOneField(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="experiencia",
+                to="clientes.cliente",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="experienciacliente",
+            name="cliente_id",
+            field=models.IntegerField(null=True, unique=True),
+        ),
+        # Nulos para que la reversa pueda volver a crear las columnas antes de llenarlas.
+        migrations.AlterField(
+            model_name="experienciacliente",
+            name="cliente",
+            field=models.CharField(max_length=150, null=True),
+        ),
+        migrations.RunPython(enlazar_clientes, desenlazar_clientes),
+        migrations.RemoveField(model_name="experienciacliente", name="cliente_id"),
+        migrations.RemoveField(model_name="experienciacliente", name="cliente"),
+        migrations.RemoveField(model_name="experienciacliente", name="servicio"),
+        migrations.RemoveField(model_name="experienciacliente", name="giro"),
+        migrations.RemoveField(model_name="experienciacliente", name="propuesta"),
+        migrations.AlterField(
+            model_name="experienciacliente",
+            name="cliente_ref",
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="experiencia",
+                to="clientes.cliente",
+            ),
+        ),
+        migrations.RenameField(model_name="experienciacliente", old_name="cliente_ref", new_name="cliente"),
+    ]
@@ -4,14 +4,9 @@ from core.choices import EXPERIENCIA_PERIODICIDAD_CHOICES, CHAT_WELCOME_CHOICES,
 
 
 class ExperienciaCliente(models.Model):
-    cliente_id = models.IntegerField(unique=True)
-    cliente = models.CharField(max_length=150)
-    servicio = models.CharField(max_length=100, blank=True, null=True)
-    giro = models.CharField(max_length=150, blank=True, null=True)
+    cliente = models.OneToOneField("clientes.Cliente", on_delete=models.CASCADE, related_name="experiencia")
 
-    propuesta = models.URLField("Propuesta", blank=True, null=True)
-
-    # Campos gestionados en experiencia
+    # Campos gestionados en experiencia (domicilio se copia de Cliente cuando allá cambia)
     nombre_comercial = models.CharField(max_length=200, blank=True, null=True)
     domicilio = models.CharField(max_length=255, blank=True, null=True)
     fecha_contrato = models.DateField(blank=True, null=True)
@@ -32,4 +27,17 @@ class ExperienciaCliente(models.Model):
         ordering = ["-fecha_registro"]
 
     def __str__(self):
-        return self.cliente
+        return str(self.cliente)
+
+    # Datos del cliente que se muestran en experiencia; usar select_related("cliente").
+    @property
+    def servicio(self):
+        return self.cliente.servicio
+
+    @property
+    def giro(self):
+        return self.cliente.giro
+
+    @property
+    def propuesta(self):
+        return self.cliente.propuesta
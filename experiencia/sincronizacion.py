@@ -0,0 +1,90 @@
+"""
+Sincronización de Cliente hacia ExperienciaCliente.
+
+Cada cliente tiene un ExperienciaCliente; lo único que se copia es el
+domicilio (cuando no viene vacío), el resto se lee por la relación.
+
+`sincronizar` concilia por bloques de ids con bulk_create/bulk_update (lo usa
+el comando sync_experiencia). Dentro de una transacción la señal de Cliente
+no escribe por cada fila: `programar` junta los ids y los aplica con
+`sincronizar` una sola vez en on_commit (EXPERIENCIA_SYNC_ON_COMMIT).
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from clientes.models import Cliente
+from .models import ExperienciaCliente
+
+
+def sincronizar(cliente_ids=None, copiar_domicilio=False, batch_size: int | None = None) -> dict:
+    """
+    Crea los ExperienciaCliente que falten y, con `copiar_domicilio`, copia el
+    domicilio no vacío del cliente donde sea distinto. `copiar_domicilio` puede
+    ser True (todos) o un conjunto de ids de cliente. Regresa los conteos.
+    """
+    batch_size = batch_size or getattr(settings, "EXPERIENCIA_SYNC_BATCH_SIZE", 500)
+    conteos = {"revisados": 0, "creados": 0, "actualizados": 0}
+    if cliente_ids is not None:
+        cliente_ids = sorted(set(cliente_ids))
+        bloques = (cliente_ids[i : i + batch_size] for i in range(0, len(cliente_ids), batch_size))
+    else:
+        bloques = _bloques_de_ids(batch_size)
+
+    for ids in bloques:
+        filas = Cliente.objects.filter(id__in=ids).values_list(
+            "id", "domicilio", "experiencia__id", "experiencia__domicilio"
+        )
+        nuevos, cambios = [], []
+        for cliente_id, domicilio, exp_id, exp_domicilio in filas:
+            conteos["revisados"] += 1
+            if exp_id is None:
+                nuevos.append(ExperienciaCliente(cliente_id=cliente_id, domicilio=domicilio))
+            elif domicilio and domicilio != exp_domicilio and (
+                copiar_domicilio is True or (copiar_domicilio and cliente_id in copiar_domicilio)
+            ):
+                cambios.append(ExperienciaCliente(id=exp_id, domicilio=domicilio))
+        if nuevos:
+            # ignore_conflicts: otro proceso pudo crear el registro entre la lectura y la escritura.
+            ExperienciaCliente.objects.bulk_create(nuevos, batch_size=batch_size, ignore_conflicts=True)
+        if cambios:
+            ExperienciaCliente.objects.bulk_update(cambios, ["domicilio"], batch_size=batch_size)
+        conteos["creados"] += len(nuevos)
+        conteos["actualizados"] += len(cambios)
+    return conteos
+
+
+def _bloques_de_ids(batch_size: int):
+    ultimo = 0
+    while True:
+        ids = list(Cliente.objects.filter(id__gt=ultimo).order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return
+        yield ids
+        ultimo = ids[-1]
+
+
+def diferido() -> bool:
+    """True si la señal debe juntar el trabajo para el commit (hay transacción abierta)."""
+    return getattr(settings, "EXPERIENCIA_SYNC_ON_COMMIT", True) and transaction.get_connection().in_atomic_block
+
+
+def programar(cliente_id: int, domicilio: bool = False) -> None:
+    """Agrega el cliente a la sincronización que corre al confirmar la transacción actual."""
+    conexion = transaction.get_connection(DEFAULT_DB_ALIAS)
+    pendientes = getattr(conexion, "_experiencia_pendientes", None)
+    # Django cambia la lista run_on_commit al confirmar o revertir; si no es la
+    # misma, lo pendiente es de otra transacción y hay que registrar de nuevo.
+    if pendientes is None or pendientes["lista"] is not conexion.run_on_commit:
+        pendientes = {"lista": conexion.run_on_commit, "ids": set(), "domicilio": set()}
+        conexion._experiencia_pendientes = pendientes
+        transaction.on_commit(lambda: _aplicar(pendientes))
+    pendientes["ids"].add(cliente_id)
+    if domicilio:
+        pendientes["domicilio"].add(cliente_id)
+
+
+def _aplicar(pendientes: dict) -> None:
+    conexion = transaction.get_connection(DEFAULT_DB_ALIAS)
+    if getattr(conexion, "_experiencia_pendientes", None) is pendientes:
+        conexion._experiencia_pendientes = None
+    sincronizar(pendientes["ids"], copiar_domicilio=pendientes["domicilio"])
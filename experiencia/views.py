@@ -9,7 +9,7 @@ from .forms import ExperienciaClienteForm
 
 
 def clientes_experiencia_lista(request):
-    clientes = ExperienciaCliente.objects.all().order_by("-fecha_registro")
+    clientes = ExperienciaCliente.objects.select_related("cliente").order_by("-fecha_registro")
 
     fecha_desde = request.GET.get("fecha_desde") or ""
     fecha_hasta = request.GET.get("fecha_hasta") or ""
@@ -28,7 +28,7 @@ def clientes_experiencia_lista(request):
         except ValueError:
             pass
     if nombre:
-        clientes = clientes.filter(cliente__icontains=nombre)
+        clientes = clientes.filter(cliente__cliente__icontains=nombre)
 
     return render(
         request,
@@ -38,7 +38,7 @@ def clientes_experiencia_lista(request):
 
 
 def editar_cliente_experiencia(request, pk):
-    cliente_exp = get_object_or_404(ExperienciaCliente, pk=pk)
+    cliente_exp = get_object_or_404(ExperienciaCliente.objects.select_related("cliente"), pk=pk)
     back_url = request.GET.get("next") or request.META.get("HTTP_REFERER") or "/experiencia/clientes/"
     contactos_url = None
     if cliente_exp.cliente_id:
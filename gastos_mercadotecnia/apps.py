@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GastosMercadotecniaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gastos_mercadotecnia'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from gastos_mercadotecnia import rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara GastoMensual contra el agregado de los gastos de mercadotecnia. "
+        "Termina con error si hay diferencias (útil en cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Reconstruye GastoMensual si encuentra diferencias.",
+        )
+
+    def handle(self, *args, **options):
+        diferencias = rollup.diferencias()
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS("GastoMensual consistente."))
+            return
+
+        for dif in diferencias[:50]:
+            self.stdout.write(f"{dif['llave']}: esperado={dif['esperado']} actual={dif['actual']}")
+        if len(diferencias) > 50:
+            self.stdout.write(f"... y {len(diferencias) - 50} más")
+
+        if options.get("fix"):
+            total = rollup.reconstruir()
+            self.stdout.write(self.style.WARNING(f"GastoMensual reconstruida: {total} filas"))
+            return
+        raise CommandError(f"GastoMensual con {len(diferencias)} diferencias.")
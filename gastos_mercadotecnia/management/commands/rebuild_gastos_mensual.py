@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from gastos_mercadotecnia import rollup
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla GastoMensual a partir de todos los gastos de mercadotecnia."
+
+    def handle(self, *args, **options):
+        total = rollup.reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"GastoMensual reconstruida: {total} filas"))
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:47
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def poblar_gastos_mensuales(apps, schema_editor):
+    GastoMercadotecnia = apps.get_model("gastos_mercadotecnia", "GastoMercadotecnia")
+    GastoMensual = apps.get_model("gastos_mercadotecnia", "GastoMensual")
+    filas = (
+        GastoMercadotecnia.objects.order_by()
+        .annotate(anio=ExtractYear("fecha_facturacion"), mes=ExtractMonth("fecha_facturacion"))
+        .values("anio", "mes", "marca", "plataforma", "categoria", "periodicidad")
+        .annotate(total=Sum("facturacion"), num_gastos=Count("id"))
+    )
+    # NULL y "" caen en la misma fila del acumulado.
+    acumulado = defaultdict(lambda: [Decimal("0"), 0])
+    for f in filas:
+        llave = (
+            f["anio"] or 0,
+            f["mes"] or 0,
+            f["marca"] or "",
+            f["plataforma"] or "",
+            f["categoria"] or "",
+            f["periodicidad"] or "",
+        )
+        acumulado[llave][0] += f["total"] or 0
+        acumulado[llave][1] += f["num_gastos"]
+    GastoMensual.objects.bulk_create(
+        [
+            GastoMensual(
+                anio=anio,
+                mes=mes,
+                marca=marca,
+                plataforma=plataforma,
+                categoria=categoria,
+                periodicidad=periodicidad,
+                total=total,
+                num_gastos=n,
+            )
+            for (anio, mes, marca, plataforma, categoria, periodicidad), (total, n) in acumulado.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gastos_mercadotecnia', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GastoMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.PositiveIntegerField()),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('marca', models.CharField(blank=True, default='', max_length=50)),
+                ('plataforma', models.CharField(blank=True, default='', max_length=50)),
+                ('categoria', models.CharField(blank=True, default='', max_length=50)),
+                ('periodicidad', models.CharField(blank=True, default='', max_length=30)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('num_gastos', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Gasto mensual',
+                'verbose_name_plural': 'Gastos mensuales',
+                'indexes': [models.Index(fields=['anio', 'mes'], name='gastos_gm_periodo_idx')],
+                'constraints': [models.UniqueConstraint(fields=('anio', 'mes', 'marca', 'plataforma', 'categoria', 'periodicidad'), name='gastos_gastomensual_llave')],
+            },
+        ),
+        migrations.RunPython(poblar_gastos_mensuales, migrations.RunPython.noop),
+    ]
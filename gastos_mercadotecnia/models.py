@@ -1,5 +1,6 @@
 from django.db import models
 
+from core.tracking import CambiosRastreadosMixin
 from core.choices import (
     GASTOS_MERCA_CATEGORIA_CHOICES,
     GASTOS_MERCA_PLATAFORMA_CHOICES,
@@ -10,7 +11,10 @@ from core.choices import (
 )
 
 
-class GastoMercadotecnia(models.Model):
+class GastoMercadotecnia(CambiosRastreadosMixin, models.Model):
+    # Campos que alimentan GastoMensual (ver gastos_mercadotecnia.rollup)
+    CAMPOS_RASTREADOS = ("fecha_facturacion", "marca", "plataforma", "categoria", "periodicidad", "facturacion")
+
     fecha_facturacion = models.DateField(blank=True, null=True)
     categoria = models.CharField(max_length=50, choices=GASTOS_MERCA_CATEGORIA_CHOICES, blank=True, null=True)
     plataforma = models.CharField(max_length=50, choices=GASTOS_MERCA_PLATAFORMA_CHOICES, blank=True, null=True)
@@ -33,3 +37,40 @@ class GastoMercadotecnia(models.Model):
 
     def __str__(self) -> str:
         return f"{self.marca or 'Gasto'} - {self.fecha_facturacion or ''}"
+
+
+class GastoMensual(models.Model):
+    """
+    Acumulado mensual de gastos por marca, plataforma, categoría y periodicidad.
+    Se mantiene con deltas desde las señales de GastoMercadotecnia;
+    rebuild_gastos_mensual lo reconstruye y check_gastos_mensual lo compara.
+    Los gastos sin fecha de facturación se acumulan en anio=0, mes=0.
+    """
+
+    SIN_FECHA = (0, 0)
+
+    anio = models.PositiveIntegerField()
+    mes = models.PositiveSmallIntegerField()
+    # "" en lugar de NULL para que la llave única aplique también a campos vacíos
+    marca = models.CharField(max_length=50, blank=True, default="")
+    plataforma = models.CharField(max_length=50, blank=True, default="")
+    categoria = models.CharField(max_length=50, blank=True, default="")
+    periodicidad = models.CharField(max_length=30, blank=True, default="")
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    num_gastos = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Gasto mensual"
+        verbose_name_plural = "Gastos mensuales"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["anio", "mes", "marca", "plataforma", "categoria", "periodicidad"],
+                name="gastos_gastomensual_llave",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["anio", "mes"], name="gastos_gm_periodo_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.anio}-{self.mes:02d} {self.marca} {self.plataforma}: {self.total}"
@@ -0,0 +1,210 @@
+"""
+Mantenimiento y consulta de GastoMensual.
+
+Cada escritura de GastoMercadotecnia resta su aportación anterior y suma la
+nueva (`aplicar_gasto`). `reconstruir` recalcula la tabla completa desde
+los gastos y `diferencias` la compara contra ese mismo agregado.
+
+`resumen` y `total` leen los meses completos del rango desde GastoMensual;
+solo los días sueltos de los meses en las orillas se leen de los gastos.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .models import GastoMensual, GastoMercadotecnia
+
+LLAVE = ("anio", "mes", "marca", "plataforma", "categoria", "periodicidad")
+DIMENSIONES = ("marca", "plataforma", "categoria", "periodicidad")
+CERO = Decimal("0")
+
+
+def _llave(valores: dict) -> dict:
+    fecha = valores["fecha_facturacion"]
+    anio, mes = (fecha.year, fecha.month) if fecha else GastoMensual.SIN_FECHA
+    return {"anio": anio, "mes": mes, **{campo: valores[campo] or "" for campo in DIMENSIONES}}
+
+
+def _monto(valores: dict) -> Decimal:
+    return Decimal(valores["facturacion"] or 0)
+
+
+def _aplicar_delta(llave: dict, total: Decimal, n: int) -> None:
+    actualizadas = GastoMensual.objects.filter(**llave).update(
+        total=F("total") + total,
+        num_gastos=F("num_gastos") + n,
+    )
+    if actualizadas:
+        if n < 0:
+            GastoMensual.objects.filter(**llave, num_gastos__lte=0).delete()
+        return
+    if n <= 0:
+        # La fila ya no existe (p. ej. se reconstruyó la tabla entre lectura y borrado).
+        return
+    try:
+        with transaction.atomic():
+            GastoMensual.objects.create(**llave, total=total, num_gastos=n)
+    except IntegrityError:
+        # Otra escritura creó la fila al mismo tiempo.
+        GastoMensual.objects.filter(**llave).update(
+            total=F("total") + total,
+            num_gastos=F("num_gastos") + n,
+        )
+
+
+def valores_actuales(gasto: GastoMercadotecnia) -> dict:
+    return {campo: getattr(gasto, campo) for campo in GastoMercadotecnia.CAMPOS_RASTREADOS}
+
+
+def aplicar_gasto(anteriores: dict | None, nuevos: dict | None) -> None:
+    """Resta la aportación `anteriores` y suma `nuevos` (cualquiera puede ser None)."""
+    if anteriores is not None and nuevos is not None:
+        if _llave(anteriores) == _llave(nuevos) and _monto(anteriores) == _monto(nuevos):
+            return
+    if anteriores is not None:
+        _aplicar_delta(_llave(anteriores), -_monto(anteriores), -1)
+    if nuevos is not None:
+        _aplicar_delta(_llave(nuevos), _monto(nuevos), 1)
+
+
+def agregado_desde_gastos():
+    """Mismo acumulado que GastoMensual, calculado directo sobre los gastos."""
+    return (
+        GastoMercadotecnia.objects.order_by()
+        .annotate(anio=ExtractYear("fecha_facturacion"), mes=ExtractMonth("fecha_facturacion"))
+        .values("anio", "mes", *DIMENSIONES)
+        .annotate(total=Sum("facturacion"), num_gastos=Count("id"))
+    )
+
+
+def _fila_llave(fila: dict) -> tuple:
+    # Sin fecha el agregado regresa NULL en anio/mes y NULL o "" en las dimensiones.
+    return (fila["anio"] or 0, fila["mes"] or 0, *(fila[campo] or "" for campo in DIMENSIONES))
+
+
+@transaction.atomic
+def reconstruir(batch_size: int = 1000) -> int:
+    GastoMensual.objects.all().delete()
+    acumulado = defaultdict(lambda: [CERO, 0])
+    for fila in agregado_desde_gastos().iterator():
+        llave = _fila_llave(fila)
+        acumulado[llave][0] += fila["total"] or CERO
+        acumulado[llave][1] += fila["num_gastos"]
+    filas = [
+        GastoMensual(**dict(zip(LLAVE, llave)), total=total, num_gastos=n)
+        for llave, (total, n) in acumulado.items()
+    ]
+    GastoMensual.objects.bulk_create(filas, batch_size=batch_size)
+    return len(filas)
+
+
+def diferencias() -> list[dict]:
+    """Filas donde GastoMensual no coincide con los gastos."""
+    esperado = defaultdict(lambda: (CERO, 0))
+    for fila in agregado_desde_gastos():
+        llave = _fila_llave(fila)
+        total, n = esperado[llave]
+        esperado[llave] = (total + (fila["total"] or CERO), n + fila["num_gastos"])
+    actual = {
+        _fila_llave(fila): (fila["total"], fila["num_gastos"])
+        for fila in GastoMensual.objects.values(*LLAVE, "total", "num_gastos")
+    }
+    resultado = []
+    for llave in sorted(set(esperado) | set(actual)):
+        if esperado.get(llave) != actual.get(llave):
+            resultado.append(
+                {
+                    "llave": dict(zip(LLAVE, llave)),
+                    "esperado": esperado.get(llave),
+                    "actual": actual.get(llave),
+                }
+            )
+    return resultado
+
+
+def _periodo(fecha: date) -> int:
+    return fecha.year * 100 + fecha.month
+
+
+def _particion(fecha_desde, fecha_hasta):
+    """
+    Divide el rango en meses completos (se leen de GastoMensual) y los días
+    sueltos de las orillas (se leen de los gastos). Regresa
+    (Q sobre GastoMensual o None, lista de rangos de fechas sueltas).
+    """
+    if not fecha_desde and not fecha_hasta:
+        return Q(), []
+    inicio = fecha_desde
+    if fecha_desde and fecha_desde.day != 1:
+        inicio = (fecha_desde.replace(day=28) + timedelta(days=4)).replace(day=1)
+    fin = fecha_hasta
+    if fecha_hasta and fecha_hasta.day != calendar.monthrange(fecha_hasta.year, fecha_hasta.month)[1]:
+        fin = fecha_hasta.replace(day=1) - timedelta(days=1)
+
+    if inicio and fin and inicio > fin:
+        return None, [(fecha_desde, fecha_hasta)]
+
+    # Los gastos sin fecha (0/0) nunca entran cuando hay filtro de fechas.
+    meses = Q(anio__gt=0)
+    if inicio:
+        meses &= Q(periodo__gte=_periodo(inicio))
+    if fin:
+        meses &= Q(periodo__lte=_periodo(fin))
+    sueltos = []
+    if fecha_desde and fecha_desde < inicio:
+        sueltos.append((fecha_desde, inicio - timedelta(days=1)))
+    if fecha_hasta and fin < fecha_hasta:
+        sueltos.append((fin + timedelta(days=1), fecha_hasta))
+    return meses, sueltos
+
+
+def resumen(fecha_desde=None, fecha_hasta=None, marca=None, campos=("marca",)) -> dict:
+    """
+    Total y número de gastos agrupados por `campos` (subconjunto de LLAVE).
+    Regresa {tupla de valores: (total, num_gastos)}; los vacíos se regresan como "".
+    """
+    campos = tuple(campos)
+    resultado = defaultdict(lambda: (CERO, 0))
+
+    def _acumular(filas):
+        for fila in filas:
+            llave = tuple(fila[c] or ("" if c in DIMENSIONES else 0) for c in campos)
+            total, n = resultado[llave]
+            resultado[llave] = (total + (fila["total"] or CERO), n + (fila["n"] or 0))
+
+    meses, sueltos = _particion(fecha_desde, fecha_hasta)
+    if meses is not None:
+        qs = GastoMensual.objects.order_by().annotate(periodo=F("anio") * 100 + F("mes")).filter(meses)
+        if marca:
+            qs = qs.filter(marca=marca)
+        _acumular(_agrupar(qs, campos, total=Sum("total"), n=Sum("num_gastos")))
+
+    if sueltos:
+        rango = Q()
+        for desde, hasta in sueltos:
+            rango |= Q(fecha_facturacion__range=(desde, hasta))
+        qs = (
+            GastoMercadotecnia.objects.order_by()
+            .filter(rango)
+            .annotate(anio=ExtractYear("fecha_facturacion"), mes=ExtractMonth("fecha_facturacion"))
+        )
+        if marca:
+            qs = qs.filter(marca=marca)
+        _acumular(_agrupar(qs, campos, total=Sum("facturacion"), n=Count("id")))
+    return dict(resultado)
+
+
+def _agrupar(qs, campos, **agregados):
+    if not campos:
+        return [qs.aggregate(**agregados)]
+    return qs.values(*campos).annotate(**agregados)
+
+
+def total(fecha_desde=None, fecha_hasta=None, marca=None) -> Decimal:
+    """Suma de facturación del rango leída del acumulado mensual."""
+    return resumen(fecha_desde, fecha_hasta, marca, campos=()).get((), (CERO, 0))[0]
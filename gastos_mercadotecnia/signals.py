@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import rollup
+from .models import GastoMercadotecnia
+
+
+@receiver(post_save, sender=GastoMercadotecnia)
+def actualizar_gasto_mensual(sender, instance: GastoMercadotecnia, created: bool, **kwargs):
+    anteriores = None if created else instance.valores_previos
+    rollup.aplicar_gasto(anteriores, rollup.valores_actuales(instance))
+
+
+@receiver(post_delete, sender=GastoMercadotecnia)
+def descontar_gasto_mensual(sender, instance: GastoMercadotecnia, **kwargs):
+    anteriores = instance.valores_previos
+    if anteriores is None or any(campo not in anteriores for campo in GastoMercadotecnia.CAMPOS_RASTREADOS):
+        anteriores = rollup.valores_actuales(instance)
+    rollup.aplicar_gasto(anteriores, None)
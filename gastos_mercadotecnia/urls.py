@@ -4,7 +4,11 @@ from . import views
 
 urlpatterns = [
     path("", views.gastos_lista, name="gastos_mercadotecnia_gasto_list"),
+    path("dashboard/", views.gastos_dashboard, name="gastos_mercadotecnia_gasto_dashboard"),
+    path("exportar/", views.exportar_gastos, name="gastos_mercadotecnia_gasto_export"),
     path("reporte/", views.reporte_gastos, name="gastos_mercadotecnia_gasto_report"),
+    path("reporte/<str:job_id>/estatus/", views.reporte_gastos_estatus, name="gastos_mercadotecnia_gasto_report_status"),
+    path("reporte/<str:job_id>/descarga/", views.reporte_gastos_descarga, name="gastos_mercadotecnia_gasto_report_download"),
     path("nuevo/", views.gastos_crear, name="gastos_mercadotecnia_gasto_create"),
     path("<int:pk>/", views.gastos_editar, name="gastos_mercadotecnia_gasto_update"),
 ]
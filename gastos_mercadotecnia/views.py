@@ -1,19 +1,19 @@
+from collections import defaultdict
 from datetime import datetime
+from decimal import Decimal
 from io import BytesIO
-import copy
 
 from django import forms
-from django.conf import settings
-from django.db.models import Sum
 from django.http import HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import landscape, letter
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from PyPDF2 import PdfReader, PdfWriter
 
+from core import exports, report_jobs
+from core.pdf import LazyFlowables, build_con_membrete, chunked, membrete_pagesize
+from . import rollup
 from .models import GastoMercadotecnia
 
 class GastoMercadotecniaForm(forms.ModelForm):
@@ -47,11 +47,11 @@ class GastoMercadotecniaForm(forms.ModelForm):
                 pass
 
 
-def gastos_lista(request):
+def _filtered_gastos(params):
     gastos = GastoMercadotecnia.objects.all().order_by("-fecha_facturacion", "-creado")
-    fecha_desde = (request.GET.get("fecha_desde") or "").strip()
-    fecha_hasta = (request.GET.get("fecha_hasta") or "").strip()
-    marca = (request.GET.get("marca") or "").strip()
+    fecha_desde = (params.get("fecha_desde") or "").strip()
+    fecha_hasta = (params.get("fecha_hasta") or "").strip()
+    marca = (params.get("marca") or "").strip()
 
     if fecha_desde:
         gastos = gastos.filter(fecha_facturacion__gte=fecha_desde)
@@ -59,7 +59,12 @@ def gastos_lista(request):
         gastos = gastos.filter(fecha_facturacion__lte=fecha_hasta)
     if marca:
         gastos = gastos.filter(marca=marca)
-    total_facturacion = gastos.aggregate(total=Sum("facturacion"))["total"] or 0
+    return gastos, fecha_desde, fecha_hasta, marca
+
+
+def gastos_lista(request):
+    gastos, fecha_desde, fecha_hasta, marca = _filtered_gastos(request.GET)
+    total_facturacion = rollup.total(_parse_date(fecha_desde), _parse_date(fecha_hasta), marca)
 
     context = {
         "gastos": gastos,
@@ -72,6 +77,22 @@ def gastos_lista(request):
     return render(request, "gastos_mercadotecnia/lista.html", context)
 
 
+def exportar_gastos(request):
+    gastos, _, _, _ = _filtered_gastos(request.GET)
+    columnas = [
+        ("Fecha facturación", "fecha_facturacion"),
+        ("Categoría", "categoria"),
+        ("Plataforma", "plataforma"),
+        ("Marca", "marca"),
+        ("TDC", "tdc"),
+        ("Tipo facturación", "tipo_facturacion"),
+        ("Periodicidad", "periodicidad"),
+        ("Facturación", "facturacion"),
+        ("Notas", "notas"),
+    ]
+    return exports.export_queryset(gastos, columnas, "inversiones.csv")
+
+
 def _parse_date(value: str):
     if not value:
         return None
@@ -81,20 +102,17 @@ def _parse_date(value: str):
         return None
 
 
-def reporte_gastos(request):
-    fecha_desde = _parse_date(request.GET.get("fecha_desde") or "")
-    fecha_hasta = _parse_date(request.GET.get("fecha_hasta") or "")
-    marca = (request.GET.get("marca") or "").strip()
+REPORTE_FILAS_POR_TABLA = 200
 
-    qs = GastoMercadotecnia.objects.all().order_by("-fecha_facturacion", "-creado")
-    if fecha_desde:
-        qs = qs.filter(fecha_facturacion__gte=fecha_desde)
-    if fecha_hasta:
-        qs = qs.filter(fecha_facturacion__lte=fecha_hasta)
-    if marca:
-        qs = qs.filter(marca=marca)
 
-    marca_txt = marca or "Todas"
+def _reporte_gastos_pdf(destino, gastos, filtros, total_facturacion, filas_por_tabla=None):
+    """
+    Escribe el reporte en `destino` (ruta o buffer). Con `filas_por_tabla` los
+    gastos se consumen por bloques y cada bloque se dibuja como una tabla.
+    """
+    fecha_desde = filtros["fecha_desde"]
+    fecha_hasta = filtros["fecha_hasta"]
+    marca_txt = filtros["marca"] or "Todas"
     title_text = f"Reporte de inversiones - Marca: {marca_txt}"
     if fecha_desde or fecha_hasta:
         desde_txt = fecha_desde.strftime("%d/%m/%Y") if fecha_desde else ""
@@ -103,26 +121,12 @@ def reporte_gastos(request):
     else:
         subtitle_text = "Fechas: "
 
-    total_facturacion = sum([g.facturacion or 0 for g in qs])
     total_text = f"Total facturación: ${total_facturacion:,.2f}"
 
-    template_path = settings.BASE_DIR / "static" / "img" / "MEMBRETE.pdf"
-    pagesize = landscape(letter)
-    if template_path.exists():
-        try:
-            template_reader = PdfReader(str(template_path))
-            template_page = template_reader.pages[0]
-            pagesize = (float(template_page.mediabox.width), float(template_page.mediabox.height))
-        except Exception:
-            template_reader = None
-            template_page = None
-    else:
-        template_reader = None
-        template_page = None
+    pagesize = membrete_pagesize()
 
-    buffer = BytesIO()
     doc = SimpleDocTemplate(
-        buffer,
+        destino,
         pagesize=pagesize,
         leftMargin=18,
         rightMargin=18,
@@ -166,33 +170,17 @@ def reporte_gastos(request):
     header_style = styles["BodyText"]
     header_style.fontSize = 8
     header_style.leading = 10
-    table_data = [
-        [
-            Paragraph("Fecha facturación", header_style),
-            Paragraph("Categoría", header_style),
-            Paragraph("Plataforma", header_style),
-            Paragraph("Marca", header_style),
-            Paragraph("TDC", header_style),
-            Paragraph("Tipo facturación", header_style),
-            Paragraph("Periodicidad<br/>", header_style),
-            Paragraph("Facturación<br/>", header_style),
-            Paragraph("Notas", header_style),
-        ]
+    header_row = [
+        Paragraph("Fecha facturación", header_style),
+        Paragraph("Categoría", header_style),
+        Paragraph("Plataforma", header_style),
+        Paragraph("Marca", header_style),
+        Paragraph("TDC", header_style),
+        Paragraph("Tipo facturación", header_style),
+        Paragraph("Periodicidad<br/>", header_style),
+        Paragraph("Facturación<br/>", header_style),
+        Paragraph("Notas", header_style),
     ]
-    for g in qs:
-        table_data.append(
-            [
-                g.fecha_facturacion.strftime("%d/%m/%Y") if g.fecha_facturacion else "",
-                Paragraph(g.categoria or "", body_style),
-                Paragraph(g.plataforma or "", body_style),
-                Paragraph(g.marca or "", body_style),
-                Paragraph(g.tdc or "", body_style),
-                Paragraph(g.tipo_facturacion or "", body_style),
-                Paragraph(g.periodicidad or "", body_style),
-                f"${(g.facturacion or 0):,.2f}",
-                Paragraph(g.notas or "", body_style),
-            ]
-        )
 
     page_width = pagesize[0]
     available_width = page_width - doc.leftMargin - doc.rightMargin
@@ -207,52 +195,176 @@ def reporte_gastos(request):
         available_width * 0.105,  # Facturación
         available_width * 0.215,  # Notas
     ]
-    table = Table(table_data, colWidths=col_widths, repeatRows=1)
     header_bg = colors.Color(0.90, 0.93, 0.96, alpha=0.3)
     row_bg = colors.Color(0.97, 0.98, 0.99, alpha=0.3)
-    table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), header_bg),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#1f2a3d")),
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#aebed2")),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, 0), 8),
-                ("FONTSIZE", (0, 1), (-1, -1), 8),
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-                ("TOPPADDING", (0, 0), (-1, 0), 6),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("WORDWRAP", (0, 0), (-1, -1), True),
-                ("ALIGN", (0, 0), (-1, 0), "CENTER"),
-                ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.Color(1, 1, 1, alpha=0.0), row_bg]),
-            ]
+    table_style = TableStyle(
+        [
+            ("BACKGROUND", (0, 0), (-1, 0), header_bg),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#1f2a3d")),
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#aebed2")),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, 0), 8),
+            ("FONTSIZE", (0, 1), (-1, -1), 8),
+            ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+            ("TOPPADDING", (0, 0), (-1, 0), 6),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("WORDWRAP", (0, 0), (-1, -1), True),
+            ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.Color(1, 1, 1, alpha=0.0), row_bg]),
+        ]
+    )
+
+    def _tabla(bloque):
+        table_data = [header_row]
+        for g in bloque:
+            table_data.append(
+                [
+                    g.fecha_facturacion.strftime("%d/%m/%Y") if g.fecha_facturacion else "",
+                    Paragraph(g.categoria or "", body_style),
+                    Paragraph(g.plataforma or "", body_style),
+                    Paragraph(g.marca or "", body_style),
+                    Paragraph(g.tdc or "", body_style),
+                    Paragraph(g.tipo_facturacion or "", body_style),
+                    Paragraph(g.periodicidad or "", body_style),
+                    f"${(g.facturacion or 0):,.2f}",
+                    Paragraph(g.notas or "", body_style),
+                ]
+            )
+        table = Table(table_data, colWidths=col_widths, repeatRows=1)
+        table.setStyle(table_style)
+        return [table]
+
+    if not filas_por_tabla:
+        elements.extend(_tabla(gastos))
+        build_con_membrete(doc, elements)
+        return
+
+    def _bloques():
+        vacio = True
+        for bloque in chunked(gastos, filas_por_tabla):
+            vacio = False
+            yield _tabla(bloque)
+        if vacio:
+            yield _tabla([])
+
+    build_con_membrete(doc, LazyFlowables(elements, _bloques()))
+
+
+def reporte_gastos(request):
+    fecha_desde = _parse_date(request.GET.get("fecha_desde") or "")
+    fecha_hasta = _parse_date(request.GET.get("fecha_hasta") or "")
+    marca = (request.GET.get("marca") or "").strip()
+
+    qs = GastoMercadotecnia.objects.all().order_by("-fecha_facturacion", "-creado")
+    if fecha_desde:
+        qs = qs.filter(fecha_facturacion__gte=fecha_desde)
+    if fecha_hasta:
+        qs = qs.filter(fecha_facturacion__lte=fecha_hasta)
+    if marca:
+        qs = qs.filter(marca=marca)
+
+    filtros = {"fecha_desde": fecha_desde, "fecha_hasta": fecha_hasta, "marca": marca}
+    total_facturacion = rollup.total(fecha_desde, fecha_hasta, marca)
+
+    if not report_jobs.should_run_async(qs.count()):
+        gastos = list(qs)
+        buffer = BytesIO()
+        _reporte_gastos_pdf(buffer, gastos, filtros, total_facturacion)
+        pdf = buffer.getvalue()
+        buffer.close()
+
+        response = HttpResponse(pdf, content_type="application/pdf")
+        response["Content-Disposition"] = 'inline; filename="reporte_inversiones.pdf"'
+        return response
+
+    def _builder(destino):
+        _reporte_gastos_pdf(
+            destino,
+            qs.iterator(chunk_size=REPORTE_FILAS_POR_TABLA),
+            filtros,
+            total_facturacion,
+            filas_por_tabla=REPORTE_FILAS_POR_TABLA,
         )
+
+    job_id = report_jobs.start("gastos", "reporte_inversiones.pdf", request.user, _builder)
+    return render(
+        request,
+        "reportes/en_proceso.html",
+        {
+            "titulo": "Reporte de inversiones",
+            "status_url": reverse("gastos_mercadotecnia_gasto_report_status", args=[job_id]),
+            "download_url": reverse("gastos_mercadotecnia_gasto_report_download", args=[job_id]),
+        },
     )
-    elements.append(table)
-    doc.build(elements)
-
-    content_pdf = buffer.getvalue()
-    buffer.close()
-
-    if template_reader and template_page:
-        content_reader = PdfReader(BytesIO(content_pdf))
-        writer = PdfWriter()
-        for page in content_reader.pages:
-            base = copy.copy(template_page)
-            if base.mediabox != page.mediabox:
-                base.mediabox = page.mediabox
-            base.merge_page(page)
-            writer.add_page(base)
-        output = BytesIO()
-        writer.write(output)
-        pdf = output.getvalue()
-        output.close()
-    else:
-        pdf = content_pdf
 
-    response = HttpResponse(pdf, content_type="application/pdf")
-    response["Content-Disposition"] = 'inline; filename="reporte_inversiones.pdf"'
-    return response
+
+def _mes_label(anio, mes):
+    if not anio:
+        return "Sin fecha"
+    return f"{mes:02d}/{anio}"
+
+
+def _serie(totales: dict, ordenar_por_valor=True):
+    items = list(totales.items())
+    if ordenar_por_valor:
+        items.sort(key=lambda x: x[1], reverse=True)
+    return [label for label, _ in items], [float(v) for _, v in items]
+
+
+def gastos_dashboard(request):
+    """Totales por marca, plataforma, categoría y mes leídos de GastoMensual."""
+    fecha_desde = _parse_date(request.GET.get("fecha_desde") or "")
+    fecha_hasta = _parse_date(request.GET.get("fecha_hasta") or "")
+    marca = (request.GET.get("marca") or "").strip()
+
+    filas = rollup.resumen(fecha_desde, fecha_hasta, marca, campos=("anio", "mes", "marca", "plataforma", "categoria"))
+    por_marca = defaultdict(Decimal)
+    por_plataforma = defaultdict(Decimal)
+    por_categoria = defaultdict(Decimal)
+    por_mes = defaultdict(Decimal)
+    total_general = Decimal("0")
+    gastos_count = 0
+    for (anio, mes, marca_fila, plataforma, categoria), (total, n) in filas.items():
+        por_marca[marca_fila or "Sin marca"] += total
+        por_plataforma[plataforma or "Sin plataforma"] += total
+        por_categoria[categoria or "Sin categoría"] += total
+        por_mes[(anio, mes)] += total
+        total_general += total
+        gastos_count += n
+
+    labels_marca, totales_marca = _serie(por_marca)
+    labels_plataforma, totales_plataforma = _serie(por_plataforma)
+    labels_categoria, totales_categoria = _serie(por_categoria)
+    meses = sorted(por_mes.items())
+    chart_data = {
+        "labels_marca": labels_marca,
+        "totales_marca": totales_marca,
+        "labels_plataforma": labels_plataforma,
+        "totales_plataforma": totales_plataforma,
+        "labels_categoria": labels_categoria,
+        "totales_categoria": totales_categoria,
+        "labels_mes": [_mes_label(anio, mes) for (anio, mes), _ in meses],
+        "totales_mes": [float(v) for _, v in meses],
+    }
+
+    context = {
+        "gastos_count": gastos_count,
+        "fecha_desde": fecha_desde.isoformat() if fecha_desde else "",
+        "fecha_hasta": fecha_hasta.isoformat() if fecha_hasta else "",
+        "marca": marca,
+        "marca_choices": GastoMercadotecnia._meta.get_field("marca").choices,
+        "chart_data": chart_data,
+        "total_facturacion": total_general,
+    }
+    return render(request, "gastos_mercadotecnia/dashboard.html", context)
+
+
+def reporte_gastos_estatus(request, job_id: str):
+    return report_jobs.status_response(request, job_id, "gastos")
+
+
+def reporte_gastos_descarga(request, job_id: str):
+    return report_jobs.download_response(request, job_id, "gastos")
 
 
 def gastos_crear(request):
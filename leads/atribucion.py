@@ -0,0 +1,182 @@
+"""
+Atribución de gasto de mercadotecnia a leads y citas (CPL y CPA).
+
+AtribucionMensual junta por (anio, mes, plataforma) el gasto de
+GastoMercadotecnia, los leads de Meta/LinkedIn y cuántos de ellos tienen una
+cita ligada. La plataforma se normaliza igual en los tres orígenes
+(`normalizar_plataforma`), así que "facebook", "IG" y "Meta" caen juntos.
+
+Cada escritura resta la aportación anterior y suma la nueva
+(`aplicar`); `reconstruir` recalcula la tabla completa y `diferencias` la
+compara contra ese mismo agregado. Los gastos sin fecha de facturación y los
+leads sin created_time no se atribuyen a ningún mes.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from gastos_mercadotecnia.models import GastoMercadotecnia
+from .models import AtribucionMensual, LinkedInLead, MetaLead
+
+CAMPOS = ("gasto", "num_gastos", "leads", "citas")
+CERO = Decimal("0")
+# Plataforma que se asume cuando el lead no trae una.
+PLATAFORMA_ORIGEN = {MetaLead: "Meta", LinkedInLead: "LinkedIn"}
+
+
+def normalizar_plataforma(raw_value, fallback=""):
+    platform_value = (raw_value or "").strip()
+    if not platform_value:
+        platform_value = (fallback or "").strip()
+    if not platform_value:
+        return "Sin plataforma"
+
+    lowered = platform_value.lower()
+    if "linkedin" in lowered:
+        return "LinkedIn"
+    if lowered in {"meta", "facebook", "fb", "instagram", "ig"} or "facebook" in lowered or "instagram" in lowered:
+        return "Meta"
+    if lowered in {"whatsapp", "whats app", "wa"}:
+        return "WhatsApp"
+    return platform_value
+
+
+def aportacion_lead(modelo, valores: dict | None):
+    """(llave, deltas) de un lead con los valores de CAMPOS_ATRIBUCION; None si no aporta."""
+    if valores is None or not valores.get("created_time"):
+        return None
+    fecha = timezone.localtime(valores["created_time"]).date()
+    llave = (fecha.year, fecha.month, normalizar_plataforma(valores["platform"], PLATAFORMA_ORIGEN[modelo]))
+    return llave, {"leads": 1, "citas": 1 if valores["cita_id"] else 0}
+
+
+def aportacion_gasto(valores: dict | None):
+    """(llave, deltas) de un gasto con los valores de GastoMercadotecnia.CAMPOS_RASTREADOS."""
+    if valores is None or not valores.get("fecha_facturacion"):
+        return None
+    fecha = valores["fecha_facturacion"]
+    llave = (fecha.year, fecha.month, normalizar_plataforma(valores["plataforma"]))
+    return llave, {"gasto": Decimal(valores["facturacion"] or 0), "num_gastos": 1}
+
+
+def valores_actuales(instance) -> dict:
+    return {campo: getattr(instance, campo) for campo in type(instance).CAMPOS_RASTREADOS}
+
+
+def _aplicar_delta(llave: tuple, deltas: dict) -> None:
+    anio, mes, plataforma = llave
+    filtro = {"anio": anio, "mes": mes, "plataforma": plataforma}
+    cambios = {campo: F(campo) + valor for campo, valor in deltas.items()}
+    if AtribucionMensual.objects.filter(**filtro).update(**cambios):
+        if any(valor < 0 for valor in deltas.values()):
+            AtribucionMensual.objects.filter(**filtro, leads__lte=0, num_gastos__lte=0).delete()
+        return
+    if all(valor <= 0 for valor in deltas.values()):
+        # La fila ya no existe (p. ej. se reconstruyó la tabla entre lectura y borrado).
+        return
+    try:
+        with transaction.atomic():
+            AtribucionMensual.objects.create(**filtro, **deltas)
+    except IntegrityError:
+        # Otra escritura creó la fila al mismo tiempo.
+        AtribucionMensual.objects.filter(**filtro).update(**cambios)
+
+
+def aplicar(anterior, nueva) -> None:
+    """Resta la aportación `anterior` y suma `nueva` (pares (llave, deltas) o None)."""
+    if anterior == nueva:
+        return
+    deltas = defaultdict(dict)
+    for aportacion, signo in ((anterior, -1), (nueva, 1)):
+        if aportacion is None:
+            continue
+        llave, valores = aportacion
+        for campo, valor in valores.items():
+            deltas[llave][campo] = deltas[llave].get(campo, 0) + signo * valor
+    for llave, valores in sorted(deltas.items()):
+        valores = {campo: valor for campo, valor in valores.items() if valor}
+        if valores:
+            _aplicar_delta(llave, valores)
+
+
+def agregado_esperado() -> dict:
+    """{(anio, mes, plataforma): {campo: valor}} calculado directo sobre gastos y leads."""
+    esperado = defaultdict(lambda: dict.fromkeys(CAMPOS, 0))
+    gastos = (
+        GastoMercadotecnia.objects.order_by()
+        .filter(fecha_facturacion__isnull=False)
+        .annotate(anio=ExtractYear("fecha_facturacion"), mes=ExtractMonth("fecha_facturacion"))
+        .values("anio", "mes", "plataforma")
+        .annotate(gasto=Sum("facturacion"), num_gastos=Count("id"))
+    )
+    for fila in gastos:
+        llave = (fila["anio"], fila["mes"], normalizar_plataforma(fila["plataforma"]))
+        esperado[llave]["gasto"] += fila["gasto"] or CERO
+        esperado[llave]["num_gastos"] += fila["num_gastos"]
+
+    for modelo, origen in PLATAFORMA_ORIGEN.items():
+        # ExtractYear/ExtractMonth usan la zona horaria actual, igual que timezone.localtime.
+        leads = (
+            modelo.objects.order_by()
+            .filter(created_time__isnull=False)
+            .annotate(anio=ExtractYear("created_time"), mes=ExtractMonth("created_time"))
+            .values("anio", "mes", "platform")
+            .annotate(leads=Count("id"), citas=Count("id", filter=Q(cita__isnull=False)))
+        )
+        for fila in leads:
+            llave = (fila["anio"], fila["mes"], normalizar_plataforma(fila["platform"], origen))
+            esperado[llave]["leads"] += fila["leads"]
+            esperado[llave]["citas"] += fila["citas"]
+    return esperado
+
+
+@transaction.atomic
+def reconstruir(batch_size: int = 1000) -> int:
+    AtribucionMensual.objects.all().delete()
+    filas = [
+        AtribucionMensual(anio=anio, mes=mes, plataforma=plataforma, **valores)
+        for (anio, mes, plataforma), valores in agregado_esperado().items()
+    ]
+    AtribucionMensual.objects.bulk_create(filas, batch_size=batch_size)
+    return len(filas)
+
+
+def diferencias() -> list[dict]:
+    """Filas donde AtribucionMensual no coincide con gastos y leads."""
+    esperado = agregado_esperado()
+    actual = {
+        (fila["anio"], fila["mes"], fila["plataforma"]): {campo: fila[campo] for campo in CAMPOS}
+        for fila in AtribucionMensual.objects.values("anio", "mes", "plataforma", *CAMPOS)
+    }
+    ceros = dict.fromkeys(CAMPOS, 0)
+    resultado = []
+    for llave in sorted(set(esperado) | set(actual)):
+        if esperado.get(llave, ceros) != actual.get(llave, ceros):
+            resultado.append(
+                {
+                    "llave": dict(zip(("anio", "mes", "plataforma"), llave)),
+                    "esperado": esperado.get(llave),
+                    "actual": actual.get(llave),
+                }
+            )
+    return resultado
+
+
+def filas(periodo_desde=None, periodo_hasta=None, plataforma=""):
+    """Filas de AtribucionMensual entre dos periodos (anio, mes), inclusive."""
+    qs = AtribucionMensual.objects.annotate(periodo=F("anio") * 100 + F("mes"))
+    if periodo_desde:
+        qs = qs.filter(periodo__gte=periodo_desde[0] * 100 + periodo_desde[1])
+    if periodo_hasta:
+        qs = qs.filter(periodo__lte=periodo_hasta[0] * 100 + periodo_hasta[1])
+    if plataforma:
+        qs = qs.filter(plataforma=plataforma)
+    return qs.order_by("-anio", "-mes", "plataforma")
+
+
+def plataformas() -> list[str]:
+    return list(AtribucionMensual.objects.order_by("plataforma").values_list("plataforma", flat=True).distinct())
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from leads import atribucion
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara AtribucionMensual contra gastos de mercadotecnia y leads. "
+        "Termina con error si hay diferencias (útil en cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Reconstruye AtribucionMensual si encuentra diferencias.",
+        )
+
+    def handle(self, *args, **options):
+        diferencias = atribucion.diferencias()
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS("AtribucionMensual consistente."))
+            return
+
+        for dif in diferencias[:50]:
+            self.stdout.write(f"{dif['llave']}: esperado={dif['esperado']} actual={dif['actual']}")
+        if len(diferencias) > 50:
+            self.stdout.write(f"... y {len(diferencias) - 50} más")
+
+        if options.get("fix"):
+            total = atribucion.reconstruir()
+            self.stdout.write(self.style.WARNING(f"AtribucionMensual reconstruida: {total} filas"))
+            return
+        raise CommandError(f"AtribucionMensual con {len(diferencias)} diferencias.")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from leads import atribucion
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla AtribucionMensual a partir de gastos de mercadotecnia y leads."
+
+    def handle(self, *args, **options):
+        total = atribucion.reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"AtribucionMensual reconstruida: {total} filas"))
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:50
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def _normalizar_plataforma(raw_value, fallback=""):
+    # Copia de leads.atribucion.normalizar_plataforma al momento de la migración.
+    platform_value = (raw_value or "").strip() or (fallback or "").strip()
+    if not platform_value:
+        return "Sin plataforma"
+    lowered = platform_value.lower()
+    if "linkedin" in lowered:
+        return "LinkedIn"
+    if lowered in {"meta", "facebook", "fb", "instagram", "ig"} or "facebook" in lowered or "instagram" in lowered:
+        return "Meta"
+    if lowered in {"whatsapp", "whats app", "wa"}:
+        return "WhatsApp"
+    return platform_value
+
+
+def poblar_atribucion(apps, schema_editor):
+    GastoMercadotecnia = apps.get_model("gastos_mercadotecnia", "GastoMercadotecnia")
+    AtribucionMensual = apps.get_model("leads", "AtribucionMensual")
+    acumulado = defaultdict(lambda: {"gasto": Decimal("0"), "num_gastos": 0, "leads": 0, "citas": 0})
+
+    gastos = (
+        GastoMercadotecnia.objects.order_by()
+        .filter(fecha_facturacion__isnull=False)
+        .annotate(anio=ExtractYear("fecha_facturacion"), mes=ExtractMonth("fecha_facturacion"))
+        .values("anio", "mes", "plataforma")
+        .annotate(gasto=Sum("facturacion"), num_gastos=Count("id"))
+    )
+    for f in gastos:
+        fila = acumulado[(f["anio"], f["mes"], _normalizar_plataforma(f["plataforma"]))]
+        fila["gasto"] += f["gasto"] or 0
+        fila["num_gastos"] += f["num_gastos"]
+
+    for nombre, origen in (("MetaLead", "Meta"), ("LinkedInLead", "LinkedIn")):
+        leads = (
+            apps.get_model("leads", nombre).objects.order_by()
+            .filter(created_time__isnull=False)
+            .annotate(anio=ExtractYear("created_time"), mes=ExtractMonth("created_time"))
+            .values("anio", "mes", "platform")
+            .annotate(leads=Count("id"), citas=Count("id", filter=Q(cita__isnull=False)))
+        )
+        for f in leads:
+            fila = acumulado[(f["anio"], f["mes"], _normalizar_plataforma(f["platform"], origen))]
+            fila["leads"] += f["leads"]
+            fila["citas"] += f["citas"]
+
+    AtribucionMensual.objects.bulk_create(
+        [
+            AtribucionMensual(anio=anio, mes=mes, plataforma=plataforma, **valores)
+            for (anio, mes, plataforma), valores in acumulado.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gastos_mercadotecnia', '0001_initial'),
+        ('leads', '0007_linkedinlead_is_organic'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AtribucionMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.PositiveIntegerField()),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('plataforma', models.CharField(max_length=50)),
+                ('gasto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('num_gastos', models.IntegerField(default=0)),
+                ('leads', models.IntegerField(default=0)),
+                ('citas', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Atribución mensual',
+                'verbose_name_plural': 'Atribuciones mensuales',
+                'indexes': [models.Index(fields=['anio', 'mes'], name='leads_atribucion_periodo_idx')],
+                'constraints': [models.UniqueConstraint(fields=('anio', 'mes', 'plataforma'), name='leads_atribucion_llave')],
+            },
+        ),
+        migrations.RunPython(poblar_atribucion, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,14 @@
 from django.db import models
 from core.choices import LEAD_ESTATUS_CHOICES, SERVICIO_CHOICES
+from core.tracking import CambiosRastreadosMixin
+
+# Campos que alimentan AtribucionMensual (ver leads.atribucion)
+CAMPOS_ATRIBUCION = ("created_time", "platform", "cita_id")
+
+
+class MetaLead(CambiosRastreadosMixin, models.Model):
+    CAMPOS_RASTREADOS = CAMPOS_ATRIBUCION
 
-class MetaLead(models.Model):
     # === Core Meta (fijo) ===
     leadgen_id = models.CharField(max_length=100, unique=True)  # id
     created_time = models.DateTimeField()
@@ -51,7 +58,9 @@ class MetaLead(models.Model):
         return f"{self.full_name or 'Lead'} - {self.campaign_name}"
 
 
-class LinkedInLead(models.Model):
+class LinkedInLead(CambiosRastreadosMixin, models.Model):
+    CAMPOS_RASTREADOS = CAMPOS_ATRIBUCION
+
     lead_id = models.CharField(max_length=150, unique=True, blank=True, null=True)
     created_time = models.DateTimeField(blank=True, null=True)
 
@@ -92,3 +101,41 @@ class LinkedInLead(models.Model):
 
     def __str__(self):
         return f"{self.full_name or 'LinkedIn Lead'} - {self.campaign_name or ''}".strip()
+
+
+class AtribucionMensual(models.Model):
+    """
+    Gasto de mercadotecnia, leads y citas por mes y plataforma normalizada
+    (CPL = gasto / leads, CPA = gasto / citas). Se mantiene con deltas desde
+    las señales de leads, citas y gastos; rebuild_atribucion_mensual lo
+    reconstruye y check_atribucion_mensual lo compara.
+    """
+
+    anio = models.PositiveIntegerField()
+    mes = models.PositiveSmallIntegerField()
+    plataforma = models.CharField(max_length=50)
+    gasto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    num_gastos = models.IntegerField(default=0)
+    leads = models.IntegerField(default=0)
+    citas = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Atribución mensual"
+        verbose_name_plural = "Atribuciones mensuales"
+        constraints = [
+            models.UniqueConstraint(fields=["anio", "mes", "plataforma"], name="leads_atribucion_llave"),
+        ]
+        indexes = [
+            models.Index(fields=["anio", "mes"], name="leads_atribucion_periodo_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.anio}-{self.mes:02d} {self.plataforma}"
+
+    @property
+    def cpl(self):
+        return self.gasto / self.leads if self.leads else None
+
+    @property
+    def cpa(self):
+        return self.gasto / self.citas if self.citas else None
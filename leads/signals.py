@@ -0,0 +1,56 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from comercial.models import Cita
+from gastos_mercadotecnia.models import GastoMercadotecnia
+from . import atribucion
+from .models import LinkedInLead, MetaLead
+
+
+def _previos_o_actuales(instance) -> dict:
+    previos = instance.valores_previos
+    if previos is None or any(campo not in previos for campo in type(instance).CAMPOS_RASTREADOS):
+        return atribucion.valores_actuales(instance)
+    return previos
+
+
+@receiver(post_save, sender=MetaLead)
+@receiver(post_save, sender=LinkedInLead)
+def atribuir_lead(sender, instance, created: bool, **kwargs):
+    anteriores = None if created else instance.valores_previos
+    atribucion.aplicar(
+        atribucion.aportacion_lead(sender, anteriores),
+        atribucion.aportacion_lead(sender, atribucion.valores_actuales(instance)),
+    )
+
+
+@receiver(post_delete, sender=MetaLead)
+@receiver(post_delete, sender=LinkedInLead)
+def descontar_lead(sender, instance, **kwargs):
+    atribucion.aplicar(atribucion.aportacion_lead(sender, _previos_o_actuales(instance)), None)
+
+
+@receiver(pre_delete, sender=Cita)
+def descontar_cita(sender, instance: Cita, **kwargs):
+    # El borrado pone cita=NULL en el lead con un UPDATE, sin pasar por save().
+    for modelo in (MetaLead, LinkedInLead):
+        for lead in modelo.objects.filter(cita=instance).only("id", "created_time", "platform", "cita"):
+            valores = atribucion.valores_actuales(lead)
+            atribucion.aplicar(
+                atribucion.aportacion_lead(modelo, valores),
+                atribucion.aportacion_lead(modelo, {**valores, "cita_id": None}),
+            )
+
+
+@receiver(post_save, sender=GastoMercadotecnia)
+def atribuir_gasto(sender, instance: GastoMercadotecnia, created: bool, **kwargs):
+    anteriores = None if created else instance.valores_previos
+    atribucion.aplicar(
+        atribucion.aportacion_gasto(anteriores),
+        atribucion.aportacion_gasto(atribucion.valores_actuales(instance)),
+    )
+
+
+@receiver(post_delete, sender=GastoMercadotecnia)
+def descontar_gasto(sender, instance: GastoMercadotecnia, **kwargs):
+    atribucion.aplicar(atribucion.aportacion_gasto(_previos_o_actuales(instance)), None)
@@ -1,8 +1,10 @@
 from django.urls import path
 from .views import (
+    leads_atribucion,
     lead_delete,
     lead_detail,
     leads_dashboard,
+    leads_exportar,
     leads_lista,
     leads_whatsapp_form,
     linkedin_lead_delete,
@@ -13,7 +15,9 @@ from .views import (
 
 urlpatterns = [
     path("", leads_lista, name="leads_metalead_list"),
+    path("exportar/", leads_exportar, name="leads_metalead_export"),
     path("dashboard/", leads_dashboard, name="leads_metalead_dashboard"),
+    path("atribucion/", leads_atribucion, name="leads_metalead_atribucion"),
     path("whatsapp/form/", leads_whatsapp_form, name="leads_metalead_whatsapp_form"),
     path("<int:pk>/", lead_detail, name="leads_metalead_detail"),
     path("<int:pk>/eliminar/", lead_delete, name="leads_metalead_delete"),
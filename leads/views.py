@@ -1,25 +1,30 @@
 import hashlib
+import heapq
 import hmac
 import json
 import logging
 import os
 import uuid
 from collections import defaultdict
-from datetime import date, datetime
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
 from urllib.parse import quote
 
 import requests
 from django import forms
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.db.models import F, Q
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from django.views.decorators.csrf import csrf_exempt
 
+from . import atribucion
+from .atribucion import normalizar_plataforma as _normalize_platform_label
 from .models import LinkedInLead, MetaLead
 from comercial.models import Cita
+from core import exports
 from core.choices import LEAD_ESTATUS_CHOICES, SERVICIO_CHOICES
 
 logger = logging.getLogger(__name__)
@@ -1080,23 +1085,6 @@ def _filter_leads_by_created_time(queryset, fecha_desde, fecha_hasta):
     return queryset
 
 
-def _normalize_platform_label(raw_value, fallback=""):
-    platform_value = (raw_value or "").strip()
-    if not platform_value:
-        platform_value = (fallback or "").strip()
-    if not platform_value:
-        return "Sin plataforma"
-
-    lowered = platform_value.lower()
-    if "linkedin" in lowered:
-        return "LinkedIn"
-    if lowered in {"meta", "facebook", "fb", "instagram", "ig"} or "facebook" in lowered or "instagram" in lowered:
-        return "Meta"
-    if lowered in {"whatsapp", "whats app", "wa"}:
-        return "WhatsApp"
-    return platform_value
-
-
 def _apply_leads_dashboard_filters(queryset, estatus, servicio):
     if estatus == "__pendiente__":
         queryset = queryset.filter(
@@ -1365,9 +1353,7 @@ def _linkedin_defaults_from_full_response(full_payload, fallback_defaults):
     return defaults
 
 
-@login_required
-def leads_lista(request):
-    q = request.GET.get("q", "").strip()
+def _leads_search_querysets(q):
     meta_leads = MetaLead.objects.all()
     linkedin_leads = LinkedInLead.objects.all()
 
@@ -1392,6 +1378,13 @@ def leads_lista(request):
             | Q(phone_number__icontains=q)
             | Q(company_name__icontains=q)
         )
+    return meta_leads, linkedin_leads
+
+
+@login_required
+def leads_lista(request):
+    q = request.GET.get("q", "").strip()
+    meta_leads, linkedin_leads = _leads_search_querysets(q)
 
     leads = []
     for lead in meta_leads:
@@ -1421,6 +1414,81 @@ def leads_lista(request):
     return render(request, "leads/lista.html", {"leads": leads, "q": q})
 
 
+_EXPORT_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+LEADS_EXPORT_COLUMNS = [
+    ("Origen", lambda lead, source, identifier: source),
+    ("ID", lambda lead, source, identifier: identifier),
+    ("Fecha", lambda lead, source, identifier: lead.created_time),
+    ("Nombre", lambda lead, source, identifier: lead.full_name),
+    ("Correo", lambda lead, source, identifier: lead.email),
+    ("Teléfono", lambda lead, source, identifier: lead.phone_number),
+    ("Puesto", lambda lead, source, identifier: lead.job_title),
+    ("Empresa", lambda lead, source, identifier: lead.company_name),
+    ("Plataforma", lambda lead, source, identifier: _normalize_platform_label(lead.platform, source)),
+    ("Campaña", lambda lead, source, identifier: lead.campaign_name),
+    ("Conjunto", lambda lead, source, identifier: lead.adset_name),
+    ("Anuncio", lambda lead, source, identifier: lead.ad_name),
+    ("Formulario", lambda lead, source, identifier: lead.form_id),
+    ("Orgánico", lambda lead, source, identifier: lead.is_organic),
+    ("Estatus", lambda lead, source, identifier: lead.estatus),
+    ("Servicio", lambda lead, source, identifier: lead.servicio),
+    ("Contactado", lambda lead, source, identifier: lead.contactado),
+    ("Cita agendada", lambda lead, source, identifier: lead.cita_agendada),
+    ("Notas", lambda lead, source, identifier: lead.notas),
+]
+
+
+def _leads_export_raw_keys(*querysets):
+    """Primera pasada (solo raw_fields) para conocer las columnas dinámicas."""
+    keys = {}
+    for queryset in querysets:
+        for raw in exports.iter_queryset(queryset.values_list("raw_fields", flat=True)):
+            if isinstance(raw, dict):
+                for key in raw:
+                    keys.setdefault(str(key), None)
+    return list(keys)
+
+
+def _leads_export_rows(meta_leads, linkedin_leads, raw_keys):
+    orden = [F("created_time").desc(nulls_last=True), "-id"]
+    meta_iter = (
+        (lead, "Meta", lead.leadgen_id)
+        for lead in exports.iter_queryset(meta_leads.defer("raw_payload").order_by(*orden))
+    )
+    linkedin_iter = (
+        (lead, "LinkedIn", lead.lead_id)
+        for lead in exports.iter_queryset(linkedin_leads.defer("raw_payload").order_by(*orden))
+    )
+    # Ambos querysets ya vienen ordenados; se intercalan sin cargarlos en memoria.
+    merged = heapq.merge(
+        meta_iter,
+        linkedin_iter,
+        key=lambda item: item[0].created_time or _EXPORT_EPOCH,
+        reverse=True,
+    )
+    for lead, source, identifier in merged:
+        row = [exports.format_value(fn(lead, source, identifier)) for _, fn in LEADS_EXPORT_COLUMNS]
+        raw = lead.raw_fields if isinstance(lead.raw_fields, dict) else {}
+        for key in raw_keys:
+            value = raw.get(key)
+            row.append(_coerce_lead_text(value) if isinstance(value, dict) else exports.format_value(value))
+        yield row
+
+
+@login_required
+def leads_exportar(request):
+    q = request.GET.get("q", "").strip()
+    meta_leads, linkedin_leads = _leads_search_querysets(q)
+    raw_keys = _leads_export_raw_keys(meta_leads, linkedin_leads)
+    encabezados = [titulo for titulo, _ in LEADS_EXPORT_COLUMNS] + raw_keys
+    return exports.csv_response(
+        "leads.csv",
+        encabezados,
+        _leads_export_rows(meta_leads, linkedin_leads, raw_keys),
+    )
+
+
 @login_required
 def leads_dashboard(request):
     fecha_desde_raw = (request.GET.get("fecha_desde") or "").strip()
@@ -1474,6 +1542,55 @@ def leads_dashboard(request):
     return render(request, "leads/dashboard.html", context)
 
 
+def _parse_periodo(value):
+    """"YYYY-MM" (input type=month) a (anio, mes)."""
+    try:
+        anio, mes = (int(p) for p in str(value or "").split("-"))
+    except ValueError:
+        return None
+    return (anio, mes) if 1 <= mes <= 12 else None
+
+
+def _costo_por(gasto, cantidad):
+    return gasto / cantidad if cantidad else None
+
+
+@login_required
+def leads_atribucion(request):
+    """CPL y CPA por mes y plataforma leídos de AtribucionMensual."""
+    mes_desde = (request.GET.get("mes_desde") or "").strip()
+    mes_hasta = (request.GET.get("mes_hasta") or "").strip()
+    plataforma = (request.GET.get("plataforma") or "").strip()
+
+    filas = list(atribucion.filas(_parse_periodo(mes_desde), _parse_periodo(mes_hasta), plataforma))
+    por_plataforma = defaultdict(lambda: {"gasto": Decimal("0"), "leads": 0, "citas": 0})
+    for fila in filas:
+        total = por_plataforma[fila.plataforma]
+        total["gasto"] += fila.gasto
+        total["leads"] += fila.leads
+        total["citas"] += fila.citas
+    totales = [
+        {"plataforma": nombre, **t, "cpl": _costo_por(t["gasto"], t["leads"]), "cpa": _costo_por(t["gasto"], t["citas"])}
+        for nombre, t in sorted(por_plataforma.items(), key=lambda item: (-item[1]["gasto"], item[0].lower()))
+    ]
+    gasto_total = sum((t["gasto"] for t in totales), Decimal("0"))
+    leads_total = sum(t["leads"] for t in totales)
+    citas_total = sum(t["citas"] for t in totales)
+
+    context = {
+        "filas": filas,
+        "totales": totales,
+        "gasto_total": gasto_total,
+        "cpl_total": _costo_por(gasto_total, leads_total),
+        "cpa_total": _costo_por(gasto_total, citas_total),
+        "mes_desde": mes_desde,
+        "mes_hasta": mes_hasta,
+        "plataforma": plataforma,
+        "plataforma_choices": atribucion.plataformas(),
+    }
+    return render(request, "leads/atribucion.html", context)
+
+
 @login_required
 def leads_whatsapp_form(request):
     back_url = request.GET.get("next") or request.POST.get("next") or "/leads/"
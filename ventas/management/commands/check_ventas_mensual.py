@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ventas import rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara VentaMensual contra el agregado de ventas_venta. "
+        "Termina con error si hay diferencias (útil en cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Reconstruye VentaMensual si encuentra diferencias.",
+        )
+
+    def handle(self, *args, **options):
+        diferencias = rollup.diferencias()
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS("VentaMensual consistente."))
+            return
+
+        for dif in diferencias[:50]:
+            self.stdout.write(f"{dif['llave']}: esperado={dif['esperado']} actual={dif['actual']}")
+        if len(diferencias) > 50:
+            self.stdout.write(f"... y {len(diferencias) - 50} más")
+
+        if options.get("fix"):
+            total = rollup.reconstruir()
+            self.stdout.write(self.style.WARNING(f"VentaMensual reconstruida: {total} filas"))
+            return
+        raise CommandError(f"VentaMensual con {len(diferencias)} diferencias.")
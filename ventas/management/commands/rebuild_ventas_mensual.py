@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ventas import rollup
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla VentaMensual a partir de todas las ventas."
+
+    def handle(self, *args, **options):
+        total = rollup.reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"VentaMensual reconstruida: {total} filas"))
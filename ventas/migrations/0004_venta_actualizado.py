@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0003_alter_venta_facturadora'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venta',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
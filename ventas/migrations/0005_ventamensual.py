@@ -0,0 +1,75 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+
+
+def poblar_ventas_mensuales(apps, schema_editor):
+    Venta = apps.get_model("ventas", "Venta")
+    VentaMensual = apps.get_model("ventas", "VentaMensual")
+    filas = (
+        Venta.objects.order_by()
+        .annotate(
+            anio=ExtractYear("fecha"),
+            mes=ExtractMonth("fecha"),
+            facturadora_llave=Coalesce("facturadora", Value("")),
+        )
+        .values("anio", "mes", "servicio", "facturadora_llave", "estatus_pago", "cliente_id")
+        .annotate(
+            total_venta=Sum("monto_venta"),
+            total_comision=Sum("monto_comision"),
+            num_ventas=Count("id"),
+        )
+    )
+    VentaMensual.objects.bulk_create(
+        [
+            VentaMensual(
+                anio=f["anio"],
+                mes=f["mes"],
+                servicio=f["servicio"] or "",
+                facturadora=f["facturadora_llave"] or "",
+                estatus_pago=f["estatus_pago"] or "",
+                cliente_id=f["cliente_id"],
+                total_venta=f["total_venta"] or 0,
+                total_comision=f["total_comision"] or 0,
+                num_ventas=f["num_ventas"],
+            )
+            for f in filas
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0016_alter_cliente_servicio'),
+        ('ventas', '0004_venta_actualizado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.PositiveIntegerField()),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('servicio', models.CharField(max_length=50)),
+                ('facturadora', models.CharField(blank=True, default='', max_length=100)),
+                ('estatus_pago', models.CharField(choices=[('Pendiente', 'Pendiente'), ('Pagado', 'Pagado')], max_length=20)),
+                ('total_venta', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_comision', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('num_ventas', models.IntegerField(default=0)),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='clientes.cliente')),
+            ],
+            options={
+                'verbose_name': 'Venta mensual',
+                'verbose_name_plural': 'Ventas mensuales',
+                'indexes': [models.Index(fields=['anio', 'mes'], name='ventas_vm_periodo_idx')],
+                'constraints': [models.UniqueConstraint(fields=('anio', 'mes', 'servicio', 'facturadora', 'estatus_pago', 'cliente'), name='ventas_ventamensual_llave')],
+            },
+        ),
+        migrations.RunPython(poblar_ventas_mensuales, migrations.RunPython.noop),
+    ]
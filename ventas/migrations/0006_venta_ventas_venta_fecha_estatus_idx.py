@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0016_alter_cliente_servicio'),
+        ('ventas', '0005_ventamensual'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['fecha', 'estatus_pago'], name='ventas_venta_fecha_estatus_idx'),
+        ),
+    ]
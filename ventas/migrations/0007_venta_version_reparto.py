@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0006_venta_ventas_venta_fecha_estatus_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venta',
+            name='version_reparto',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
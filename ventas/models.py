@@ -3,9 +3,10 @@ from decimal import Decimal, InvalidOperation
 from django.db import models
 from django.utils import timezone
 from core.choices import FACTURADORA_CHOICES
+from core.tracking import CambiosRastreadosMixin
 
 
-class Venta(models.Model):
+class Venta(CambiosRastreadosMixin, models.Model):
 
     class EstatusPago(models.TextChoices):
         PENDIENTE = "Pendiente", "Pendiente"
@@ -24,6 +25,26 @@ class Venta(models.Model):
     fecha_pago = models.DateField(blank=True, null=True)
     fecha_vigencia = models.DateField(blank=True, null=True)
     fecha_arranque = models.DateField(blank=True, null=True)
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
+    # Cliente.version_reparto con la que se generaron las comisiones (ver comisiones.signals)
+    version_reparto = models.PositiveIntegerField(default=0, editable=False)
+
+    # Campos que alimentan VentaMensual y las comisiones (ver ventas.signals y comisiones.signals)
+    CAMPOS_RASTREADOS = (
+        "fecha",
+        "cliente_id",
+        "servicio",
+        "facturadora",
+        "estatus_pago",
+        "monto_venta",
+        "monto_comision",
+        "comision_porcentaje",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["fecha", "estatus_pago"], name="ventas_venta_fecha_estatus_idx"),
+        ]
 
     def __str__(self):
         return f"{self.cliente} - {self.facturadora} - {self.fecha}"
@@ -67,4 +88,42 @@ class Venta(models.Model):
             self.monto_venta = Decimal("0")
         self.comision_porcentaje = rate_percent.quantize(Decimal("0.0001"))
         self.monto_comision = (rate_fraction * self.monto_venta).quantize(Decimal("0.01"))
+        if self._state.adding:
+            # El alta siempre genera comisiones con el reparto actual.
+            self.version_reparto = self.cliente.version_reparto
         super().save(*args, **kwargs)
+
+
+class VentaMensual(models.Model):
+    """
+    Acumulado mensual de ventas por servicio, facturadora, estatus de pago y cliente.
+    Se mantiene con deltas desde las señales de Venta; rebuild_ventas_mensual lo
+    reconstruye y check_ventas_mensual lo compara contra ventas_venta.
+    """
+
+    anio = models.PositiveIntegerField()
+    mes = models.PositiveSmallIntegerField()
+    servicio = models.CharField(max_length=50)
+    # "" en lugar de NULL para que la llave única aplique también sin facturadora
+    facturadora = models.CharField(max_length=100, blank=True, default="")
+    estatus_pago = models.CharField(max_length=20, choices=Venta.EstatusPago.choices)
+    cliente = models.ForeignKey("clientes.Cliente", on_delete=models.CASCADE, related_name="+")
+    total_venta = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_comision = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    num_ventas = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Venta mensual"
+        verbose_name_plural = "Ventas mensuales"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["anio", "mes", "servicio", "facturadora", "estatus_pago", "cliente"],
+                name="ventas_ventamensual_llave",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["anio", "mes"], name="ventas_vm_periodo_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.anio}-{self.mes:02d} {self.servicio} {self.estatus_pago}: {self.total_venta}"
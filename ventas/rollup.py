@@ -0,0 +1,150 @@
+"""
+Mantenimiento de VentaMensual.
+
+Cada escritura de Venta resta su aportación anterior y suma la nueva
+(`aplicar_venta`). `reconstruir` recalcula la tabla completa desde
+ventas_venta y `diferencias` la compara contra ese mismo agregado.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+
+from .models import Venta, VentaMensual
+
+LLAVE = ("anio", "mes", "servicio", "facturadora", "estatus_pago", "cliente_id")
+
+
+def _llave(valores: dict) -> dict:
+    fecha = valores["fecha"]
+    return {
+        "anio": fecha.year,
+        "mes": fecha.month,
+        "servicio": valores["servicio"] or "",
+        "facturadora": valores["facturadora"] or "",
+        "estatus_pago": valores["estatus_pago"] or "",
+        "cliente_id": valores["cliente_id"],
+    }
+
+
+def _montos(valores: dict):
+    return (
+        Decimal(valores["monto_venta"] or 0),
+        Decimal(valores["monto_comision"] or 0),
+    )
+
+
+def _aplicar_delta(llave: dict, total: Decimal, comision: Decimal, n: int) -> None:
+    actualizadas = VentaMensual.objects.filter(**llave).update(
+        total_venta=F("total_venta") + total,
+        total_comision=F("total_comision") + comision,
+        num_ventas=F("num_ventas") + n,
+    )
+    if actualizadas:
+        if n < 0:
+            VentaMensual.objects.filter(**llave, num_ventas__lte=0).delete()
+        return
+    if n <= 0:
+        # La fila ya no existe (p. ej. borrado en cascada del cliente).
+        return
+    try:
+        with transaction.atomic():
+            VentaMensual.objects.create(**llave, total_venta=total, total_comision=comision, num_ventas=n)
+    except IntegrityError:
+        # Otra escritura creó la fila al mismo tiempo.
+        VentaMensual.objects.filter(**llave).update(
+            total_venta=F("total_venta") + total,
+            total_comision=F("total_comision") + comision,
+            num_ventas=F("num_ventas") + n,
+        )
+
+
+def valores_actuales(venta: Venta) -> dict:
+    return {campo: getattr(venta, campo) for campo in Venta.CAMPOS_RASTREADOS}
+
+
+def aplicar_venta(anteriores: dict | None, nuevos: dict | None) -> None:
+    """Resta la aportación `anteriores` y suma `nuevos` (cualquiera puede ser None)."""
+    if anteriores is not None and nuevos is not None:
+        if _llave(anteriores) == _llave(nuevos) and _montos(anteriores) == _montos(nuevos):
+            return
+    if anteriores is not None:
+        total, comision = _montos(anteriores)
+        _aplicar_delta(_llave(anteriores), -total, -comision, -1)
+    if nuevos is not None:
+        total, comision = _montos(nuevos)
+        _aplicar_delta(_llave(nuevos), total, comision, 1)
+
+
+def agregado_desde_ventas():
+    """Mismo acumulado que VentaMensual, calculado directo sobre ventas_venta."""
+    return (
+        Venta.objects.order_by()
+        .annotate(
+            anio=ExtractYear("fecha"),
+            mes=ExtractMonth("fecha"),
+            facturadora_llave=Coalesce("facturadora", Value("")),
+        )
+        .values("anio", "mes", "servicio", "facturadora_llave", "estatus_pago", "cliente_id")
+        .annotate(
+            total_venta=Sum("monto_venta"),
+            total_comision=Sum("monto_comision"),
+            num_ventas=Count("id"),
+        )
+    )
+
+
+def _fila_llave(fila: dict) -> tuple:
+    return (
+        fila["anio"],
+        fila["mes"],
+        fila["servicio"] or "",
+        fila.get("facturadora_llave", fila.get("facturadora")) or "",
+        fila["estatus_pago"] or "",
+        fila["cliente_id"],
+    )
+
+
+@transaction.atomic
+def reconstruir(batch_size: int = 1000) -> int:
+    VentaMensual.objects.all().delete()
+    filas = [
+        VentaMensual(
+            anio=fila["anio"],
+            mes=fila["mes"],
+            servicio=fila["servicio"] or "",
+            facturadora=fila["facturadora_llave"] or "",
+            estatus_pago=fila["estatus_pago"] or "",
+            cliente_id=fila["cliente_id"],
+            total_venta=fila["total_venta"] or 0,
+            total_comision=fila["total_comision"] or 0,
+            num_ventas=fila["num_ventas"],
+        )
+        for fila in agregado_desde_ventas().iterator()
+    ]
+    VentaMensual.objects.bulk_create(filas, batch_size=batch_size)
+    return len(filas)
+
+
+def diferencias() -> list[dict]:
+    """Filas donde VentaMensual no coincide con ventas_venta."""
+    esperado = {
+        _fila_llave(fila): (fila["total_venta"] or Decimal("0"), fila["total_comision"] or Decimal("0"), fila["num_ventas"])
+        for fila in agregado_desde_ventas()
+    }
+    actual = {
+        _fila_llave(fila): (fila["total_venta"], fila["total_comision"], fila["num_ventas"])
+        for fila in VentaMensual.objects.values(*LLAVE, "total_venta", "total_comision", "num_ventas")
+    }
+    resultado = []
+    for llave in sorted(set(esperado) | set(actual), key=str):
+        if esperado.get(llave) != actual.get(llave):
+            resultado.append(
+                {
+                    "llave": dict(zip(LLAVE, llave)),
+                    "esperado": esperado.get(llave),
+                    "actual": actual.get(llave),
+                }
+            )
+    return resultado
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import rollup
+from .models import Venta
+
+
+@receiver(post_save, sender=Venta)
+def actualizar_venta_mensual(sender, instance: Venta, created: bool, **kwargs):
+    anteriores = None if created else instance.valores_previos
+    rollup.aplicar_venta(anteriores, rollup.valores_actuales(instance))
+
+
+@receiver(post_delete, sender=Venta)
+def descontar_venta_mensual(sender, instance: Venta, **kwargs):
+    anteriores = instance.valores_previos
+    if anteriores is None or any(campo not in anteriores for campo in Venta.CAMPOS_RASTREADOS):
+        anteriores = rollup.valores_actuales(instance)
+    rollup.aplicar_venta(anteriores, None)
@@ -1,3 +1,56 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from clientes.models import Cliente
+from .models import Venta
+from .views import _ventas_lista_queryset
+
+# Las plantillas usan {% static %}; sin collectstatic no hay manifiesto.
+SIN_MANIFIESTO = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+def _plan(qs) -> str:
+    """EXPLAIN de `qs`; en PostgreSQL se desactiva el seq scan porque la tabla de prueba es chica."""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    return qs.explain()
+
+
+class VentasListaMesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = Cliente.objects.create(cliente="acme", servicio="Marketing")
+        for dia in (1, 15, 31):
+            Venta.objects.create(cliente=cls.cliente, fecha=date(2025, 1, dia), monto_venta=Decimal("100"))
+        Venta.objects.create(cliente=cls.cliente, fecha=date(2025, 2, 1), monto_venta=Decimal("100"))
+        cls.usuario = User.objects.create_superuser("admin", "admin@example.com", "x")
+
+    def test_rango_del_mes(self):
+        self.assertEqual(_ventas_lista_queryset(1, 2025).count(), 3)
+        self.assertEqual(_ventas_lista_queryset(12, 2024).count(), 0)
+
+    def test_plan_usa_indice_de_fecha(self):
+        plan = _plan(_ventas_lista_queryset(1, 2025))
+        self.assertIn("ventas_venta_fecha_estatus_idx", plan)
+
+    def test_plan_usa_indice_con_estatus(self):
+        plan = _plan(_ventas_lista_queryset(1, 2025, Venta.EstatusPago.PAGADO))
+        self.assertIn("ventas_venta_fecha_estatus_idx", plan)
+
+    @override_settings(STORAGES=SIN_MANIFIESTO)
+    def test_anio_fuera_de_rango_no_falla(self):
+        self.client.force_login(self.usuario)
+        url = reverse("ventas_venta_list")
+        for params in ({"mes": 1, "anio": 0}, {"mes": 12, "anio": 9999}, {"mes": 1, "anio": 20250}):
+            with self.subTest(**params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
@@ -4,6 +4,7 @@ from . import views
 
 urlpatterns = [
     path("", views.ventas_lista, name="ventas_venta_list"),
+    path("exportar/", views.exportar_ventas, name="ventas_venta_export"),
     path("dashboard/", views.ventas_dashboard, name="ventas_venta_dashboard"),
     path("dashboard/resumen/", views.ventas_resumen_pdf, name="ventas_venta_dashboard_resumen"),
     path("nueva/", views.agregar_venta, name="ventas_venta_create"),
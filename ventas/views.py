@@ -1,5 +1,4 @@
 import calendar
-import copy
 import math
 from collections import defaultdict
 from datetime import date
@@ -7,22 +6,24 @@ from decimal import Decimal
 from io import BytesIO
 
 from django.conf import settings
+from django.db.models import Count, F, Max, Min, Q, Sum
 from django.http import HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
-from PyPDF2 import PdfReader, PdfWriter
 from reportlab.graphics.charts.barcharts import VerticalBarChart
 from reportlab.graphics.charts.piecharts import Pie
 from reportlab.graphics.shapes import Drawing, Line, String
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import landscape, letter
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
+from core import exports, report_cache
+from core.pdf import build_con_membrete, membrete_pagesize
+from core.periodos import anio_valido, filtro_mes
 from .forms import VentaForm
-from .models import Venta
+from .models import Venta, VentaMensual
 
 
 def _coerce_mes_anio(request):
@@ -39,22 +40,27 @@ def _coerce_mes_anio(request):
         mes_i = today.month
     try:
         anio_i = int(anio)
+        if not anio_valido(anio_i):
+            anio_i = today.year
     except Exception:
         anio_i = today.year
     return mes_i, anio_i, None
 
 
+def _ventas_lista_queryset(mes, anio, estatus_pago=""):
+    ventas = Venta.objects.filter(filtro_mes("fecha", mes, anio))
+    if estatus_pago:
+        ventas = ventas.filter(estatus_pago=estatus_pago)
+    return ventas.order_by("fecha")
+
+
 def ventas_lista(request):
     mes, anio, redir = _coerce_mes_anio(request)
     if redir:
         return redir
 
     estatus_pago = request.GET.get("estatus_pago") or ""
-
-    ventas = Venta.objects.filter(fecha__month=mes, fecha__year=anio)
-    if estatus_pago:
-        ventas = ventas.filter(estatus_pago=estatus_pago)
-    ventas = ventas.order_by("fecha")
+    ventas = _ventas_lista_queryset(mes, anio, estatus_pago)
     meses_nombres = [
         "",
         "Enero",
@@ -84,6 +90,30 @@ def ventas_lista(request):
     return render(request, "ventas/ventas_lista.html", context)
 
 
+def exportar_ventas(request):
+    mes, anio, redir = _coerce_mes_anio(request)
+    if redir:
+        return redir
+
+    estatus_pago = request.GET.get("estatus_pago") or ""
+    ventas = _ventas_lista_queryset(mes, anio, estatus_pago).select_related("cliente")
+    columnas = [
+        ("Fecha", "fecha"),
+        ("Cliente", "cliente.cliente"),
+        ("Servicio", "servicio"),
+        ("Facturadora", "facturadora"),
+        ("No. factura", "num_factura"),
+        ("Monto venta", "monto_venta"),
+        ("Comisión (%)", "comision_porcentaje"),
+        ("Fecha pago", "fecha_pago"),
+        ("Fecha vigencia", "fecha_vigencia"),
+        ("Fecha arranque", "fecha_arranque"),
+        ("Estatus pago", "estatus_pago"),
+        ("Comentarios", "comentarios"),
+    ]
+    return exports.export_queryset(ventas, columnas, f"ventas_{anio}_{mes:02d}.csv")
+
+
 def _top_with_otros(items, top_n=10):
     if not items:
         return []
@@ -147,7 +177,7 @@ def _get_ventas_rango(request, allow_empty=False):
 
 
 def _ventas_queryset_for_rango(fecha_desde, fecha_hasta):
-    ventas_qs = Venta.objects.all().select_related("cliente").order_by("fecha")
+    ventas_qs = Venta.objects.all()
     if fecha_desde and fecha_hasta:
         ventas_qs = ventas_qs.filter(fecha__range=(fecha_desde, fecha_hasta))
     elif fecha_desde:
@@ -157,21 +187,65 @@ def _ventas_queryset_for_rango(fecha_desde, fecha_hasta):
     return ventas_qs
 
 
-def _ventas_resumen_data(ventas):
+def _rango_en_meses_completos(fecha_desde, fecha_hasta):
+    if not fecha_desde and not fecha_hasta:
+        return True
+    if not fecha_desde or not fecha_hasta:
+        return False
+    ultimo_dia = calendar.monthrange(fecha_hasta.year, fecha_hasta.month)[1]
+    return fecha_desde.day == 1 and fecha_hasta.day == ultimo_dia
+
+
+def _ventas_resumen_filas(fecha_desde, fecha_hasta):
+    """
+    Totales por servicio y por estatus de pago en una sola consulta agrupada.
+    Si el rango abarca meses completos se lee de VentaMensual.
+    """
+    if _rango_en_meses_completos(fecha_desde, fecha_hasta):
+        qs = VentaMensual.objects.all()
+        if fecha_desde and fecha_hasta:
+            qs = qs.annotate(periodo=F("anio") * 100 + F("mes")).filter(
+                periodo__range=(
+                    fecha_desde.year * 100 + fecha_desde.month,
+                    fecha_hasta.year * 100 + fecha_hasta.month,
+                )
+            )
+        return qs.values("servicio").annotate(
+            total=Sum("total_venta"),
+            pagado=Sum("total_venta", filter=Q(estatus_pago=Venta.EstatusPago.PAGADO)),
+            pendiente=Sum("total_venta", filter=Q(estatus_pago=Venta.EstatusPago.PENDIENTE)),
+            n=Sum("num_ventas"),
+        )
+
+    return (
+        _ventas_queryset_for_rango(fecha_desde, fecha_hasta)
+        .order_by()
+        .values("servicio")
+        .annotate(
+            total=Sum("monto_venta"),
+            pagado=Sum("monto_venta", filter=Q(estatus_pago=Venta.EstatusPago.PAGADO)),
+            pendiente=Sum("monto_venta", filter=Q(estatus_pago=Venta.EstatusPago.PENDIENTE)),
+            n=Count("id"),
+        )
+    )
+
+
+def _ventas_resumen_data(fecha_desde, fecha_hasta):
+    filas = _ventas_resumen_filas(fecha_desde, fecha_hasta)
+
     por_servicio = defaultdict(lambda: Decimal("0"))
     total_general = Decimal("0")
     total_pagado = Decimal("0")
     total_pendiente = Decimal("0")
+    ventas_count = 0
 
-    for venta in ventas:
-        monto = venta.monto_venta or Decimal("0")
+    for fila in filas:
+        monto = fila["total"] or Decimal("0")
         total_general += monto
-        servicio = venta.servicio or "Sin servicio"
-        por_servicio[servicio] += monto
-        if venta.estatus_pago == Venta.EstatusPago.PAGADO:
-            total_pagado += monto
-        elif venta.estatus_pago == Venta.EstatusPago.PENDIENTE:
-            total_pendiente += monto
+        por_servicio[fila["servicio"] or "Sin servicio"] += monto
+        total_pagado += fila["pagado"] or Decimal("0")
+        total_pendiente += fila["pendiente"] or Decimal("0")
+        ventas_count += fila["n"] or 0
 
     servicios_top = _top_with_otros(list(por_servicio.items()), top_n=10)
     labels_servicio = [s for s, _ in servicios_top]
@@ -183,13 +257,13 @@ def _ventas_resumen_data(ventas):
         "total_general": float(total_general),
         "total_pagado": float(total_pagado),
         "total_pendiente": float(total_pendiente),
+        "ventas_count": ventas_count,
     }
 
 
 def ventas_dashboard(request):
     fecha_desde, fecha_hasta = _get_ventas_rango(request, allow_empty=True)
-    ventas = list(_ventas_queryset_for_rango(fecha_desde, fecha_hasta))
-    resumen_data = _ventas_resumen_data(ventas)
+    resumen_data = _ventas_resumen_data(fecha_desde, fecha_hasta)
     chart_data = {
         "labels_servicio": resumen_data["labels_servicio"],
         "totales_servicio": resumen_data["totales_servicio"],
@@ -203,7 +277,7 @@ def ventas_dashboard(request):
     fecha_hasta_label = fecha_hasta.strftime("%d/%m/%Y") if fecha_hasta else ""
 
     context = {
-        "ventas_count": len(ventas),
+        "ventas_count": resumen_data["ventas_count"],
         "fecha_desde": fecha_desde_str,
         "fecha_hasta": fecha_hasta_str,
         "fecha_desde_label": fecha_desde_label,
@@ -280,34 +354,14 @@ def _try_register_poppins():
         return None, None
 
 
-def ventas_resumen_pdf(request):
-    fecha_desde, fecha_hasta = _get_ventas_rango(request, allow_empty=True)
-    ventas = list(_ventas_queryset_for_rango(fecha_desde, fecha_hasta))
-    resumen_data = _ventas_resumen_data(ventas)
-
-    if not fecha_desde and not fecha_hasta:
-        fechas = [v.fecha for v in ventas if v.fecha]
-        if fechas:
-            fecha_desde = min(fechas)
-            fecha_hasta = max(fechas)
+def _ventas_resumen_pdf_bytes(fecha_desde, fecha_hasta):
+    resumen_data = _ventas_resumen_data(fecha_desde, fecha_hasta)
 
     desde_txt = _format_fecha_larga(fecha_desde)
     hasta_txt = _format_fecha_larga(fecha_hasta)
     subtitle_text = f"Fechas:<br/>{desde_txt}<br/>{hasta_txt}"
 
-    template_path = settings.BASE_DIR / "static" / "img" / "MEMBRETE.pdf"
-    pagesize = landscape(letter)
-    if template_path.exists():
-        try:
-            template_reader = PdfReader(str(template_path))
-            template_page = template_reader.pages[0]
-            pagesize = (float(template_page.mediabox.width), float(template_page.mediabox.height))
-        except Exception:
-            template_reader = None
-            template_page = None
-    else:
-        template_reader = None
-        template_page = None
+    pagesize = membrete_pagesize()
 
     buffer = BytesIO()
     doc = SimpleDocTemplate(
@@ -688,25 +742,27 @@ def ventas_resumen_pdf(request):
     )
     elements.append(charts_table)
 
-    doc.build(elements)
-    content_pdf = buffer.getvalue()
+    build_con_membrete(doc, elements)
+    pdf = buffer.getvalue()
     buffer.close()
+    return pdf
 
-    if template_reader and template_page:
-        content_reader = PdfReader(BytesIO(content_pdf))
-        writer = PdfWriter()
-        for page in content_reader.pages:
-            base = copy.copy(template_page)
-            if base.mediabox != page.mediabox:
-                base.mediabox = page.mediabox
-            base.merge_page(page)
-            writer.add_page(base)
-        output = BytesIO()
-        writer.write(output)
-        pdf = output.getvalue()
-        output.close()
-    else:
-        pdf = content_pdf
+
+def ventas_resumen_pdf(request):
+    fecha_desde, fecha_hasta = _get_ventas_rango(request, allow_empty=True)
+    filtros = {"fecha_desde": fecha_desde, "fecha_hasta": fecha_hasta}
+
+    if not fecha_desde and not fecha_hasta:
+        fechas = Venta.objects.aggregate(min_fecha=Min("fecha"), max_fecha=Max("fecha"))
+        fecha_desde = fechas["min_fecha"]
+        fecha_hasta = fechas["max_fecha"]
+
+    pdf = report_cache.get_or_build(
+        "resumen_ventas",
+        filtros,
+        report_cache.data_version(Venta),
+        lambda: _ventas_resumen_pdf_bytes(fecha_desde, fecha_hasta),
+    )
 
     def _safe_date_suffix(value):
         return value.strftime("%d-%m-%y") if value else ""